@@ -0,0 +1,46 @@
+# Compares converting many readings with cel_to_fah one sardine call at a time against a
+# single call on an array of all of them. Needs numpy.
+# Run from the repository root: python -m benchmarks.bench_arrays
+import io
+import sys
+import timeit
+from contextlib import redirect_stdout
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter, BACKENDS
+
+PRELUDE = '''def cel_to_fah(x) do
+  return 1.8*x + 32
+end
+'''
+
+# one sardine call per reading, reading them out of an array
+SCALAR = PRELUDE + '''dec readings = linspace(-40, 60, %d)
+dec total = 0
+for i in 0..len(readings) - 1 total = total + cel_to_fah(at(readings, i))
+print total
+'''
+
+# one call for all of them
+VECTOR = PRELUDE + '''dec readings = linspace(-40, 60, %d)
+print sum(cel_to_fah(readings))
+'''
+
+
+def bench(backend, source, number=3):
+  statements = Parser(Tokenizer(source).tokenize()).parse()
+
+  def run():
+    with redirect_stdout(io.StringIO()):
+      Interpreter(backend, memoize=False).interpret(statements)
+  return min(timeit.repeat(run, number=number, repeat=3)) / number
+
+
+if __name__ == "__main__":
+  sys.setrecursionlimit(10000)
+  scalar_count, vector_count = 20000, 1000000
+  print("%-10s%22s%22s%10s" % ("backend", "scalar ns/reading", "vector ns/reading", "speedup"))
+  for backend in BACKENDS:
+    scalar = bench(backend, SCALAR % scalar_count) / scalar_count * 1e9
+    vector = bench(backend, VECTOR % vector_count) / vector_count * 1e9
+    print("%-10s%22.1f%22.2f%9.0fx" % (backend, scalar, vector, scalar / vector))
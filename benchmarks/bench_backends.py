@@ -0,0 +1,50 @@
+# Compares execution throughput of the interpreter backends on arithmetic-heavy programs.
+# Run from the repository root: python -m benchmarks.bench_backends
+import sys
+import timeit
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter, BACKENDS
+
+PRELUDE = open('math.sd').read() + '''
+def cel_to_fah(x) do
+  return 1.8*x + 32
+end
+def poly(x) do
+  return (x * x * 3 - x / 2 + 7) * (x - 1) + abs(x - 10)
+end
+def repeat_cel(n) do
+  if n <= 0 return 0
+  cel_to_fah(n)
+  return repeat_cel(n - 1)
+end
+def repeat_poly(n) do
+  if n <= 0 return 0
+  poly(n)
+  return repeat_poly(n - 1)
+end
+'''
+
+WORKLOADS = {
+  'pow': 'pow(1.0001, 400)\n',
+  'cel_to_fah': 'repeat_cel(400)\n',
+  'poly': 'repeat_poly(400)\n',
+}
+
+
+def parse(source):
+  return Parser(Tokenizer(source).tokenize()).parse()
+
+
+def bench(backend, workload, number=50):
+  interpreter = Interpreter(backend)
+  interpreter.interpret(parse(PRELUDE))
+  statements = parse(WORKLOADS[workload])
+  return min(timeit.repeat(lambda: interpreter.interpret(statements), number=number, repeat=5)) / number * 1e3
+
+
+if __name__ == "__main__":
+  sys.setrecursionlimit(10000)
+  print("%-12s" % "workload" + "".join("%12s" % (backend + " ms") for backend in BACKENDS))
+  for workload in WORKLOADS:
+    print("%-12s" % workload + "".join("%12.3f" % bench(backend, workload) for backend in BACKENDS))
@@ -0,0 +1,45 @@
+# Runs a few hundred small scripts that import math.sd through the batch runner with 1, 2, 4...
+# up to one worker per core, printing the throughput of each and its speedup over one worker.
+# Run from the repository root: python -m benchmarks.bench_batch
+import os
+import shutil
+import tempfile
+import time
+from src.batch import run_scripts
+from benchmarks.suite import ROOT_DIR
+
+SCRIPT = '''import math
+dec total = 0
+for i in 1..400 total = total + abs(-i) + pow(2, %d)
+print total
+'''
+
+
+def bench(pattern, workers, count):
+  start = time.perf_counter()
+  results = run_scripts([pattern], workers, memoize=False)
+  wall = time.perf_counter() - start
+  assert(len(results) == count and all(result.status == 'ok' for result in results))
+  return wall
+
+
+if __name__ == "__main__":
+  count = 400
+  directory = tempfile.mkdtemp()
+  shutil.copy(os.path.join(ROOT_DIR, 'math.sd'), directory)
+  for i in range(count):
+    with open(os.path.join(directory, 'script_%d.sd' % i), 'w') as f:
+      f.write(SCRIPT % (i % 20 + 1))
+  pattern = os.path.join(directory, 'script_*.sd')
+  workers = [1]
+  while workers[-1] * 2 <= (os.cpu_count() or 1):
+    workers.append(workers[-1] * 2)
+  if workers[-1] != (os.cpu_count() or 1):
+    workers.append(os.cpu_count())
+  print("%-10s%14s%16s%10s" % ("workers", "wall s", "scripts/s", "speedup"))
+  base = None
+  for n in workers:
+    wall = bench(pattern, n, count)
+    base = base or wall
+    print("%-10d%14.3f%16.1f%9.2fx" % (n, wall, count / wall, base / wall))
+  shutil.rmtree(directory)
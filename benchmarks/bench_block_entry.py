@@ -0,0 +1,32 @@
+# Measures the cost of entering a `do ... end` block as the number of globals grows.
+# Run from the repository root: python -m benchmarks.bench_block_entry
+import timeit
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter
+
+
+def make_program(num_globals):
+  lines = []
+  for i in range(num_globals):
+    lines.append("def f%d(x) do\n  return x * %d + 1\nend" % (i, i))
+  return "\n".join(lines) + "\n"
+
+
+def parse(source):
+  return Parser(Tokenizer(source).tokenize()).parse()
+
+
+def bench(num_globals, number=20000):
+  interpreter = Interpreter()
+  interpreter.interpret(parse(make_program(num_globals)))
+  block = interpreter.resolver.resolve(parse("do\n  dec a = 1\n  a = a + 1\nend\n"))[0]
+  env = interpreter.environment
+  seconds = min(timeit.repeat(lambda: block.evaluate(env), number=number, repeat=5))
+  return seconds / number * 1e6
+
+
+if __name__ == "__main__":
+  print("%10s  %14s" % ("globals", "us/block entry"))
+  for num_globals in (0, 10, 100, 1000):
+    print("%10d  %14.3f" % (num_globals, bench(num_globals)))
@@ -0,0 +1,72 @@
+# Measures the cost of a Sardine call and return on the tree-walking backend.
+# Run from the repository root: python -m benchmarks.bench_call_return
+import timeit
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter
+
+PRELUDE = '''def abs(num) do
+  if num >= 0 return num
+  return -num
+end
+def cel_to_fah(x) do
+  return 1.8*x + 32
+end
+def nothing() do
+end
+'''
+
+CALLS = {
+  'abs(-3)': 'abs(-3)',
+  'cel_to_fah(-41)': 'cel_to_fah(-41)',
+  'nothing()': 'nothing()',
+}
+
+
+class _Return(Exception):
+  def __init__(self, value):
+    self.value = value
+
+
+def _raise_return(value):
+  raise _Return(value)
+
+
+def _status_return(value):
+  return (value,)
+
+
+def _via_exception():
+  try:
+    _raise_return(1.0)
+  except _Return as r:
+    return r.value
+
+
+def _via_status():
+  result = _status_return(1.0)
+  if result is not None:
+    return result[0]
+
+
+def parse(source):
+  return Parser(Tokenizer(source).tokenize()).parse()
+
+
+def bench(call, number=20000):
+  interpreter = Interpreter('tree')
+  interpreter.interpret(parse(PRELUDE))
+  expr = interpreter.resolver.resolve(parse(call + '\n'))[0].expr
+  env = interpreter.environment
+  return min(timeit.repeat(lambda: expr.evaluate(env), number=number, repeat=15)) / number * 1e6
+
+
+if __name__ == "__main__":
+  print("%-18s  %10s" % ("call", "us/call"))
+  for name, call in CALLS.items():
+    print("%-18s  %10.3f" % (name, bench(call)))
+  # the bare cost of the two ways a return can reach the caller
+  print("")
+  print("%-18s  %10s" % ("return mechanism", "us/return"))
+  for name, function in (("exception", _via_exception), ("status value", _via_status)):
+    print("%-18s  %10.3f" % (name, min(timeit.repeat(function, number=200000, repeat=15)) / 200000 * 1e6))
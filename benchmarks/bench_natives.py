@@ -0,0 +1,40 @@
+# Compares the builtin native abs and pow against math.sd's versions written in sardine,
+# called in a loop.
+# Run from the repository root: python -m benchmarks.bench_natives
+import io
+import sys
+import timeit
+from contextlib import redirect_stdout
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter, BACKENDS
+from src.modules import ModuleLoader
+
+LOOP = '''dec total = 0
+for i in 1..2000 total = total + abs(-i) + pow(1.0001, 20)
+print total
+'''
+
+PROGRAMS = {
+  'native': LOOP,
+  'math.sd': 'import math\n' + LOOP,
+}
+
+
+def bench(backend, source, number=3):
+  statements = Parser(Tokenizer(source).tokenize()).parse()
+  out = io.StringIO()
+
+  def run():
+    # memoization off, in math.sd too, so every call runs; a fresh loader loads math.sd
+    # again on every run, as a new process would
+    with redirect_stdout(out):
+      Interpreter(backend, ModuleLoader(memoize=False), memoize=False).interpret(statements)
+  return min(timeit.repeat(run, number=number, repeat=5)) / number * 1e3
+
+
+if __name__ == "__main__":
+  sys.setrecursionlimit(10000)
+  print("%-10s" % "backend" + "".join("%14s" % (name + " ms") for name in PROGRAMS))
+  for backend in BACKENDS:
+    print("%-10s" % backend + "".join("%14.3f" % bench(backend, source) for source in PROGRAMS.values()))
@@ -0,0 +1,65 @@
+# Compares integer-heavy programs under the integer/float numeric model against the same
+# programs with every literal written as a float, which is how all numbers used to run.
+# Run from the repository root: python -m benchmarks.bench_numbers
+import io
+import re
+import sys
+import timeit
+from contextlib import redirect_stdout
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter, BACKENDS
+
+PRELUDE = open('math.sd').read() + '''
+def fib(n) do
+  if n < 2 return n
+  return fib(n - 1) + fib(n - 2)
+end
+'''
+
+# workload -> (program, the exact result)
+WORKLOADS = {
+  'loop': ('dec total = 0\nfor i in 1..5000 total = total + i * i * 3 - i\nprint total\n',
+    sum(i * i * 3 - i for i in range(1, 5001))),
+  'fib': ('print fib(15)\n', 610),
+  'pow': ('print pow(3, 90)\n', 3 ** 90),
+  'halving': ('dec n = 1048576 * 1048576\ndec steps = 0\nwhile n > 1 do\n  n = n / 2\n  steps = steps + 1\nend\nprint steps\n', 40),
+}
+
+# an integer literal that is not part of a float: '1' in '1..3' but not the '2' or '5' of '2.5'
+_INTEGER = re.compile(r'(?<!\w)(?<!\d\.)(\d+)(?!\w|\.\d)')
+
+
+def as_floats(source):
+  return _INTEGER.sub(r'\1.0', source)
+
+
+def parse(source):
+  return Parser(Tokenizer(source).tokenize()).parse()
+
+
+def bench(backend, source, floats=False, number=5):
+  # memoization off: the point is the arithmetic, not how often it runs
+  prelude = as_floats(PRELUDE) if floats else PRELUDE
+  interpreter = Interpreter(backend, memoize=False)
+  interpreter.interpret(parse(prelude))
+  statements = parse(as_floats(source) if floats else source)
+  out = io.StringIO()
+  with redirect_stdout(out):
+    seconds = min(timeit.repeat(lambda: interpreter.interpret(statements), number=number, repeat=5)) / number
+  return seconds * 1e3, out.getvalue().split('\n')[0]
+
+
+def exact(printed, expected):
+  # '40.0' is exact for 40, '8.727963568087713e+42' is not for 3 ** 90
+  return 'yes' if printed.removesuffix('.0') == str(expected) else 'no'
+
+
+if __name__ == "__main__":
+  sys.setrecursionlimit(10000)
+  print("%-10s%-10s%12s%12s%10s%10s" % ("workload", "backend", "int ms", "float ms", "int ok", "float ok"))
+  for workload, (source, expected) in WORKLOADS.items():
+    for backend in BACKENDS:
+      int_ms, int_out = bench(backend, source)
+      float_ms, float_out = bench(backend, source, True)
+      print("%-10s%-10s%12.3f%12.3f%10s%10s" % (workload, backend, int_ms, float_ms, exact(int_out, expected), exact(float_out, expected)))
@@ -0,0 +1,55 @@
+# Times the tree backend on the benchmark suite with node specialization on and off, and
+# shows what the nodes specialized to and how often a guard failed.
+# Run from the repository root: python -m benchmarks.bench_specialization [--only fib,pow]
+import argparse
+import io
+import sys
+import timeit
+from contextlib import redirect_stdout
+from src import nodes
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.modules import ModuleLoader
+from benchmarks.suite import programs, ROOT_DIR
+
+
+def run(source):
+  # memoization off, so every call really runs
+  statements = Parser(Tokenizer(source).buffer()).parse()
+  interpreter = Interpreter('tree', ModuleLoader([ROOT_DIR]), memoize=False)
+  with redirect_stdout(io.StringIO()):
+    interpreter.interpret(statements)
+
+
+def bench(source, specializing, number=3):
+  # ms per run, parsing included
+  nodes.specializing = specializing
+  try:
+    return min(timeit.repeat(lambda: run(source), number=number, repeat=5)) / number * 1e3
+  finally:
+    nodes.specializing = True
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_specialization')
+  parser.add_argument('--only', help='comma separated program names')
+  options = parser.parse_args(argv)
+  sys.setrecursionlimit(10000)
+  selected = programs()
+  if options.only:
+    selected = {name: selected[name] for name in options.only.split(',')}
+  print("%-16s%12s%12s%14s%14s" % ("program", "generic ms", "special ms", "specialized", "deoptimized"))
+  for name, source in selected.items():
+    nodes.reset_specialization_counts()
+    run(source)
+    specialized, deoptimized = sum(nodes.specializations.values()), sum(nodes.deoptimizations.values())
+    misses = nodes.deoptimizations.most_common(3)
+    generic, special = bench(source, False), bench(source, True)
+    print("%-16s%12.3f%12.3f%14d%14d" % (name, generic, special, specialized, deoptimized))
+    for label, count in misses:
+      print("%16s deoptimized %s %d times" % ('', label, count))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,70 @@
+# Compares running a large generated script whole against streaming it declaration by
+# declaration: time to the first line of output, total time and peak traced memory.
+# Run from the repository root: python -m benchmarks.bench_streaming [megabytes]
+import io
+import itertools
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter
+
+RECORD = 'dec r{n} = {n} * 2 + 1\nprint r{n} - 1\n'
+
+
+class FirstWrite(io.StringIO):
+  # remembers when output first appeared
+  def __init__(self):
+    super().__init__()
+    self.first = None
+
+  def write(self, text):
+    if self.first is None:
+      self.first = time.perf_counter()
+    return super().write(text)
+
+
+def whole(path):
+  with open(path, 'r') as f:
+    Interpreter().interpret(Parser(Tokenizer(f.read() + '\n').tokenize()).parse())
+
+
+def streamed(path):
+  with open(path, 'r') as f:
+    tokens = Tokenizer('').stream(itertools.chain(f, ['\n']))
+    Interpreter().interpret_stream(Parser(tokens).declarations())
+
+
+def bench(run, path):
+  out = FirstWrite()
+  tracemalloc.start()
+  start = time.perf_counter()
+  with redirect_stdout(out):
+    run(path)
+  total = time.perf_counter() - start
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return out.first - start, total, peak / 1e6
+
+
+if __name__ == "__main__":
+  megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+  fd, path = tempfile.mkstemp(suffix='.sd')
+  with os.fdopen(fd, 'w') as f:
+    size, n = 0, 0
+    while size < megabytes * 1e6:
+      record = RECORD.format(n=n)
+      f.write(record)
+      size += len(record)
+      n += 1
+  try:
+    print("script: %.2f MB, %d declarations" % (size / 1e6, 2 * n))
+    print("%-10s%16s%12s%12s" % ("mode", "first out s", "total s", "peak MB"))
+    for name, run in (('whole', whole), ('streamed', streamed)):
+      print("%-10s%16.3f%12.3f%12.1f" % ((name,) + bench(run, path)))
+  finally:
+    os.remove(path)
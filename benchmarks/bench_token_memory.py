@@ -0,0 +1,41 @@
+# Reports the memory per token of a Token list against a TokenBuffer, and the time to
+# tokenize and parse from each. Run from the repository root:
+# python -m benchmarks.bench_token_memory [megabytes]
+import sys
+import time
+import tracemalloc
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from benchmarks.bench_tokenizer import generate
+
+
+def traced(build):
+  # the result of build and the bytes it still holds once built
+  tracemalloc.start()
+  result = build()
+  size = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  return result, size
+
+
+def timed(run, repeat=3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+
+if __name__ == "__main__":
+  megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+  source = generate(megabytes)
+  tokens, list_bytes = traced(lambda: Tokenizer(source).tokenize())
+  buffer, buffer_bytes = traced(lambda: Tokenizer(source).buffer())
+  count = len(buffer)
+  assert len(tokens) == count
+  print("source: %.2f MB, %d tokens, %.2f source bytes per token" % (len(source) / 1e6, count, len(source) / count))
+  print("%-14s%16s%16s" % ("store", "bytes/token", "parse s"))
+  print("%-14s%16.1f%16.3f" % ("Token list", list_bytes / count, timed(lambda: Parser(Tokenizer(source).tokenize()).parse())))
+  print("%-14s%16.1f%16.3f" % ("TokenBuffer", buffer_bytes / count, timed(lambda: Parser(Tokenizer(source).buffer()).parse())))
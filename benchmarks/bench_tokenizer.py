@@ -0,0 +1,55 @@
+# Measures tokenizer throughput, in MB of source per second, for each tokenizer mode.
+# Run from the repository root: python -m benchmarks.bench_tokenizer [megabytes]
+import sys
+import time
+from src.tokenizer import Tokenizer, MODES
+
+CHUNK = '''# converts and accumulates
+def convert_{n}(celsius, scale) do
+  dec result = 1.8 * celsius + 32
+  if result >= 100 and not (scale == None) do
+    print "hot: "
+    result = result / scale - 0.5
+  end
+  return result
+end
+
+dec total_{n} = 0
+for i in 1..{count} do
+  total_{n} = total_{n} + convert_{n}(i, 2.25) * (i - 1) != 3
+end
+while total_{n} > 10 total_{n} = total_{n} / 2
+print total_{n}
+'''
+
+
+def generate(megabytes):
+  # distinct names per chunk, so the source is not one block repeated verbatim
+  parts, size, i = [], 0, 0
+  while size < megabytes * 1e6:
+    part = CHUNK.format(n=i, count=i % 50)
+    parts.append(part)
+    size += len(part)
+    i += 1
+  return ''.join(parts)
+
+
+def bench(source, mode, repeat=3):
+  # best of repeat runs, in MB/s, and the token count
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    tokens = Tokenizer(source, mode).tokenize()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return len(source) / 1e6 / best, len(tokens)
+
+
+if __name__ == "__main__":
+  megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+  source = generate(megabytes)
+  print("source: %.2f MB, %d lines" % (len(source) / 1e6, source.count('\n')))
+  print("%-8s%12s%12s" % ("mode", "MB/s", "tokens"))
+  for mode in MODES:
+    rate, count = bench(source, mode)
+    print("%-8s%12.2f%12d" % (mode, rate, count))
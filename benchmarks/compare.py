@@ -0,0 +1,75 @@
+# Compares two JSON result files saved by benchmarks.run, such as runs from two checkouts,
+# and fails when a stage of a program got slower by more than the threshold.
+# Run from the repository root:
+#   python -m benchmarks.compare old.json new.json [--threshold 10] [--floor 0.1]
+import argparse
+import json
+import sys
+
+STAGES = ('tokenize', 'parse', 'execute')
+
+
+def compare(baseline, current, threshold=10.0, floor=0.1):
+  # one row per program and stage present in both results. a stage regressed when its
+  # median grew by more than threshold percent and by more than floor milliseconds, the
+  # latter keeping sub-millisecond stages from failing on timer noise.
+  rows = []
+  for name, stages in current['results'].items():
+    if name not in baseline['results']:
+      continue
+    for stage in STAGES:
+      before = baseline['results'][name][stage]['median']
+      after = stages[stage]['median']
+      change = (after - before) / before * 100 if before else 0.0
+      rows.append({
+        'program': name,
+        'stage': stage,
+        'before': before,
+        'after': after,
+        'change': change,
+        'regressed': change > threshold and (after - before) * 1e3 > floor,
+      })
+  return rows
+
+
+def setting_differences(baseline, current):
+  # the run settings that differ between two results, which makes their times incomparable.
+  # results saved before memoization existed ran without it
+  defaults = {'backend': 'tree', 'memoize': False}
+  differences = []
+  for key, default in defaults.items():
+    before, after = baseline['meta'].get(key, default), current['meta'].get(key, default)
+    if before != after:
+      differences.append("%s was %s in the baseline and is %s now" % (key, before, after))
+  return differences
+
+
+def print_comparison(rows, threshold):
+  print("%-16s%-10s%14s%14s%10s" % ("program", "stage", "before ms", "after ms", "change"))
+  for row in rows:
+    print("%-16s%-10s%14.3f%14.3f%+9.1f%%%s" % (row['program'], row['stage'], row['before'] * 1e3,
+      row['after'] * 1e3, row['change'], "  REGRESSION" if row['regressed'] else ""))
+  regressions = sum(1 for row in rows if row['regressed'])
+  print("%d regression%s over %.1f%%" % (regressions, "" if regressions == 1 else "s", threshold))
+
+
+def main(args):
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.compare', description='Compares two benchmark results.')
+  parser.add_argument('baseline')
+  parser.add_argument('current')
+  parser.add_argument('--threshold', type=float, default=10.0, help='percent slowdown that counts as a regression')
+  parser.add_argument('--floor', type=float, default=0.1, help='milliseconds of slowdown always tolerated')
+  options = parser.parse_args(args)
+  with open(options.baseline, 'r') as f:
+    baseline = json.load(f)
+  with open(options.current, 'r') as f:
+    current = json.load(f)
+  rows = compare(baseline, current, options.threshold, options.floor)
+  for difference in setting_differences(baseline, current):
+    print("warning: " + difference)
+  print_comparison(rows, options.threshold)
+  return 1 if any(row['regressed'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
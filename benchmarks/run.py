@@ -0,0 +1,154 @@
+# Runs the benchmark suite, timing the tokenize, parse and execute stages of every program
+# separately, and optionally saves the results as JSON or checks them against a baseline.
+# Run from the repository root:
+#   python -m benchmarks.run [--backend tree] [--memo] [--repeat 5] [--warmup 1] [--only fib,pow]
+#                            [--save results.json] [--baseline old.json] [--threshold 10]
+# memoization of pure functions is off unless --memo is given, so a program like fib
+# measures calls rather than cache hits, as it did before the interpreter memoized
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter, BACKENDS
+from src.modules import ModuleLoader
+from benchmarks.suite import programs, ROOT_DIR
+from benchmarks.compare import STAGES, compare, print_comparison, setting_differences
+
+
+def run_stages(source, backend, memoize=False):
+  # seconds spent in each stage for one run of source
+  times = dict()
+  start = time.perf_counter()
+  tokens = Tokenizer(source).buffer()
+  times['tokenize'] = time.perf_counter() - start
+  start = time.perf_counter()
+  statements = Parser(tokens).parse()
+  times['parse'] = time.perf_counter() - start
+  # a loader of its own, so imported modules are loaded and run again on every run
+  interpreter = Interpreter(backend, ModuleLoader([ROOT_DIR], memoize), memoize=memoize)
+  with redirect_stdout(io.StringIO()):
+    start = time.perf_counter()
+    interpreter.interpret(statements)
+    times['execute'] = time.perf_counter() - start
+  return times
+
+
+def trace_stages(source, backend, memoize=False):
+  # peak bytes allocated during each stage, from one extra run under tracemalloc
+  peaks = dict()
+  tracemalloc.start()
+  tokens = Tokenizer(source).buffer()
+  peaks['tokenize'] = tracemalloc.get_traced_memory()[1]
+  tracemalloc.reset_peak()
+  base = tracemalloc.get_traced_memory()[0]
+  statements = Parser(tokens).parse()
+  peaks['parse'] = tracemalloc.get_traced_memory()[1] - base
+  tracemalloc.reset_peak()
+  base = tracemalloc.get_traced_memory()[0]
+  with redirect_stdout(io.StringIO()):
+    Interpreter(backend, ModuleLoader([ROOT_DIR], memoize), memoize=memoize).interpret(statements)
+  peaks['execute'] = tracemalloc.get_traced_memory()[1] - base
+  tracemalloc.stop()
+  return peaks
+
+
+def summarize(samples):
+  return {
+    'median': statistics.median(samples),
+    'mean': statistics.mean(samples),
+    'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    'min': min(samples),
+    'max': max(samples),
+  }
+
+
+def bench(source, backend, repeat, warmup, memoize=False):
+  # warm-up runs fill caches and let the allocator settle; only the later runs count
+  for _ in range(warmup):
+    run_stages(source, backend, memoize)
+  runs = [run_stages(source, backend, memoize) for _ in range(repeat)]
+  peaks = trace_stages(source, backend, memoize)
+  result = dict()
+  for stage in STAGES:
+    result[stage] = summarize([run[stage] for run in runs])
+    result[stage]['peak_bytes'] = peaks[stage]
+  return result
+
+
+def revision():
+  try:
+    return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+      text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def run_suite(backend='tree', repeat=5, warmup=1, only=None, report=print, memoize=False):
+  sources = programs()
+  names = [name for name in sources if not only or name in only]
+  results = dict()
+  for name in names:
+    results[name] = bench(sources[name], backend, repeat, warmup, memoize)
+    report("%-16s" % name + "".join("%10.2f ms ±%5.1f%%" % (results[name][stage]['median'] * 1e3,
+      _relative(results[name][stage])) for stage in STAGES) + "%12.1f KB" % (results[name]['execute']['peak_bytes'] / 1e3))
+  return {
+    'meta': {
+      'revision': revision(),
+      'python': platform.python_version(),
+      'platform': platform.platform(),
+      'backend': backend,
+      'memoize': memoize,
+      'repeat': repeat,
+      'warmup': warmup,
+      'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    },
+    'results': results,
+  }
+
+
+def _relative(stats):
+  return stats['stdev'] / stats['median'] * 100 if stats['median'] else 0.0
+
+
+def main(args):
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Runs the Sardine benchmark suite.')
+  parser.add_argument('--backend', default='tree', choices=BACKENDS)
+  parser.add_argument('--memo', action='store_true', help='memoize pure functions, as the interpreter does by default')
+  parser.add_argument('--repeat', type=int, default=5, help='measured runs per program')
+  parser.add_argument('--warmup', type=int, default=1, help='unmeasured runs before them')
+  parser.add_argument('--only', help='comma separated program names')
+  parser.add_argument('--save', help='write the results to this JSON file')
+  parser.add_argument('--baseline', help='JSON results to compare against')
+  parser.add_argument('--threshold', type=float, default=10.0, help='percent slowdown that fails the comparison')
+  options = parser.parse_args(args)
+
+  sys.setrecursionlimit(20000)
+  print("%-16s" % "program" + "".join("%21s" % (stage + " median") for stage in STAGES) + "%15s" % "execute peak")
+  only = set(options.only.split(',')) if options.only else None
+  results = run_suite(options.backend, options.repeat, options.warmup, only, memoize=options.memo)
+  if options.save:
+    with open(options.save, 'w') as f:
+      json.dump(results, f, indent=2, sort_keys=True)
+  if options.baseline:
+    with open(options.baseline, 'r') as f:
+      baseline = json.load(f)
+    rows = compare(baseline, results, options.threshold)
+    print("")
+    for difference in setting_differences(baseline, results):
+      print("warning: " + difference)
+    print_comparison(rows, options.threshold)
+    if any(row['regressed'] for row in rows):
+      return 1
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,52 @@
+# The programs of the benchmark suite. Hand-written ones live in benchmarks/programs,
+# the rest are generated here so their size can be scaled.
+import os
+from benchmarks.bench_tokenizer import generate
+
+PROGRAMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'programs')
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # holds math.sd
+
+
+def many_globals(count=1500):
+  # declares count globals, then reads and updates every one of them
+  lines = ['dec g%d = %d' % (i, i) for i in range(count)]
+  lines.append('dec total = 0')
+  lines += ['total = total + g%d * 2' % i for i in range(count)]
+  lines += ['g%d = g%d - 1' % (i, i) for i in range(count)]
+  lines.append('print total')
+  return '\n'.join(lines) + '\n'
+
+
+def call_chain(depth=150, calls=40):
+  # link_0 calls link_1 and so on down to link_depth, not in tail position
+  lines = []
+  for i in range(depth):
+    lines.append('def link_%d(x) do\n  return 1 + link_%d(x)\nend' % (i, i + 1))
+  lines.append('def link_%d(x) do\n  return x\nend' % depth)
+  lines.append('dec total = 0')
+  lines.append('for i in 1..%d total = total + link_0(i)' % calls)
+  lines.append('print total')
+  return '\n'.join(lines) + '\n'
+
+
+def large_file(megabytes=0.25):
+  return generate(megabytes)
+
+
+GENERATED = {
+  'many_globals': many_globals,
+  'call_chain': call_chain,
+  'large_file': large_file,
+}
+
+
+def programs():
+  # name -> sardine source, in a stable order
+  found = dict()
+  for name in sorted(os.listdir(PROGRAMS_DIR)):
+    if name.endswith('.sd'):
+      with open(os.path.join(PROGRAMS_DIR, name), 'r') as f:
+        found[name[:-len('.sd')]] = f.read() + '\n'
+  for name, build in GENERATED.items():
+    found[name] = build()
+  return found
@@ -0,0 +1,51 @@
+from .native import NativeFunction
+
+try:
+  import numpy
+except ImportError:  # arrays are optional
+  numpy = None
+
+# array values are numpy ndarrays, so the arithmetic operators already apply elementwise
+# and broadcast. indices and slices count from 0 and leave out their stop, as in numpy.
+# reductions and element reads hand back python numbers, which keep sardine's integer and
+# float semantics.
+
+
+def available():
+  return numpy is not None
+
+
+def make(values):
+  # the value of an array literal
+  return numpy.array(values)
+
+
+def _scalar(value):
+  return value.item() if isinstance(value, numpy.generic) else value
+
+
+def _save(path, array):
+  numpy.save(path, numpy.asarray(array), allow_pickle=False)
+
+
+_BUILTINS = {
+  'zeros': (lambda n: numpy.zeros(int(n)), 1),
+  'fill': (lambda n, value: numpy.full(int(n), value), 2),
+  'arange': (lambda start, stop: numpy.arange(start, stop), 2),
+  'linspace': (lambda start, stop, n: numpy.linspace(start, stop, int(n)), 3),
+  'at': (lambda array, i: _scalar(array[int(i)]), 2),
+  'slice': (lambda array, start, stop: array[int(start):int(stop)], 3),
+  'sum': (lambda array: _scalar(numpy.sum(array)), 1),
+  'min': (lambda array: _scalar(numpy.min(array)), 1),
+  'max': (lambda array: _scalar(numpy.max(array)), 1),
+  'mean': (lambda array: _scalar(numpy.mean(array)), 1),
+  'load': (lambda path: numpy.load(path, allow_pickle=False), 1),
+  'save': (_save, 2),
+}
+
+
+def natives():
+  # the array builtins, none when numpy is missing
+  if numpy is None:
+    return []
+  return [NativeFunction(name, function, arity) for name, (function, arity) in _BUILTINS.items()]
@@ -0,0 +1,132 @@
+import glob
+import io
+import multiprocessing
+import os
+import signal
+import time
+from contextlib import redirect_stdout
+from . import cache
+from .errors import SardineImportError
+from .interpreter import Interpreter
+from .modules import ModuleLoader
+
+# runs many independent scripts across a pool of worker processes, one per core unless
+# told otherwise. a worker keeps one module loader for its whole life, so a prelude such
+# as math.sd is parsed and resolved once per worker instead of once per script; its top
+# level still runs again for every script that imports it, so no script sees the state
+# another one left behind. each script's stdout is captured on its own, and a script
+# still running when its timeout expires is stopped by SIGALRM, where the platform has it.
+OK, ERROR, TIMEOUT = 'ok', 'error', 'timeout'
+
+
+class Result:
+  # how running one script went
+  def __init__(self, path: str, status: str, output: str, seconds: float, message=None):
+    self.path = path
+    self.status = status  # OK, ERROR or TIMEOUT
+    self.output = output  # everything the script printed
+    self.seconds = seconds  # wall time, parsing included
+    self.message = message  # what went wrong, for ERROR and TIMEOUT
+
+  def __str__(self):
+    line = "%-8s%10.1f ms  %s" % (self.status, self.seconds * 1e3, self.path)
+    return line + ("  " + self.message if self.message else "")
+
+
+class Timeout(BaseException):
+  # a BaseException, so nothing the script runs through can swallow it
+  pass
+
+
+def expand(patterns):
+  # the scripts patterns name, globs expanded in sorted order, each path once
+  paths = []
+  for pattern in patterns:
+    if any(c in pattern for c in '*?['):
+      paths.extend(sorted(glob.glob(pattern, recursive=True)))
+    else:
+      paths.append(pattern)
+  return list(dict.fromkeys(paths))
+
+
+def run_scripts(patterns, workers=None, timeout=None, backend='tree', optimize=False, inline=True, memoize=True):
+  # the Result of every script patterns name, in order. timeout is in seconds, per script
+  paths = expand(patterns)
+  if not paths:
+    return []
+  workers = min(workers or os.cpu_count() or 1, len(paths))
+  # a few scripts per task keeps the workers busy without a round trip for every script
+  chunk = max(1, len(paths) // (workers * 8))
+  with multiprocessing.Pool(workers, _start, (backend, optimize, inline, memoize, timeout)) as pool:
+    return list(pool.imap(_run, paths, chunk))
+
+
+def summarize(results, wall: float, workers: int):
+  # a line per script, then the totals
+  counts = {status: sum(result.status == status for result in results) for status in (OK, ERROR, TIMEOUT)}
+  total = sum(result.seconds for result in results)
+  lines = [str(result) for result in results]
+  lines.append("%d scripts: %s in %.2fs wall, %.2fs of script time on %d workers" % (
+    len(results), ", ".join("%d %s" % (count, status) for status, count in counts.items()), wall, total, workers))
+  return "\n".join(lines)
+
+
+class Worker:
+  # what a worker process keeps from one script to the next
+  def __init__(self, backend='tree', optimize=False, inline=True, memoize=True, timeout=None):
+    # sardine.py imports this module
+    from .sardine import SardineLang
+    SardineLang.inline = inline
+    self.kind = SardineLang.cache_kind(optimize)
+    self.build = lambda source: SardineLang.compile_source(source, optimize)
+    self.backend = backend
+    self.memoize = memoize
+    self.timeout = timeout if hasattr(signal, 'setitimer') else None
+    self.loader = ModuleLoader(memoize=memoize)
+    if self.timeout:
+      signal.signal(signal.SIGALRM, _expire)
+
+  def run(self, path: str):
+    # the modules stay parsed and resolved, but their top levels run again when imported
+    for module in self.loader.modules.values():
+      module.exports = None
+    self.loader.loading = []  # a script stopped in the middle of an import leaves it behind
+    out = io.StringIO()
+    status, message = OK, None
+    start = time.perf_counter()
+    try:
+      self._alarm(self.timeout)
+      try:
+        with redirect_stdout(out):
+          statements, _ = cache.load(path, self.kind, self.build)
+          interpreter = Interpreter(self.backend, self.loader, os.path.dirname(os.path.abspath(path)), self.memoize)
+          interpreter.interpret(statements)
+      finally:
+        self._alarm(0)
+    except Timeout:
+      status, message = TIMEOUT, "Timed out after %gs." % self.timeout
+    except SardineImportError as e:
+      status, message = ERROR, str(e)
+    except Exception as e:
+      status, message = ERROR, type(e).__name__ + ": " + str(e)
+    return Result(path, status, out.getvalue(), time.perf_counter() - start, message)
+
+  def _alarm(self, seconds):
+    if self.timeout:
+      signal.setitimer(signal.ITIMER_REAL, seconds)
+
+
+_worker = None  # the Worker of this process, once its pool has started it
+
+
+def _start(*settings):
+  global _worker
+  _worker = Worker(*settings)
+
+
+def _run(path):
+  return _worker.run(path)
+
+
+def _expire(signum, frame):
+  raise Timeout()
@@ -0,0 +1,113 @@
+# opcodes. operands follow their opcode inline in the instruction stream.
+# binary operators are numbered last and contiguously so the VM can dispatch them by range.
+LOAD_LOCAL = 0        # slot             push frame value
+LOAD_OUTER = 1        # slot             push value one frame up
+LOAD = 2              # depth, slot      push value depth frames up
+CONST = 3             # index            push constant
+STORE_LOCAL = 4       # slot             store top of stack, leave it on the stack
+STORE = 5             # depth, slot      store top of stack depth frames up, leave it on the stack
+DEFINE = 6            # slot             pop into frame value
+POP = 7
+JUMP = 8              # offset           relative to the next instruction
+JUMP_IF_FALSE = 9     # offset           pops the condition
+JUMP_IF_TRUE_OR_POP = 10   # offset      keeps the condition when jumping
+JUMP_IF_FALSE_OR_POP = 11  # offset      keeps the condition when jumping
+CALL = 12             # argc
+RETURN = 13
+PRINT = 14
+PUSH_SCOPE = 15       # slot count
+POP_SCOPE = 16
+MAKE_FUNCTION = 17    # index of a Code constant
+NEG = 18
+NOT = 19
+TAIL_CALL = 20        # argc             vm callees replace the current frame; always followed by RETURN
+FOR_RANGE = 21        # slot, offset     with [next, end] on the stack: stores next in slot and
+                      #                  advances it, or pops both and jumps once next > end
+IMPORT = 22           # index            binds the globals of the Import node constant
+ADD = 23
+SUBTRACT = 24
+MULTIPLY = 25
+DIVIDE = 26
+GREATER = 27
+GREATER_EQUAL = 28
+LESS = 29
+LESS_EQUAL = 30
+EQUAL = 31
+NOT_EQUAL = 32
+
+OP_NAMES = [
+  'LOAD_LOCAL', 'LOAD_OUTER', 'LOAD', 'CONST', 'STORE_LOCAL', 'STORE', 'DEFINE', 'POP',
+  'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_TRUE_OR_POP', 'JUMP_IF_FALSE_OR_POP', 'CALL', 'RETURN',
+  'PRINT', 'PUSH_SCOPE', 'POP_SCOPE', 'MAKE_FUNCTION', 'NEG', 'NOT', 'TAIL_CALL', 'FOR_RANGE', 'IMPORT', 'ADD',
+  'SUBTRACT', 'MULTIPLY', 'DIVIDE', 'GREATER', 'GREATER_EQUAL', 'LESS', 'LESS_EQUAL', 'EQUAL', 'NOT_EQUAL',
+]
+
+OPERAND_COUNTS = [
+  1, 1, 2, 1, 1, 2, 1, 0,
+  1, 1, 1, 1, 1, 0,
+  0, 1, 0, 1, 0, 0, 1, 2, 1,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+]
+
+JUMPS = (JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE_OR_POP, JUMP_IF_FALSE_OR_POP)
+
+
+class Code:
+  # a compiled function or module body
+  def __init__(self, name: str, arity: int, slot_count: int):
+    self.name = name
+    self.arity = arity
+    self.slot_count = slot_count  # size of the frame the code runs in
+    self.instructions = []
+    self.constants = []
+    self.lines = []  # source line of every instruction word
+    self._constant_index = dict()
+
+  def emit(self, line, *words):
+    self.instructions.extend(words)
+    self.lines.extend([line] * len(words))
+    return len(self.instructions)
+
+  def add_constant(self, value):
+    # literals with equal type and value share a pool entry, code objects never do
+    key = (Code, id(value)) if isinstance(value, Code) else (type(value), value)
+    if key not in self._constant_index:
+      self._constant_index[key] = len(self.constants)
+      self.constants.append(value)
+    return self._constant_index[key]
+
+  def __str__(self):
+    return "<code " + self.name + ">"
+
+
+def disassemble(code: Code):
+  # returns a listing of code and, after it, of every function it defines
+  lines = ["== " + code.name + " (arity " + str(code.arity) + ", slots " + str(code.slot_count) + ") =="]
+  nested = []
+  instructions = code.instructions
+  offset = 0
+  last_line = None
+  while offset < len(instructions):
+    op = instructions[offset]
+    operands = instructions[offset + 1:offset + 1 + OPERAND_COUNTS[op]]
+    line = code.lines[offset]
+    text = "%4s %5d  %-22s" % (line if line != last_line else "|", offset, OP_NAMES[op])
+    text += " ".join(str(operand) for operand in operands)
+    offset += 1 + len(operands)
+    if op in JUMPS:
+      text += "  (to " + str(offset + operands[0]) + ")"
+    elif op == FOR_RANGE:
+      text += "  (to " + str(offset + operands[1]) + ")"
+    elif op in (CONST, MAKE_FUNCTION):
+      constant = code.constants[operands[0]]
+      text += "  (" + (str(constant) if isinstance(constant, Code) else repr(constant)) + ")"
+      if isinstance(constant, Code):
+        nested.append(constant)
+    elif op == IMPORT:
+      text += "  (" + code.constants[operands[0]].name.raw_token + ")"
+    lines.append(text.rstrip())
+    last_line = line
+  for function in nested:
+    lines.append("")
+    lines.append(disassemble(function))
+  return "\n".join(lines)
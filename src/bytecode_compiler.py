@@ -0,0 +1,210 @@
+from .nodes import *
+from .bytecode import *
+
+_BINARY_OPS = {
+  TokenType.PLUS: ADD,
+  TokenType.MINUS: SUBTRACT,
+  TokenType.STAR: MULTIPLY,
+  TokenType.SLASH: DIVIDE,
+  TokenType.GREATER: GREATER,
+  TokenType.GREATER_EQUAL: GREATER_EQUAL,
+  TokenType.LESS: LESS,
+  TokenType.LESS_EQUAL: LESS_EQUAL,
+  TokenType.EQUAL_EQUAL: EQUAL,
+  TokenType.BANG_EQUAL: NOT_EQUAL,
+}
+
+
+class BytecodeCompiler:
+  # compiles a resolved AST to Code objects for the VM
+  def __init__(self):
+    self.code = None
+    self.module = None
+    self.line = 0
+
+  def compile(self, statements, name='<module>'):
+    # module code returns True once a top-level return has run, None if it runs to the end
+    self.code = self.module = Code(name, 0, 0)
+    for stmt in statements:
+      self._compile(stmt)
+    self._emit(CONST, self.code.add_constant(None))
+    self._emit(RETURN)
+    return self.code
+
+  def _compile(self, node):
+    getattr(self, '_compile_' + type(node).__name__)(node)
+
+  def _emit(self, *words):
+    return self.code.emit(self.line, *words)
+
+  def _emit_jump(self, op):
+    # returns the position of the operand to patch
+    return self._emit(op, 0) - 1
+
+  def _patch_jump(self, position):
+    self.code.instructions[position] = len(self.code.instructions) - position - 1
+
+  def _at(self, token):
+    self.line = token.line
+
+  # expressions
+  def _compile_Binary(self, node):
+    self._compile(node.left)
+    self._compile(node.right)
+    self._at(node.operator)
+    self._emit(_BINARY_OPS[node.operator.type])
+
+  def _compile_Logical(self, node):
+    self._compile(node.left)
+    self._at(node.operator)
+    op = JUMP_IF_TRUE_OR_POP if node.operator.type == TokenType.OR else JUMP_IF_FALSE_OR_POP
+    end = self._emit_jump(op)
+    self._compile(node.right)
+    self._patch_jump(end)
+
+  def _compile_Unary(self, node):
+    self._compile(node.right)
+    self._at(node.operator)
+    self._emit(NOT if node.operator.type == TokenType.NOT else NEG)
+
+  def _compile_Literal(self, node):
+    self._emit(CONST, self.code.add_constant(node.value))
+
+  def _compile_Array(self, node):
+    # a call of the array maker, which takes the elements as its argument list
+    self._emit(CONST, self.code.add_constant(make_array))
+    for element in node.elements:
+      self._compile(element)
+    self._at(node.bracket)
+    self._emit(CALL, len(node.elements))
+
+  def _compile_Grouping(self, node):
+    self._compile(node.expr)
+
+  def _compile_Variable(self, node):
+    self._at(node.name)
+    if node.depth == 0:
+      self._emit(LOAD_LOCAL, node.slot)
+    elif node.depth == 1:
+      self._emit(LOAD_OUTER, node.slot)
+    else:
+      self._emit(LOAD, node.depth, node.slot)
+
+  def _compile_VarAssign(self, node):
+    self._compile(node.value)
+    self._at(node.name)
+    if node.depth == 0:
+      self._emit(STORE_LOCAL, node.slot)
+    else:
+      self._emit(STORE, node.depth, node.slot)
+
+  def _compile_FunctionCall(self, node):
+    self._compile(node.callee)
+    for arg in node.arguments:
+      self._compile(arg)
+    self._at(node.paren)
+    self._emit(CALL, len(node.arguments))
+
+  # statements
+  def _compile_VarDec(self, node):
+    self._at(node.name)
+    if node.initializer != None:
+      self._compile(node.initializer)
+    else:
+      self._emit(CONST, self.code.add_constant(None))
+    self._emit(DEFINE, node.slot)
+
+  def _compile_Print(self, node):
+    self._compile(node.expr)
+    self._emit(PRINT)
+
+  def _compile_Expression(self, node):
+    self._compile(node.expr)
+    self._emit(POP)
+
+  def _compile_Block(self, node):
+    if node.slot_count is not None:
+      self._emit(PUSH_SCOPE, node.slot_count)
+    for stmt in node.statements:
+      self._compile(stmt)
+    if node.slot_count is not None:
+      self._emit(POP_SCOPE)
+
+  def _compile_If(self, node):
+    self._compile(node.condition)
+    else_jump = self._emit_jump(JUMP_IF_FALSE)
+    self._compile(node.then_branch)
+    if not node.else_branch:
+      self._patch_jump(else_jump)
+      return
+    end_jump = self._emit_jump(JUMP)
+    self._patch_jump(else_jump)
+    self._compile(node.else_branch)
+    self._patch_jump(end_jump)
+
+  def _compile_While(self, node):
+    if node.slot_count is not None:
+      self._emit(PUSH_SCOPE, node.slot_count)
+    start = len(self.code.instructions)
+    self._compile(node.condition)
+    exit_jump = self._emit_jump(JUMP_IF_FALSE)
+    self._compile(node.body)
+    self._emit_loop(start)
+    self._patch_jump(exit_jump)
+    if node.slot_count is not None:
+      self._emit(POP_SCOPE)
+
+  def _compile_ForRange(self, node):
+    self._compile(node.start)
+    self._compile(node.end)
+    # a body defining functions gets the loop variable's scope afresh every iteration
+    if not node.per_iteration:
+      self._emit(PUSH_SCOPE, node.slot_count)
+    start = len(self.code.instructions)
+    if node.per_iteration:
+      self._emit(PUSH_SCOPE, node.slot_count)
+    self._at(node.name)
+    exit_jump = self._emit(FOR_RANGE, 0, 0) - 1
+    self._compile(node.body)
+    if node.per_iteration:
+      self._emit(POP_SCOPE)
+    self._emit_loop(start)
+    self._patch_jump(exit_jump)
+    self._emit(POP_SCOPE)
+
+  def _emit_loop(self, start):
+    # a jump back to start, its offset counted from after its own operand
+    self._emit(JUMP, start - len(self.code.instructions) - 2)
+
+  def _compile_FunctionDefinition(self, node):
+    self._at(node.name)
+    enclosing, line = self.code, self.line
+    self.code = Code(node.name.raw_token, len(node.parameters), node.slot_count)
+    for stmt in node.body.statements:
+      self._compile(stmt)
+    self._emit(CONST, self.code.add_constant(None))
+    self._emit(RETURN)
+    function, self.code, self.line = self.code, enclosing, line
+    self._emit(MAKE_FUNCTION, self.code.add_constant(function))
+    self._emit(DEFINE, node.slot)
+
+  def _compile_Import(self, node):
+    self._at(node.keyword)
+    self._emit(IMPORT, self.code.add_constant(node))
+
+  def _compile_Return(self, node):
+    self._at(node.keyword)
+    if node.tail:
+      call = node.value
+      self._compile(call.callee)
+      for arg in call.arguments:
+        self._compile(arg)
+      self._emit(TAIL_CALL, len(call.arguments))
+    elif node.value:
+      self._compile(node.value)
+    else:
+      self._emit(CONST, self.code.add_constant(None))
+    if self.code is self.module:
+      self._emit(POP)
+      self._emit(CONST, self.code.add_constant(True))
+    self._emit(RETURN)
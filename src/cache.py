@@ -0,0 +1,122 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+# on-disk cache of front-end results, kept in a __sdcache__ directory next to each source
+# file, much like __pycache__. an entry records the size, mtime and content hash of its
+# source and of every other file it was built from. it is reused while each of them
+# keeps its size and mtime, or failing that its content hash, and is rebuilt otherwise.
+# entries are written to a temporary file and renamed into place, so concurrent writers
+# never expose a partial file.
+CACHE_DIR = '__sdcache__'
+MAGIC = b'SDC\x01'
+VERSION = 8  # bump when the AST or token layout changes
+
+
+def enabled():
+  return not os.environ.get('SARDINE_NO_CACHE')
+
+
+def cache_path(path: str, kind: str):
+  directory, name = os.path.split(os.path.abspath(path))
+  base = os.path.splitext(name)[0]
+  return os.path.join(directory, CACHE_DIR, base + '.' + kind + '.sdc')
+
+
+def load(path: str, kind: str, build):
+  # returns the result of build(source) for the file at path, using the cache when it is
+  # still valid. build returns (result, paths of the other files the result was built from).
+  if not enabled():
+    return build(_read_source(path))[0]
+  target = cache_path(path, kind)
+  header, payload = _read_entry(target)
+  if header is not None:
+    sources = [_check(*source) for source in header['sources']]
+    result = _loads(payload) if all(source is not None for source in sources) else None
+    if result is not None:
+      if any(source != old for source, old in zip(sources, header['sources'])):
+        # touched but unchanged, as after a checkout: record the new mtimes
+        _write_entry(target, sources, payload)
+      return result
+  stat = os.stat(path)
+  source = _read_source(path)
+  result, dependencies = build(source)
+  sources = [_describe(path, source, stat)] + [_describe(dependency) for dependency in dependencies]
+  _write_entry(target, sources, pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+  return result
+
+
+def _read_source(path):
+  with open(path, 'r') as f:
+    return f.read()
+
+
+def _hash(source):
+  return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def _describe(path, source=None, stat=None):
+  # stat before reading, so a write racing with the read leaves the entry stale, not wrong
+  stat = stat or os.stat(path)
+  if source is None:
+    source = _read_source(path)
+  return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, _hash(source))
+
+
+def _check(path, size, mtime, digest):
+  # the current description of a recorded source, or None if it changed or disappeared
+  try:
+    stat = os.stat(path)
+    if stat.st_size == size and stat.st_mtime_ns == mtime:
+      return (path, size, mtime, digest)
+    source = _read_source(path)
+  except OSError:
+    return None
+  if _hash(source) != digest:
+    return None
+  return (path, stat.st_size, stat.st_mtime_ns, digest)
+
+
+def _read_entry(target):
+  # (header, payload bytes), or (None, None) for a missing, foreign or damaged entry
+  try:
+    with open(target, 'rb') as f:
+      if f.read(len(MAGIC)) != MAGIC:
+        return None, None
+      header = pickle.load(f)
+      if header.get('version') != VERSION:
+        return None, None
+      return header, f.read()
+  except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+    return None, None
+
+
+def _loads(payload):
+  # the result an entry holds, or None when its payload is truncated or damaged
+  try:
+    return pickle.loads(payload)
+  except (pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+    return None
+
+
+def _write_entry(target, sources, payload):
+  header = {'version': VERSION, 'sources': sources}
+  directory = os.path.dirname(target)
+  try:
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.sdc')
+  except OSError:
+    return  # read-only location: run without caching
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      f.write(MAGIC)
+      pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+      f.write(payload)
+    os.chmod(temp, 0o644)
+    os.replace(temp, target)
+  except OSError:
+    try:
+      os.remove(temp)
+    except OSError:
+      pass
@@ -0,0 +1,301 @@
+from .nodes import *
+from .environment import Environment
+from .sardine_function import TailCall, Memo, remember, settle
+
+
+class CompiledFunction:
+  # function value produced by the closure backend; mirrors SardineFunction
+  def __init__(self, definition, body, closure):
+    self.definition = definition
+    self.body = body
+    self.closure = closure
+    self.memo = Memo() if definition.memoize else None
+
+  def arity(self):
+    return len(self.definition.parameters)
+
+  def __call__(self, arguments):
+    function = self
+    pending = None
+    while True:
+      if function.memo is not None:
+        pending = remember(function.memo, arguments, pending)
+        if type(pending) is tuple:
+          return pending[0]
+      local_env = Environment(function.closure, function.definition.slot_count)
+      values = local_env.values
+      for i, argument in enumerate(arguments):
+        values[i] = argument
+      result = function.body(local_env)
+      if result is None:
+        result = (None,)
+      if type(result) is TailCall:
+        function, arguments = result.function, result.arguments
+        continue
+      if pending:
+        settle(pending, result[0])
+      return result[0]
+
+
+_NOT_CONSTANT = object()
+
+# operator closures, chosen once per node at compile time
+_BINARY = {
+  TokenType.GREATER: lambda l, r: lambda env: l(env) > r(env),
+  TokenType.GREATER_EQUAL: lambda l, r: lambda env: l(env) >= r(env),
+  TokenType.LESS: lambda l, r: lambda env: l(env) < r(env),
+  TokenType.LESS_EQUAL: lambda l, r: lambda env: l(env) <= r(env),
+  TokenType.MINUS: lambda l, r: lambda env: l(env) - r(env),
+  TokenType.PLUS: lambda l, r: lambda env: l(env) + r(env),
+  TokenType.SLASH: lambda l, r: lambda env: divide(l(env), r(env)),
+  TokenType.STAR: lambda l, r: lambda env: l(env) * r(env),
+  TokenType.BANG_EQUAL: lambda l, r: lambda env: l(env) != r(env),
+  TokenType.EQUAL_EQUAL: lambda l, r: lambda env: l(env) == r(env),
+}
+
+# right operand is a literal constant. dividing by a float constant is always true division
+_BINARY_CONST_RIGHT = {
+  TokenType.GREATER: lambda l, c: lambda env: l(env) > c,
+  TokenType.GREATER_EQUAL: lambda l, c: lambda env: l(env) >= c,
+  TokenType.LESS: lambda l, c: lambda env: l(env) < c,
+  TokenType.LESS_EQUAL: lambda l, c: lambda env: l(env) <= c,
+  TokenType.MINUS: lambda l, c: lambda env: l(env) - c,
+  TokenType.PLUS: lambda l, c: lambda env: l(env) + c,
+  TokenType.SLASH: lambda l, c: (lambda env: l(env) / c) if type(c) is float else (lambda env: divide(l(env), c)),
+  TokenType.STAR: lambda l, c: lambda env: l(env) * c,
+  TokenType.BANG_EQUAL: lambda l, c: lambda env: l(env) != c,
+  TokenType.EQUAL_EQUAL: lambda l, c: lambda env: l(env) == c,
+}
+
+# left operand is a literal constant
+_BINARY_CONST_LEFT = {
+  TokenType.GREATER: lambda c, r: lambda env: c > r(env),
+  TokenType.GREATER_EQUAL: lambda c, r: lambda env: c >= r(env),
+  TokenType.LESS: lambda c, r: lambda env: c < r(env),
+  TokenType.LESS_EQUAL: lambda c, r: lambda env: c <= r(env),
+  TokenType.MINUS: lambda c, r: lambda env: c - r(env),
+  TokenType.PLUS: lambda c, r: lambda env: c + r(env),
+  TokenType.SLASH: lambda c, r: (lambda env: c / r(env)) if type(c) is float else (lambda env: divide(c, r(env))),
+  TokenType.STAR: lambda c, r: lambda env: c * r(env),
+  TokenType.BANG_EQUAL: lambda c, r: lambda env: c != r(env),
+  TokenType.EQUAL_EQUAL: lambda c, r: lambda env: c == r(env),
+}
+
+
+class ClosureCompiler:
+  # compiles a resolved AST into nested Python closures taking the current frame.
+  # expressions compile to env -> value. statements compile to env -> None, or once a
+  # return has been executed to env -> (value,) or, for calls in tail position, to a
+  # TailCall that the calling CompiledFunction runs in its own loop.
+  def compile(self, statements):
+    return self._sequence([self._compile(stmt) for stmt in statements])
+
+  def _compile(self, node):
+    return getattr(self, '_compile_' + type(node).__name__)(node)
+
+  def _sequence(self, compiled):
+    if len(compiled) == 1:
+      return compiled[0]
+    compiled = tuple(compiled)
+    def sequence(env):
+      for stmt in compiled:
+        result = stmt(env)
+        if result is not None:
+          return result
+    return sequence
+
+  # expressions
+  def _compile_Binary(self, node):
+    operator = node.operator.type
+    left = self._constant(node.left)
+    right = self._constant(node.right)
+    if right is not _NOT_CONSTANT and left is _NOT_CONSTANT:
+      return _BINARY_CONST_RIGHT[operator](self._compile(node.left), right)
+    if left is not _NOT_CONSTANT and right is _NOT_CONSTANT:
+      return _BINARY_CONST_LEFT[operator](left, self._compile(node.right))
+    return _BINARY[operator](self._compile(node.left), self._compile(node.right))
+
+  def _compile_Logical(self, node):
+    left = self._compile(node.left)
+    right = self._compile(node.right)
+    if node.operator.type == TokenType.OR:
+      return lambda env: left(env) or right(env)
+    return lambda env: left(env) and right(env)
+
+  def _compile_Unary(self, node):
+    right = self._compile(node.right)
+    if node.operator.type == TokenType.NOT:
+      return lambda env: not right(env)
+    return lambda env: -right(env)
+
+  def _compile_Literal(self, node):
+    value = node.value
+    return lambda env: value
+
+  def _compile_Array(self, node):
+    elements = [self._compile(element) for element in node.elements]
+    return lambda env: make_array([element(env) for element in elements])
+
+  def _compile_Grouping(self, node):
+    return self._compile(node.expr)
+
+  def _compile_Variable(self, node):
+    depth, slot = node.depth, node.slot
+    if depth == 0:
+      return lambda env: env.values[slot]
+    if depth == 1:
+      return lambda env: env.outer.values[slot]
+    if depth == 2:
+      return lambda env: env.outer.outer.values[slot]
+    return lambda env: env.ancestor(depth).values[slot]
+
+  def _compile_VarAssign(self, node):
+    depth, slot = node.depth, node.slot
+    value = self._compile(node.value)
+    if depth == 0:
+      def assign(env):
+        env.values[slot] = result = value(env)
+        return result
+    else:
+      def assign(env):
+        env.ancestor(depth).values[slot] = result = value(env)
+        return result
+    return assign
+
+  def _compile_FunctionCall(self, node):
+    callee = self._compile(node.callee)
+    arguments = [self._compile(arg) for arg in node.arguments]
+    if len(arguments) == 0:
+      return lambda env: callee(env)([])
+    if len(arguments) == 1:
+      a, = arguments
+      return lambda env: callee(env)([a(env)])
+    if len(arguments) == 2:
+      a, b = arguments
+      return lambda env: callee(env)([a(env), b(env)])
+    if len(arguments) == 3:
+      a, b, c = arguments
+      return lambda env: callee(env)([a(env), b(env), c(env)])
+    return lambda env: callee(env)([arg(env) for arg in arguments])
+
+  # statements
+  def _compile_VarDec(self, node):
+    slot = node.slot
+    if node.initializer == None:
+      def declare(env):
+        env.values[slot] = None
+    else:
+      initializer = self._compile(node.initializer)
+      def declare(env):
+        env.values[slot] = initializer(env)
+    return declare
+
+  def _compile_Print(self, node):
+    expr = self._compile(node.expr)
+    def print_stmt(env):
+      print(expr(env))
+    return print_stmt
+
+  def _compile_Expression(self, node):
+    # the value of an expression statement must not be mistaken for a return
+    expr = self._compile(node.expr)
+    def expression_stmt(env):
+      expr(env)
+    return expression_stmt
+
+  def _compile_Block(self, node):
+    if not node.statements:
+      return lambda env: None
+    body = self._sequence([self._compile(stmt) for stmt in node.statements])
+    slot_count = node.slot_count
+    if slot_count is None:
+      return body
+    return lambda env: body(Environment(env, slot_count))
+
+  def _compile_If(self, node):
+    condition = self._compile(node.condition)
+    then_branch = self._compile(node.then_branch)
+    if not node.else_branch:
+      def if_stmt(env):
+        if condition(env):
+          return then_branch(env)
+      return if_stmt
+    else_branch = self._compile(node.else_branch)
+    def if_else_stmt(env):
+      if condition(env):
+        return then_branch(env)
+      return else_branch(env)
+    return if_else_stmt
+
+  def _compile_While(self, node):
+    condition = self._compile(node.condition)
+    body = self._compile(node.body)
+    slot_count = node.slot_count
+    def while_stmt(env):
+      if slot_count is not None:
+        env = Environment(env, slot_count)
+      while condition(env):
+        result = body(env)
+        if result is not None:
+          return result
+    return while_stmt
+
+  def _compile_ForRange(self, node):
+    start = self._compile(node.start)
+    end = self._compile(node.end)
+    body = self._compile(node.body)
+    slot_count, per_iteration = node.slot_count, node.per_iteration
+    def for_stmt(env):
+      i, stop = start(env), end(env)
+      loop_env = Environment(env, slot_count)
+      values = loop_env.values
+      while i <= stop:
+        if per_iteration:
+          loop_env = Environment(env, slot_count)
+          values = loop_env.values
+        values[0] = i
+        result = body(loop_env)
+        if result is not None:
+          return result
+        i += 1
+    return for_stmt
+
+  def _compile_FunctionDefinition(self, node):
+    slot = node.slot
+    statements = node.body.statements
+    body = self._sequence([self._compile(stmt) for stmt in statements]) if statements else (lambda env: None)
+    def define(env):
+      env.values[slot] = CompiledFunction(node, body, env)
+    return define
+
+  def _compile_Import(self, node):
+    # imports run once per program, so the tree node's own evaluate will do
+    return node.evaluate
+
+  def _compile_Return(self, node):
+    if not node.value:
+      return lambda env: (None,)
+    if node.tail:
+      return self._compile_tail_call(node.value)
+    value = self._compile(node.value)
+    return lambda env: (value(env),)
+
+  def _compile_tail_call(self, node):
+    callee = self._compile(node.callee)
+    arguments = [self._compile(arg) for arg in node.arguments]
+    def tail_call(env):
+      function = callee(env)
+      values = [arg(env) for arg in arguments]
+      if type(function) is CompiledFunction:
+        return TailCall(function, values)
+      return (function(values),)
+    return tail_call
+
+  def _constant(self, node):
+    # literal value of node (looking through groupings), or _NOT_CONSTANT
+    while isinstance(node, Grouping):
+      node = node.expr
+    if isinstance(node, Literal):
+      return node.value
+    return _NOT_CONSTANT
+
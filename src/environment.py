@@ -1,27 +1,19 @@
-from .token import Token
-
-
 class Environment:
-  def __init__(self, outer):
-    self.outer = outer
-    self.env = dict()
+  # a frame of slot-indexed values; slots are assigned ahead of time by the Resolver
+  __slots__ = ('outer', 'values')
 
-  def revert(self, old_env):
-    self.env = old_env
-
-  def define(self, name: str, value):
-    self.env[name] = value
+  def __init__(self, outer, size=0):
+    self.outer = outer
+    self.values = [None] * size
 
-  def get(self, name: Token):
-    if name.raw_token in self.env:
-      return self.env[name.raw_token]
-    if self.outer:
-      return self.outer.get(name)
-    # TODO: raise runtime error
+  def grow(self, size):
+    # the global frame grows as the resolver allocates new global slots
+    if size > len(self.values):
+      self.values.extend([None] * (size - len(self.values)))
 
-  def assign(self, name: Token, value):
-    if name.raw_token in self.env:
-      self.env[name.raw_token] = value
-    if self.outer:
-      self.outer.assign(name, value)
-    # TODO: raise runtime error
\ No newline at end of file
+  def ancestor(self, depth):
+    env = self
+    while depth:
+      env = env.outer
+      depth -= 1
+    return env
@@ -27,15 +27,23 @@ class SardineSyntaxError(Error):
     self.message = message
 
 
-def error(e):
-    print(e.type + ": " + "One line " + str(e.line) + ", at '" + e.token + "'. " + e.message)
+class SardineImportError(Error, Exception):
+  # raised when an import cannot be resolved: a missing module, a cycle, or a misplaced import
+  type, line, token, message = None, None, None, None
+  def __init__(self, line, raw_token, message=''):
+    Exception.__init__(self, message)
+    self.type = 'ImportError'
+    self.line = line
+    self.token = raw_token
+    self.message = message
+
+  def __str__(self):
+    return self.type + ": " + "On line " + str(self.line) + ", at '" + self.token + "'. " + self.message
 
 
+def error(e):
+    print(e.type + ": " + "One line " + str(e.line) + ", at '" + e.token + "'. " + e.message)
 
-class ReturnInterrupt(Exception):
-  def __init__(self, value, *args, **kwargs):
-    super(Exception, self).__init__(*args, **kwargs)
-    self.value = value
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+from .nodes import Stmt, Block, FunctionDefinition, walk, line_of
+from .sardine_function import SardineFunction, TailCall
+
+# execution hooks for the tree backend, registered with Interpreter.add_hook. a hook is
+# called as hook(event, node, arg), much like a sys.settrace function:
+#   'line'       node is a statement about to run, arg its source line
+#   'call'       node is the FunctionDefinition being entered, arg the argument list
+#   'return'     node is the FunctionDefinition being left, arg the value returned, or
+#                None when the call ended in a tail call or an error
+#   'exception'  node is the innermost statement an error escaped, arg the exception
+# nothing is instrumented until a hook is registered: the interpreter then gives each
+# statement it runs an evaluate of its own, which shadows the class's, and deletes them all
+# again once the last hook is removed.
+
+
+class TracedFunction(SardineFunction):
+  # a function defined while hooks were installed; reports every call it runs, tail calls
+  # included. calls served from its memo cache run nothing, and are not reported
+  def __init__(self, definition, closure, hooks):
+    super().__init__(definition, closure)
+    self.hooks = hooks
+
+  def run(self, arguments):
+    definition, hooks = self.definition, self.hooks
+    for hook in hooks:
+      hook('call', definition, arguments)
+    try:
+      result = super().run(arguments)
+    except Exception:
+      for hook in hooks:
+        hook('return', definition, None)
+      raise
+    for hook in hooks:
+      hook('return', definition, None if type(result) is TailCall else result[0])
+    return result
+
+
+def instrument(statements, interpreter):
+  # shadows the evaluate of every statement in statements, and below them, with one that
+  # reports to interpreter.hooks. returns the nodes it changed.
+  changed = []
+  for stmt in statements:
+    for node in walk(stmt):
+      if isinstance(node, Stmt) and not isinstance(node, Block) and 'evaluate' not in vars(node):
+        node.evaluate = _traced(node, interpreter.hooks, interpreter.reported)
+        changed.append(node)
+  return changed
+
+
+def restore(nodes):
+  for node in nodes:
+    del node.evaluate
+
+
+def _traced(node, hooks, errors):
+  line = line_of(node)
+  evaluate = _own_evaluate(node, hooks)
+
+  def traced(env):
+    for hook in hooks:
+      hook('line', node, line)
+    try:
+      return evaluate(env)
+    except Exception as e:
+      # reported once, by the innermost statement it escaped
+      if errors and errors[-1] is e:
+        raise
+      errors[:] = [e]
+      for hook in hooks:
+        hook('exception', node, e)
+      raise
+  return traced
+
+
+def _own_evaluate(node, hooks):
+  # the evaluate the traced one wraps: the class's, with the functions definitions make
+  # replaced by TracedFunctions
+  evaluate = type(node).evaluate.__get__(node)
+  if not isinstance(node, FunctionDefinition):
+    return evaluate
+
+  def define(env):
+    evaluate(env)
+    env.values[node.slot] = TracedFunction(node, env, hooks)
+  return define
+
+
+class Coverage:
+  # the reference hook: records which lines of a program ran. register it with
+  # Interpreter.add_hook and hand it the statements to measure with add
+  def __init__(self):
+    self.lines = set()  # lines holding a statement
+    self.executed = set()
+
+  def __call__(self, event, node, arg):
+    if event == 'line':
+      self.executed.add(arg)
+
+  def add(self, statements):
+    for stmt in statements:
+      for node in walk(stmt):
+        if isinstance(node, Stmt) and not isinstance(node, Block):
+          line = line_of(node)
+          if line is not None:
+            self.lines.add(line)
+
+  def missed(self):
+    return sorted(self.lines - self.executed)
+
+  def percent(self):
+    if not self.lines:
+      return 100.0
+    return len(self.lines & self.executed) / len(self.lines) * 100
+
+  def report(self, source=None):
+    # a summary line, then the source if given, each line marked '>' if it ran and '!' if
+    # none of its statements did
+    hit = len(self.lines & self.executed)
+    out = ["%d of %d lines run (%.1f%%)" % (hit, len(self.lines), self.percent())]
+    if source is None:
+      missed = self.missed()
+      if missed:
+        out.append("missed: " + ", ".join(str(line) for line in missed))
+      return "\n".join(out)
+    for number, text in enumerate(source.splitlines(), 1):
+      mark = ' '
+      if number in self.lines:
+        mark = '>' if number in self.executed else '!'
+      out.append("%s %4d  %s" % (mark, number, text))
+    return "\n".join(out)
@@ -1,9 +1,127 @@
 from .environment import Environment
+from .resolver import Resolver
+from .closure_compiler import ClosureCompiler
+from .bytecode_compiler import BytecodeCompiler
+from .vm import VM
+from .transpiler import Transpiler, global_name
+from .sardine_function import SardineFunction
+from .closure_compiler import CompiledFunction
+from .native import NativeFunction, VARIADIC
+from . import modules, hooks, purity, nodes, arrays, stdlib
+
+BACKENDS = ('tree', 'closure', 'vm', 'python')
 
 class Interpreter:
-  def __init__(self):
+  def __init__(self, backend='tree', loader=None, directory=None, memoize=True):
+    if backend not in BACKENDS:
+      raise ValueError("Unknown backend '" + backend + "', expected one of: " + ", ".join(BACKENDS))
+    self.backend = backend
     self.environment = Environment(None)
+    self.resolver = Resolver(self._import)
+    self.namespace = {'__name__': '__sardine__'}  # globals of the python backend
+    self.loader = loader or modules.loader
+    self.directory = directory  # searched for imports ahead of the loader's search path
+    self.hooks = []  # see hooks.py; only the tree backend reports to them
+    self.instrumented = []  # statements whose evaluate reports to the hooks
+    self.reported = []  # the last error reported to the hooks
+    self.memoize = memoize  # cache calls to pure functions, on the tree and closure backends
+    self.native_slots = set()  # global slots natives were installed in
+    for native in stdlib.natives() + arrays.natives():
+      self._install(native)
 
   def interpret(self, statements):
+    # statements are the whole program: purity needs to see every assignment
+    self.resolver.resolve(statements)
+    self.analyze(statements)
+    self.execute(statements)
+
+  def analyze(self, statements):
+    if self.memoize:
+      for definition in purity.analyze(statements, self.native_slots):
+        definition.memoize = True
+
+  def interpret_stream(self, declarations):
+    # runs each top-level declaration as soon as it arrives, so a program read from a
+    # stream never has to be held whole. stops early after a top-level return. nothing is
+    # memoized, since purity cannot be decided before the whole program is seen.
+    for declaration in declarations:
+      statements = [declaration]
+      self.resolver.resolve(statements)
+      if self.execute(statements):
+        return
+
+  def execute(self, statements):
+    # runs statements the resolver has already seen. returns True if a top-level return
+    # ended the program
+    self.environment.grow(self.resolver.global_count())
+    if self.backend == 'closure':
+      return ClosureCompiler().compile(statements)(self.environment) is not None
+    if self.backend == 'vm':
+      return VM().run(BytecodeCompiler().compile(statements), self.environment) is not None
+    if self.backend == 'python':
+      module = Transpiler().transpile(statements)
+      module.run(self.namespace)
+      return module.returned
+    if self.hooks:
+      self.instrumented.extend(hooks.instrument(statements, self))
     for stmt in statements:
-      stmt.evaluate(self.environment)
\ No newline at end of file
+      if stmt.evaluate(self.environment) is not None:
+        return True
+    return False
+
+  def add_hook(self, hook):
+    if self.backend != 'tree':
+      raise ValueError("Hooks need the tree backend, not '" + self.backend + "'")
+    self.hooks.append(hook)
+
+  def remove_hook(self, hook):
+    # once the last hook is gone the statements run their own evaluate again
+    self.hooks.remove(hook)
+    if not self.hooks:
+      hooks.restore(self.instrumented)
+      self.instrumented = []
+      self.reported = []
+
+  def memo_stats(self):
+    # name -> hits, misses, evictions and size of each memoized global function
+    stats = dict()
+    for name, slot in self.resolver.globals.items():
+      value = self.environment.values[slot] if slot < len(self.environment.values) else None
+      if isinstance(value, (SardineFunction, CompiledFunction)) and value.memo is not None:
+        stats[name] = value.memo.stats()
+    return stats
+
+  def specialization_stats(self):
+    # what tree backend nodes specialized to, and how often that failed them, keyed like
+    # 'int + int'. the counts are shared by all interpreters until
+    # nodes.reset_specialization_counts()
+    return {'specialized': dict(nodes.specializations), 'deoptimized': dict(nodes.deoptimizations)}
+
+  def global_value(self, name: str):
+    # current value of a global, None if it was never set
+    if self.backend == 'python':
+      return self.namespace.get(global_name(name))
+    slot = self.resolver.globals.get(name)
+    if slot is None or slot >= len(self.environment.values):
+      return None
+    return self.environment.values[slot]
+
+  def register(self, name: str, function, arity=VARIADIC):
+    # makes the python callable function a global named name of the programs this
+    # interpreter runs, taking arity arguments or, for VARIADIC, any number of them.
+    # modules run by interpreters of their own, which do not see it
+    native = NativeFunction(name, function, arity)
+    self._install(native)
+    return native
+
+  def _install(self, native):
+    slot = self.resolver.declare_global(native.name)
+    self.native_slots.add(slot)
+    self.environment.grow(self.resolver.global_count())
+    self.environment.values[slot] = native
+    self.namespace[global_name(native.name)] = native.function
+    # call sites may have cached what the global held
+    nodes.invalidate_call_caches()
+
+  def _import(self, name):
+    return self.loader.load(name, self.backend, self.directory)
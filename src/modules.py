@@ -0,0 +1,106 @@
+import os
+from . import cache
+from .errors import SardineImportError
+from .nodes import VarDec, FunctionDefinition, Import
+from .parser import Parser
+from .tokenizer import Tokenizer
+
+# import name finds name.sd in the importing file's directory, then along the search path:
+# the working directory followed by the entries of SARDINE_PATH. a module is parsed and
+# resolved the first time any program imports it, its top level runs the first time an
+# import of it executes, and from then on every importer shares the same definitions.
+SEARCH_PATH_VARIABLE = 'SARDINE_PATH'
+EXTENSION = '.sd'
+
+
+def default_search_path():
+  extra = os.environ.get(SEARCH_PATH_VARIABLE, '')
+  return [os.curdir] + [entry for entry in extra.split(os.pathsep) if entry]
+
+
+class Module:
+  # a loaded sardine file and the interpreter that owns its globals
+  def __init__(self, name: str, path: str, statements, interpreter):
+    self.name = name
+    self.path = path
+    self.statements = statements
+    self.interpreter = interpreter
+    self.names = _exported_names(statements)
+    self.exports = None  # name -> value, once the top level has run
+
+  def load(self):
+    if self.exports is None:
+      self.interpreter.execute(self.statements)
+      self.exports = {name: self.interpreter.global_value(name) for name in self.names}
+    return self.exports
+
+  def __str__(self):
+    return "<module " + self.name + ">"
+
+
+class ModuleLoader:
+  # the registry of loaded modules. functions of different backends cannot call each
+  # other, so a module is loaded once per backend that imports it.
+  def __init__(self, search_path=None, memoize=True):
+    self.search_path = default_search_path() if search_path is None else list(search_path)
+    self.memoize = memoize  # for the interpreters of the modules
+    self.modules = dict()  # (absolute path, backend) -> Module
+    self.loading = []  # keys of the modules whose imports are being resolved, outermost first
+
+  def find(self, name: str, directory=None):
+    # absolute path of the file for module name, None if there is none
+    for entry in ([directory] if directory else []) + self.search_path:
+      path = os.path.join(entry, name + EXTENSION)
+      if os.path.isfile(path):
+        return os.path.abspath(path)
+    return None
+
+  def load(self, name, backend: str, directory=None):
+    # the Module for the name token of an import, loading it and its imports if needed
+    path = self.find(name.raw_token, directory)
+    if path is None:
+      raise SardineImportError(name.line, name.raw_token, "No module named '" + name.raw_token + "' on the search path.")
+    key = (path, backend)
+    if key in self.modules:
+      return self.modules[key]
+    if key in self.loading:
+      cycle = [_module_name(loading) for loading, _ in self.loading[self.loading.index(key):]]
+      raise SardineImportError(name.line, name.raw_token, "Import cycle: " + " -> ".join(cycle + [name.raw_token]) + ".")
+    # the interpreter module imports this one for the default loader
+    from .interpreter import Interpreter
+    self.loading.append(key)
+    try:
+      statements = cache.load(path, 'module', _parse)
+      interpreter = Interpreter(backend, self, os.path.dirname(path), self.memoize)
+      interpreter.resolver.resolve(statements)
+      interpreter.analyze(statements)
+    finally:
+      self.loading.pop()
+    module = Module(name.raw_token, path, statements, interpreter)
+    self.modules[key] = module
+    return module
+
+
+def _parse(source):
+  return Parser(Tokenizer(source + '\n').buffer()).parse(), []
+
+
+def _module_name(path):
+  return os.path.splitext(os.path.basename(path))[0]
+
+
+def _exported_names(statements):
+  # top-level declarations, and the names the module itself imported
+  names = []
+  for stmt in statements:
+    if isinstance(stmt, (VarDec, FunctionDefinition)):
+      found = [stmt.name.raw_token]
+    elif isinstance(stmt, Import):
+      found = stmt.names
+    else:
+      continue
+    names.extend(name for name in found if name not in names)
+  return names
+
+
+loader = ModuleLoader()  # shared by every interpreter not given a loader of its own
@@ -0,0 +1,25 @@
+VARIADIC = None  # the arity of a native function taking any number of arguments
+
+
+class NativeFunction:
+  # a python callable that sardine code calls like one of its own functions. it runs no
+  # sardine code, so no frame is made for it: the tree backend and the vm call function
+  # with the arguments spread, the python backend calls it directly, and everything else
+  # calls the NativeFunction with the list of arguments
+  def __init__(self, name: str, function, arity=VARIADIC):
+    self.name = name
+    self.function = function
+    self.parameter_count = arity
+
+  def arity(self):
+    # None for a variadic function
+    return self.parameter_count
+
+  def accepts(self, count: int):
+    return self.parameter_count is VARIADIC or self.parameter_count == count
+
+  def __call__(self, arguments):
+    return self.function(*arguments)
+
+  def __str__(self):
+    return "<native fn " + self.name + ">"
@@ -1,7 +1,58 @@
+import operator
+from collections import Counter
 from .token import *
-from .sardine_function import SardineFunction
-from copy import deepcopy
-from .errors import ReturnInterrupt
+from .sardine_function import SardineFunction, TailCall
+from .native import NativeFunction
+from .environment import Environment
+from .arrays import make as make_array
+
+# FunctionCall nodes whose callee is a global name cache the function it held. writing a
+# global that some call site calls by name bumps this version, emptying every such cache;
+# the resolver marks the nodes that do so with bumps = True.
+call_cache_version = 0
+
+
+def invalidate_call_caches():
+  global call_cache_version
+  call_cache_version += 1
+
+
+def divide(left, right):
+  # '/' is exact where it can be: an integer divided by one of its divisors gives an
+  # integer, anything else the float quotient
+  if type(left) is int and type(right) is int and right and not left % right:
+    return left // right
+  return left / right
+
+
+_OPERATIONS = {
+  TokenType.GREATER: operator.gt,
+  TokenType.GREATER_EQUAL: operator.ge,
+  TokenType.LESS: operator.lt,
+  TokenType.LESS_EQUAL: operator.le,
+  TokenType.MINUS: operator.sub,
+  TokenType.PLUS: operator.add,
+  TokenType.SLASH: divide,
+  TokenType.STAR: operator.mul,
+  TokenType.BANG_EQUAL: operator.ne,
+  TokenType.EQUAL_EQUAL: operator.eq,
+}
+
+# on the tree backend, Binary, Unary and Variable nodes rewrite themselves the second time
+# they run, so code that runs once never pays for it: each gets an evaluate of its own,
+# shadowing the class's, that handles only what it saw. an operator node specializes to
+# the types of its operands, and falls back to a generic evaluate for good if they ever
+# change. a variable specializes to its depth. the counters are keyed by what a node was
+# specialized to, like 'int + int'.
+specializing = True
+specializations = Counter()
+deoptimizations = Counter()
+_SPECIALIZABLE = (int, float, str)
+
+
+def reset_specialization_counts():
+  specializations.clear()
+  deoptimizations.clear()
 
 #############################################################################################
 # Expressions
@@ -11,36 +62,50 @@ class Expr:
   pass
 
 class Binary(Expr):
+  seen = False  # set by the first run, the second specializes
+
   def __init__(self, left: Expr, operator: Token, right: Expr):
     self.left = left
     self.right = right
     self.operator = operator
+    self.operation = _OPERATIONS[operator.type]
 
   def evaluate(self, env):
     left = self.left.evaluate(env)
     right = self.right.evaluate(env)
-    operator = self.operator.type
-
-    if operator == TokenType.GREATER:
-      return left > right
-    if operator == TokenType.GREATER_EQUAL:
-      return left >= right
-    if operator == TokenType.LESS:
-      return left < right
-    if operator == TokenType.LESS_EQUAL:
-      return left <= right
-    if operator == TokenType.MINUS:
-      return left - right
-    if operator == TokenType.PLUS:
-      return left + right
-    if operator == TokenType.SLASH:
-      return left / right
-    if operator == TokenType.STAR:
-      return left * right
-    if operator == TokenType.BANG_EQUAL:
-      return left != right
-    if operator == TokenType.EQUAL_EQUAL:
-      return left == right
+    if specializing:
+      if not self.seen:
+        self.seen = True
+      elif 'evaluate' not in self.__dict__:  # a recursive call may have specialized it
+        self._specialize(type(left), type(right))
+    return self.operation(left, right)
+
+  def generic(self, env):
+    return self.operation(self.left.evaluate(env), self.right.evaluate(env))
+
+  def _specialize(self, left_type, right_type):
+    if left_type not in _SPECIALIZABLE or right_type not in _SPECIALIZABLE:
+      self.evaluate = self.generic
+      return
+    operation = self.operation
+    if operation is divide and (left_type is not int or right_type is not int):
+      operation = operator.truediv
+    left_node, right_node, node = self.left, self.right, self
+    self.specialized = left_type.__name__ + " " + self.operator.raw_token + " " + right_type.__name__
+
+    def evaluate(env):
+      left = left_node.evaluate(env)
+      right = right_node.evaluate(env)
+      if type(left) is left_type and type(right) is right_type:
+        return operation(left, right)
+      return node._deoptimize(left, right)
+    self.evaluate = evaluate
+    specializations[self.specialized] += 1
+
+  def _deoptimize(self, left, right):
+    self.evaluate = self.generic
+    deoptimizations[self.specialized] += 1
+    return self.operation(left, right)
 
   def __str__(self):
     return "( " + self.operator.raw_token + " " + str(self.left) + " " + str(self.right) + " )"
@@ -66,18 +131,52 @@ class Logical(Expr):
 
 
 class Unary(Expr):
+  seen = False  # set by the first run, the second specializes
+
   def __init__(self, operator: Token, right: Expr):
     self.operator = operator
     self.right = right
 
   def evaluate(self, env):
     right = self.right.evaluate(env)
-    operator = self.operator.type
-
-    if operator == TokenType.NOT:
+    if specializing:
+      if not self.seen:
+        self.seen = True
+      elif 'evaluate' not in self.__dict__:
+        self._specialize(type(right))
+    if self.operator.type == TokenType.NOT:
       return not right
-    if operator == TokenType.MINUS:
-      return -right
+    return -right
+
+  def generic(self, env):
+    if self.operator.type == TokenType.NOT:
+      return not self.right.evaluate(env)
+    return -self.right.evaluate(env)
+
+  def _specialize(self, right_type):
+    right_node, node = self.right, self
+    if self.operator.type == TokenType.NOT:
+      # works on any value, so there is nothing to guard
+      self.specialized = "not"
+      self.evaluate = lambda env: not right_node.evaluate(env)
+    elif right_type in (int, float):
+      self.specialized = "- " + right_type.__name__
+
+      def evaluate(env):
+        right = right_node.evaluate(env)
+        if type(right) is right_type:
+          return -right
+        return node._deoptimize(right)
+      self.evaluate = evaluate
+    else:
+      self.evaluate = self.generic
+      return
+    specializations[self.specialized] += 1
+
+  def _deoptimize(self, right):
+    self.evaluate = self.generic
+    deoptimizations[self.specialized] += 1
+    return -right
 
   def __str__(self):
     return "( " + self.operator.raw_token + " " + str(self.right) + " )"
@@ -94,6 +193,19 @@ class Literal(Expr):
     return str(self.value) if not isinstance(self.value, str) else '"' + self.value + '"'
 
 
+class Array(Expr):
+  # an array literal, [1, 2, 3]; arrays need numpy
+  def __init__(self, bracket: Token, elements):
+    self.bracket = bracket  # kept for its line
+    self.elements = elements
+
+  def evaluate(self, env):
+    return make_array([element.evaluate(env) for element in self.elements])
+
+  def __str__(self):
+    return "( array" + "".join(" " + str(element) for element in self.elements) + " )"
+
+
 class Grouping(Expr):
   def __init__(self, expr: Expr):
     self.expr = expr
@@ -107,11 +219,35 @@ class Grouping(Expr):
 
 class Variable(Expr):
   # for calling variables (print x)
+  seen = False  # set by the first run, the second specializes
+
   def __init__(self, name: Token):
     self.name = name
 
   def evaluate(self, env):
-    return env.get(self.name)
+    if specializing:
+      if not self.seen:
+        self.seen = True
+      elif 'evaluate' not in self.__dict__:
+        self._specialize()
+    depth = self.depth
+    while depth:
+      env = env.outer
+      depth -= 1
+    return env.values[self.slot]
+
+  def _specialize(self):
+    # the resolver fixed depth and slot, and drops this evaluate if it resolves the node again
+    depth, slot = self.depth, self.slot
+    if depth == 0:
+      self.evaluate = lambda env: env.values[slot]
+    elif depth == 1:
+      self.evaluate = lambda env: env.outer.values[slot]
+    elif depth == 2:
+      self.evaluate = lambda env: env.outer.outer.values[slot]
+    else:
+      self.evaluate = lambda env: env.ancestor(depth).values[slot]
+    specializations["variable depth " + (str(depth) if depth < 3 else "3+")] += 1
 
   def __str__(self):
     return self.name.raw_token
@@ -125,7 +261,13 @@ class VarAssign(Expr):
 
   def evaluate(self, env):
     value = self.value.evaluate(env)
-    env.assign(self.name, value)
+    depth = self.depth
+    while depth:
+      env = env.outer
+      depth -= 1
+    env.values[self.slot] = value
+    if self.bumps:
+      invalidate_call_caches()
     return value
 
   def __str__(self):
@@ -137,8 +279,24 @@ class FunctionCall(Expr):
     self.callee = callee
     self.paren = paren  # the closing parenthesis of the function call is stored for error reporting
     self.arguments = arguments
+    self.cached = None  # the function a global callee held when last checked
+    self.cached_version = -1  # call_cache_version when it was
 
   def evaluate(self, env):
+    callee, arguments = self.evaluate_parts(env)
+    if type(callee) is NativeFunction:
+      return callee.function(*arguments)
+    return callee(arguments)
+
+  def evaluate_parts(self, env):
+    if self.cached_version == call_cache_version:
+      # the global still holds the function checked below, so it is neither looked up
+      # nor checked again
+      arguments = []
+      for arg in self.arguments:
+        arguments.append(arg.evaluate(env))
+      return self.cached, arguments
+
     callee = self.callee.evaluate(env)
     arguments = []
     for arg in self.arguments:
@@ -151,8 +309,11 @@ class FunctionCall(Expr):
     if len(arguments) != callee.arity():
       # TODO: raise runtime error
       pass
-    
-    return callee(env, arguments)
+
+    if self.global_callee:
+      if (isinstance(callee, SardineFunction) and len(arguments) == callee.arity()) or (type(callee) is NativeFunction and callee.accepts(len(arguments))):
+        self.cached, self.cached_version = callee, call_cache_version
+    return callee, arguments
 
 
 
@@ -161,6 +322,9 @@ class FunctionCall(Expr):
 #############################################################################################
 
 class Stmt:
+  # evaluate returns None when execution falls through to the next statement. once a
+  # return has run it returns (value,), or a TailCall for a call in tail position, and
+  # every enclosing statement hands that straight back to the function being called.
   pass
 
 class VarDec(Stmt):
@@ -173,7 +337,9 @@ class VarDec(Stmt):
     value = None
     if self.initializer != None:
       value = self.initializer.evaluate(env)
-    env.define(self.name.raw_token, value)
+    env.values[self.slot] = value
+    if self.bumps:
+      invalidate_call_caches()
     return None
 
   def __str__(self):
@@ -181,8 +347,9 @@ class VarDec(Stmt):
 
 
 class Print(Stmt):
-  def __init__(self, expr: Expr):
+  def __init__(self, expr: Expr, keyword: Token = None):
     self.expr = expr
+    self.keyword = keyword  # kept for its line
 
   def evaluate(self, env):
     print(self.expr.evaluate(env))
@@ -196,7 +363,7 @@ class Expression(Stmt):
     self.expr = expr
 
   def evaluate(self, env):
-    return self.expr.evaluate(env)
+    self.expr.evaluate(env)
 
   def __str__(self):
     return str(self.expr)
@@ -207,39 +374,96 @@ class Block(Stmt):
     self.statements = statements
 
   def evaluate(self, env):
-    outer_env = deepcopy(env.env)#deepcopy(env)
+    # declarations made inside the block live in a child frame that is dropped on exit
+    if self.slot_count is not None:
+      env = Environment(env, self.slot_count)
     for stmt in self.statements:
-      stmt.evaluate(env)
-    env.revert(outer_env)
+      result = stmt.evaluate(env)
+      if result is not None:
+        return result
 
   def __str__(self):
     return "( block " + " ".join(str(stmt) for stmt in self.statements) + " )"
 
 
 class If(Stmt):
-  def __init__(self, condition: Expr, then_branch: Stmt, else_branch: Stmt):
+  def __init__(self, condition: Expr, then_branch: Stmt, else_branch: Stmt, keyword: Token = None):
     self.condition = condition
     self.then_branch = then_branch
     self.else_branch = else_branch
+    self.keyword = keyword  # kept for its line
 
   def evaluate(self, env):
     condition = self.condition.evaluate(env)
     if condition:
-      self.then_branch.evaluate(env)
+      return self.then_branch.evaluate(env)
     elif self.else_branch:
-      self.else_branch.evaluate(env)
+      return self.else_branch.evaluate(env)
     return None
 
 
+class While(Stmt):
+  def __init__(self, condition: Expr, body: Stmt, keyword: Token = None):
+    self.condition = condition
+    self.body = body
+    self.keyword = keyword  # kept for its line
+
+  def evaluate(self, env):
+    # a loop body that declares locals gets one frame for the whole loop
+    if self.slot_count is not None:
+      env = Environment(env, self.slot_count)
+    condition, body = self.condition, self.body
+    while condition.evaluate(env):
+      result = body.evaluate(env)
+      if result is not None:
+        return result
+    return None
+
+  def __str__(self):
+    return "( while " + str(self.condition) + " " + str(self.body) + " )"
+
+
+class ForRange(Stmt):
+  # for name in start..end, counting up by one with end included
+  def __init__(self, name: Token, start: Expr, end: Expr, body: Stmt):
+    self.name = name
+    self.start = start
+    self.end = end
+    self.body = body
+
+  def evaluate(self, env):
+    i = self.start.evaluate(env)
+    end = self.end.evaluate(env)
+    # the loop variable is slot 0 of a frame made once for the whole loop, or once per
+    # iteration when the body defines functions
+    loop_env = Environment(env, self.slot_count)
+    values, body, per_iteration = loop_env.values, self.body, self.per_iteration
+    while i <= end:
+      if per_iteration:
+        loop_env = Environment(env, self.slot_count)
+        values = loop_env.values
+      values[0] = i
+      result = body.evaluate(loop_env)
+      if result is not None:
+        return result
+      i += 1
+    return None
+
+  def __str__(self):
+    return "( for " + self.name.raw_token + " " + str(self.start) + " " + str(self.end) + " " + str(self.body) + " )"
+
+
 class FunctionDefinition(Stmt):
   def __init__(self, name: Token, parameters, body):
     self.name = name
     self.parameters = parameters
     self.body = body
+    self.memoize = False  # set for pure functions, whose calls are then cached
 
   def evaluate(self, env):
-    function = SardineFunction(self)
-    env.define(self.name.raw_token, function)
+    env.values[self.slot] = SardineFunction(self, env)
+    if self.bumps:
+      invalidate_call_caches()
     return None
 
 
@@ -249,5 +473,65 @@ class Return(Stmt):
     self.value = value
 
   def evaluate(self, env):
-    value = self.value.evaluate(env) if self.value else None
-    raise ReturnInterrupt(value)
\ No newline at end of file
+    if self.tail:
+      # sardine callees are called by the enclosing SardineFunction's loop, in constant stack
+      callee, arguments = self.value.evaluate_parts(env)
+      if isinstance(callee, SardineFunction):
+        return TailCall(callee, arguments)
+      return (callee(arguments),)
+    return (self.value.evaluate(env) if self.value else None,)
+
+
+class Import(Stmt):
+  # import name: binds the module's top-level definitions as globals of the importer.
+  # the resolver sets module, names and slots; the module itself runs once per process.
+  def __init__(self, keyword: Token, name: Token):
+    self.keyword = keyword
+    self.name = name
+
+  def evaluate(self, env):
+    values = env.values
+    for slot, value in zip(self.slots, self.values()):
+      values[slot] = value
+    invalidate_call_caches()
+    return None
+
+  def values(self):
+    # the imported values, in the order of self.names
+    exports = self.module.load()
+    return [exports[name] for name in self.names]
+
+  def __str__(self):
+    return "( import " + self.name.raw_token + " )"
+
+
+def children(node):
+  # the expression and statement nodes directly below node
+  found = []
+  for value in vars(node).values():
+    if isinstance(value, (Expr, Stmt)):
+      found.append(value)
+    elif isinstance(value, list):
+      found.extend(child for child in value if isinstance(child, (Expr, Stmt)))
+  return found
+
+
+def walk(node):
+  # node and everything below it, parents first
+  stack = [node]
+  while stack:
+    node = stack.pop()
+    yield node
+    stack.extend(reversed(children(node)))
+
+
+def line_of(node):
+  # source line of the first token stored on node or its children, None if it holds none
+  for value in vars(node).values():
+    if isinstance(value, Token):
+      return value.line
+  for child in children(node):
+    line = line_of(child)
+    if line is not None:
+      return line
+  return None
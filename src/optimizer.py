@@ -0,0 +1,506 @@
+import copy
+import operator
+from .nodes import *
+
+INLINE_LIMIT = 24  # largest function body, in nodes, that is inlined into its callers
+
+_FOLDABLE = {
+  TokenType.PLUS: operator.add,
+  TokenType.MINUS: operator.sub,
+  TokenType.STAR: operator.mul,
+  TokenType.SLASH: divide,
+  TokenType.GREATER: operator.gt,
+  TokenType.GREATER_EQUAL: operator.ge,
+  TokenType.LESS: operator.lt,
+  TokenType.LESS_EQUAL: operator.le,
+  TokenType.EQUAL_EQUAL: operator.eq,
+  TokenType.BANG_EQUAL: operator.ne,
+}
+
+
+def count_nodes(statements):
+  count = 0
+  stack = list(statements)
+  while stack:
+    node = stack.pop()
+    count += 1
+    stack.extend(children(node))
+  return count
+
+
+class Optimizer:
+  # rewrites a parsed program: folds literal expressions, strips groupings, propagates
+  # top-level constants, inlines small functions and drops branches and statements that
+  # can never run. the algebraic identities assume numeric operands, as the folding of
+  # literals does not.
+  def __init__(self, inline=True):
+    self.constants = dict()  # name -> value of never reassigned top-level decs seen so far
+    self.stats = {'folded': 0, 'simplified': 0, 'propagated': 0, 'branches': 0, 'unreachable': 0, 'inlined': 0}
+    self.nodes_before = 0
+    self.nodes_after = 0
+    self.inline = inline
+    self.functions = dict()  # name -> inlinable top-level FunctionDefinition seen so far
+    self.inlined = []  # (function name, line of the call) of every call inlined
+    self.scopes = []  # names declared by each enclosing function, block and loop
+    self.names = set()  # every name in the program, so inlined locals get fresh ones
+
+  def optimize(self, statements):
+    self.nodes_before += count_nodes(statements)
+    candidates = self._constant_candidates(statements)
+    stable = self._stable_functions(statements) if self.inline else set()
+    optimized = []
+    for stmt in statements:
+      stmt = self._statement(stmt)
+      if stmt is None:
+        continue
+      optimized.extend(self._expand(stmt))
+      # a constant is only substituted into code that follows its declaration
+      if isinstance(stmt, VarDec) and stmt.name.raw_token in candidates and isinstance(stmt.initializer, Literal):
+        self.constants[stmt.name.raw_token] = stmt.initializer.value
+      # and a function only inlined there
+      if isinstance(stmt, FunctionDefinition) and stmt.name.raw_token in stable and self._inlinable(stmt):
+        self.functions[stmt.name.raw_token] = stmt
+    optimized = self._truncate(optimized)
+    self.nodes_after += count_nodes(optimized)
+    return optimized
+
+  def eliminated(self):
+    return self.nodes_before - self.nodes_after
+
+  def report(self):
+    details = ", ".join(str(count) + " " + name for name, count in self.stats.items())
+    if self.eliminated() >= 0:
+      report = "optimizer: eliminated " + str(self.eliminated()) + " of " + str(self.nodes_before) + " nodes"
+    else:
+      # inlining copies function bodies, so the program can grow
+      report = "optimizer: grew from " + str(self.nodes_before) + " to " + str(self.nodes_after) + " nodes"
+    report += " (" + details + ")"
+    if self.inlined:
+      report += "\noptimizer: inlined " + ", ".join(name + " on line " + str(line) for name, line in self.inlined)
+    return report
+
+  def _declarations(self, statements):
+    # name -> how often it is declared, and the names assigned, anywhere in statements
+    declared, assigned = dict(), set()
+    stack = list(statements)
+    while stack:
+      node = stack.pop()
+      for value in vars(node).values():
+        if isinstance(value, Token) and value.type == TokenType.IDENTIFIER:
+          self.names.add(value.raw_token)
+      if isinstance(node, VarDec):
+        declared[node.name.raw_token] = declared.get(node.name.raw_token, 0) + 1
+      elif isinstance(node, FunctionDefinition):
+        for name in [node.name] + node.parameters:
+          declared[name.raw_token] = declared.get(name.raw_token, 0) + 1
+      elif isinstance(node, ForRange):
+        declared[node.name.raw_token] = declared.get(node.name.raw_token, 0) + 1
+      elif isinstance(node, VarAssign):
+        assigned.add(node.name.raw_token)
+      stack.extend(children(node))
+    return declared, assigned
+
+  def _constant_candidates(self, statements):
+    # names declared exactly once, by a top-level dec, and never assigned anywhere
+    declared, assigned = self._declarations(statements)
+    if any(isinstance(stmt, Import) for stmt in statements):
+      return set()  # an import may rebind any global
+    top_level = set(stmt.name.raw_token for stmt in statements if isinstance(stmt, VarDec))
+    return set(name for name in top_level if declared[name] == 1 and name not in assigned)
+
+  def _stable_functions(self, statements):
+    # names bound by exactly one declaration, a top-level def, and never assigned: a call
+    # by such a name after the def always reaches it
+    declared, assigned = self._declarations(statements)
+    if any(isinstance(stmt, Import) for stmt in statements):
+      return set()
+    top_level = set(stmt.name.raw_token for stmt in statements if isinstance(stmt, FunctionDefinition))
+    return set(name for name in top_level if declared[name] == 1 and name not in assigned)
+
+  # statements: return the replacement, or None to drop the statement
+  def _statement(self, node):
+    return getattr(self, '_statement_' + type(node).__name__)(node)
+
+  def _statements(self, statements):
+    optimized = []
+    for stmt in statements:
+      stmt = self._statement(stmt)
+      if stmt is not None:
+        optimized.extend(self._expand(stmt))
+    return self._truncate(optimized)
+
+  def _branch(self, node):
+    # a statement standing alone as a branch or loop body. declarations there belong to
+    # the enclosing scope, so a dec is not expanded into a block of its own
+    stmt = self._statement(node)
+    if stmt is None or isinstance(stmt, VarDec):
+      return stmt
+    expanded = self._expand(stmt)
+    return expanded[0] if len(expanded) == 1 else Block(expanded)
+
+  def _truncate(self, statements):
+    # nothing after a statement that always returns can run
+    for i, stmt in enumerate(statements):
+      if self._always_returns(stmt) and i + 1 < len(statements):
+        self.stats['unreachable'] += len(statements) - i - 1
+        return statements[:i + 1]
+    return statements
+
+  def _always_returns(self, node):
+    if isinstance(node, Return):
+      return True
+    if isinstance(node, Block):
+      return any(self._always_returns(stmt) for stmt in node.statements)
+    if isinstance(node, If):
+      return node.else_branch is not None and self._always_returns(node.then_branch) and self._always_returns(node.else_branch)
+    return False
+
+  def _statement_VarDec(self, node):
+    if node.initializer != None:
+      node.initializer = self._expr(node.initializer)
+    return node
+
+  def _statement_Print(self, node):
+    node.expr = self._expr(node.expr)
+    return node
+
+  def _statement_Expression(self, node):
+    node.expr = self._expr(node.expr)
+    return node
+
+  def _statement_Block(self, node):
+    self.scopes.append(set(stmt.name.raw_token for stmt in node.statements if isinstance(stmt, (VarDec, FunctionDefinition))))
+    node.statements = self._statements(node.statements)
+    self.scopes.pop()
+    return node
+
+  def _statement_If(self, node):
+    node.condition = self._expr(node.condition)
+    if isinstance(node.condition, Literal):
+      self.stats['branches'] += 1
+      branch = node.then_branch if node.condition.value else node.else_branch
+      return self._branch(branch) if branch is not None else None
+    node.then_branch = self._branch(node.then_branch) or Block([])
+    if node.else_branch is not None:
+      node.else_branch = self._branch(node.else_branch)
+    return node
+
+  def _statement_While(self, node):
+    node.condition = self._expr(node.condition)
+    if isinstance(node.condition, Literal) and not node.condition.value:
+      self.stats['branches'] += 1
+      return None
+    node.body = self._branch(node.body) or Block([])
+    return node
+
+  def _statement_ForRange(self, node):
+    node.start = self._expr(node.start)
+    node.end = self._expr(node.end)
+    self.scopes.append({node.name.raw_token})
+    node.body = self._branch(node.body) or Block([])
+    self.scopes.pop()
+    return node
+
+  def _statement_FunctionDefinition(self, node):
+    # every name the function declares anywhere counts as shadowing throughout it
+    self.scopes.append(set(param.raw_token for param in node.parameters) | set(self._declarations(node.body.statements)[0]))
+    node.body.statements = self._statements(node.body.statements)
+    self.scopes.pop()
+    return node
+
+  def _statement_Import(self, node):
+    return node
+
+  def _statement_Return(self, node):
+    if node.value:
+      node.value = self._expr(node.value)
+    return node
+
+  # expressions: return the replacement
+  def _expr(self, node):
+    return getattr(self, '_expr_' + type(node).__name__)(node)
+
+  def _expr_Binary(self, node):
+    node.left = self._expr(node.left)
+    node.right = self._expr(node.right)
+    left, right, operator = node.left, node.right, node.operator.type
+    if isinstance(left, Literal) and isinstance(right, Literal):
+      try:
+        value = _FOLDABLE[operator](left.value, right.value)
+      except Exception:
+        # leave the error to runtime, where it is reported as before
+        return node
+      self.stats['folded'] += 1
+      return Literal(value)
+    # x * 1, 1 * x, x / 1 and x - 0 are exact for numbers. not so with 1.0 or 0.0, which
+    # would turn an integer x into a float
+    if operator in (TokenType.STAR, TokenType.SLASH) and self._is_number(right, 1):
+      self.stats['simplified'] += 1
+      return left
+    if operator == TokenType.STAR and self._is_number(left, 1):
+      self.stats['simplified'] += 1
+      return right
+    if operator == TokenType.MINUS and self._is_number(right, 0):
+      self.stats['simplified'] += 1
+      return left
+    return node
+
+  def _expr_Logical(self, node):
+    node.left = self._expr(node.left)
+    node.right = self._expr(node.right)
+    if isinstance(node.left, Literal):
+      self.stats['folded'] += 1
+      # the left operand decides when it is truthy for 'or' and falsy for 'and'
+      if bool(node.left.value) == (node.operator.type == TokenType.OR):
+        return node.left
+      return node.right
+    return node
+
+  def _expr_Unary(self, node):
+    node.right = self._expr(node.right)
+    right = node.right
+    if isinstance(right, Literal):
+      try:
+        value = (not right.value) if node.operator.type == TokenType.NOT else -right.value
+      except Exception:
+        return node
+      self.stats['folded'] += 1
+      return Literal(value)
+    if node.operator.type == TokenType.MINUS and isinstance(right, Unary) and right.operator.type == TokenType.MINUS:
+      self.stats['simplified'] += 1
+      return right.right
+    return node
+
+  def _expr_Literal(self, node):
+    return node
+
+  def _expr_Array(self, node):
+    node.elements = [self._expr(element) for element in node.elements]
+    return node
+
+  def _expr_Grouping(self, node):
+    return self._expr(node.expr)
+
+  def _expr_Variable(self, node):
+    if node.name.raw_token in self.constants:
+      self.stats['propagated'] += 1
+      return Literal(self.constants[node.name.raw_token])
+    return node
+
+  def _expr_VarAssign(self, node):
+    node.value = self._expr(node.value)
+    return node
+
+  def _expr_FunctionCall(self, node):
+    node.callee = self._expr(node.callee)
+    node.arguments = [self._expr(arg) for arg in node.arguments]
+    return node
+
+  # inlining
+  def _inlinable(self, definition):
+    # small, not calling itself, defining no closures, and with no return inside a loop,
+    # which the inlined code could not leave early
+    if count_nodes(definition.body.statements) > INLINE_LIMIT:
+      return False
+    name = definition.name.raw_token
+    for node in walk(definition.body):
+      if isinstance(node, (FunctionDefinition, Import)):
+        return False
+      if isinstance(node, FunctionCall) and isinstance(node.callee, Variable) and node.callee.name.raw_token == name:
+        return False
+      if isinstance(node, (While, ForRange)) and any(isinstance(inner, Return) for inner in walk(node)):
+        return False
+    return True
+
+  def _expand(self, stmt):
+    # stmt, preceded by the inlined bodies of the calls in it it can take them from.
+    # a call that is the whole expression of a statement may take any arguments. calls
+    # inside a larger expression are moved ahead of it, which keeps the order things
+    # happen in only when nothing else in it has effects: the rest of the expression and
+    # the arguments may not call or assign, and the inlined bodies may not assign
+    # anything outside themselves
+    if not self.functions:
+      return [stmt]
+    if isinstance(stmt, (Print, Expression)):
+      owner, attribute = stmt, 'expr'
+      if isinstance(stmt.expr, VarAssign):
+        owner, attribute = stmt.expr, 'value'
+    elif isinstance(stmt, VarDec) and stmt.initializer is not None:
+      owner, attribute = stmt, 'initializer'
+    elif isinstance(stmt, Return) and stmt.value is not None:
+      owner, attribute = stmt, 'value'
+    else:
+      return [stmt]
+    expr = getattr(owner, attribute)
+    if isinstance(expr, FunctionCall):
+      inlined = self._inline_call(expr, False)
+      if inlined is None:
+        return [stmt]
+      prelude, result = inlined
+      if isinstance(stmt, Expression) and stmt.expr is expr:
+        return prelude  # the value is never used
+      setattr(owner, attribute, Variable(result))
+      return prelude + [stmt]
+    calls = []
+    if not self._hoistable(expr, calls) or not calls:
+      return [stmt]
+    prelude, results = [], dict()
+    for call in calls:
+      inlined = self._inline_call(call, True)
+      if inlined is None:
+        return [stmt]
+      prelude += inlined[0]
+      results[id(call)] = Variable(inlined[1])
+    setattr(owner, attribute, self._replace(expr, results))
+    return prelude + [stmt]
+
+  def _hoistable(self, expr, calls):
+    # whether expr has no effects but calls to inlinable functions with effect free
+    # arguments, which are added to calls in the order they run
+    if isinstance(expr, FunctionCall):
+      if not self._inline_target(expr) or not all(_effect_free(argument) for argument in expr.arguments):
+        return False
+      calls.append(expr)
+      return True
+    if isinstance(expr, VarAssign):
+      return False
+    if isinstance(expr, Logical):
+      # the right operand may not run at all
+      return self._hoistable(expr.left, calls) and _effect_free(expr.right)
+    return all(self._hoistable(child, calls) for child in children(expr))
+
+  def _replace(self, expr, results):
+    if id(expr) in results:
+      return results[id(expr)]
+    for attribute, value in vars(expr).items():
+      if isinstance(value, Expr):
+        setattr(expr, attribute, self._replace(value, results))
+    return expr
+
+  def _inline_target(self, call):
+    # the definition call reaches, if it can be inlined there
+    if not isinstance(call.callee, Variable):
+      return None
+    name = call.callee.name.raw_token
+    definition = self.functions.get(name)
+    if definition is None or len(call.arguments) != len(definition.parameters):
+      return None
+    if any(name in scope for scope in self.scopes):
+      return None
+    return definition
+
+  def _inline_call(self, call, pure):
+    # (statements computing the call, token of the variable holding its result), or None
+    # when it cannot be inlined here. pure requires the body to assign nothing outside itself
+    definition = self._inline_target(call)
+    if definition is None:
+      return None
+    name = definition.name.raw_token
+    prefix = self._fresh(name + "__" + str(len(self.inlined) + 1))
+    body = copy.deepcopy(definition.body.statements)
+    renamed = {param.raw_token: self._token(prefix + "_" + param.raw_token, param.line) for param in definition.parameters}
+    free, writes = set(), set()
+    self._rename(body, [dict(renamed)], prefix, free, writes)
+    # names the body reads from outside must mean the same at the call site
+    if any(name in scope for scope in self.scopes for name in free) or (pure and writes):
+      return None
+    statements = []
+    for param, argument in zip(definition.parameters, call.arguments):
+      # calls among the arguments are inlined in turn
+      statements += self._expand(VarDec(renamed[param.raw_token], argument))
+    result = self._token(prefix, call.paren.line)
+    if len(body) == 1 and isinstance(body[0], Return):
+      statements.append(VarDec(result, body[0].value))
+    else:
+      statements.append(VarDec(result, None))
+      statements += self._returns_to(body, result)
+    self.inlined.append((name, call.paren.line))
+    self.stats['inlined'] += 1
+    return statements, result
+
+  def _fresh(self, name):
+    # name, or name with a number added if the program already has it
+    fresh, count = name, 1
+    while fresh in self.names:
+      fresh = name + "_" + str(count)
+      count += 1
+    self.names.add(fresh)
+    return fresh
+
+  def _token(self, name, line):
+    self.names.add(name)
+    return Token(TokenType.IDENTIFIER, name, name, line)
+
+  def _rename(self, statements, scopes, prefix, free, writes):
+    for stmt in statements:
+      self._rename_node(stmt, scopes, prefix, free, writes)
+
+  def _rename_node(self, node, scopes, prefix, free, writes):
+    # gives every local of an inlined body a fresh name, so it can neither capture nor
+    # shadow a name at the call site, and records the names it uses from outside
+    if isinstance(node, (Variable, VarAssign)):
+      if isinstance(node, VarAssign):
+        self._rename_node(node.value, scopes, prefix, free, writes)
+      for scope in reversed(scopes):
+        if node.name.raw_token in scope:
+          node.name = scope[node.name.raw_token]
+          return
+      free.add(node.name.raw_token)
+      if isinstance(node, VarAssign):
+        writes.add(node.name.raw_token)
+    elif isinstance(node, VarDec):
+      if node.initializer is not None:
+        self._rename_node(node.initializer, scopes, prefix, free, writes)
+      token = self._token(self._fresh(prefix + "_" + node.name.raw_token), node.name.line)
+      scopes[-1][node.name.raw_token] = token
+      node.name = token
+    elif isinstance(node, Block):
+      scopes.append(dict())
+      self._rename(node.statements, scopes, prefix, free, writes)
+      scopes.pop()
+    elif isinstance(node, ForRange):
+      self._rename_node(node.start, scopes, prefix, free, writes)
+      self._rename_node(node.end, scopes, prefix, free, writes)
+      token = self._token(self._fresh(prefix + "_" + node.name.raw_token), node.name.line)
+      scopes.append({node.name.raw_token: token})
+      node.name = token
+      self._rename_node(node.body, scopes, prefix, free, writes)
+      scopes.pop()
+    else:
+      for child in children(node):
+        self._rename_node(child, scopes, prefix, free, writes)
+
+  def _returns_to(self, statements, result):
+    # statements with every return turned into an assignment to result. what follows a
+    # statement that may return is moved into both of its branches, so nothing runs after
+    # the return; the renamed locals keep the merged scopes apart
+    out = []
+    for i, stmt in enumerate(statements):
+      if not any(isinstance(node, Return) for node in walk(stmt)):
+        out.append(stmt)
+        continue
+      rest = statements[i + 1:]
+      if isinstance(stmt, Return):
+        value = stmt.value if stmt.value is not None else Literal(None)
+        out.append(Expression(VarAssign(result, value)))
+      elif isinstance(stmt, Block):
+        out += self._returns_to(stmt.statements + rest, result)
+      else:
+        then_branch = self._returns_to(_as_list(stmt.then_branch) + rest, result)
+        else_branch = self._returns_to(_as_list(stmt.else_branch) + copy.deepcopy(rest), result)
+        out.append(If(stmt.condition, Block(then_branch), Block(else_branch) if else_branch else None, stmt.keyword))
+      return out
+    return out
+
+  def _is_number(self, node, value):
+    return isinstance(node, Literal) and type(node.value) is int and node.value == value
+
+
+def _effect_free(expr):
+  return not any(isinstance(node, (FunctionCall, VarAssign)) for node in walk(expr))
+
+
+def _as_list(stmt):
+  if stmt is None:
+    return []
+  return list(stmt.statements) if isinstance(stmt, Block) else [stmt]
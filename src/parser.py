@@ -1,10 +1,19 @@
+from array import array
 from .nodes import *
-from .token import TokenType
+from .token import TokenType, TokenBuffer, CODES
 
 
 class Parser:
   def __init__(self, tokens):
-    self.tokens = tokens
+    # tokens is a TokenBuffer, a list, or any iterable of tokens, which is read only as far
+    # as parsing needs. token types are checked through the type codes in self.types.
+    if isinstance(tokens, TokenBuffer):
+      self.tokens, self.types, self.stream = tokens, tokens.types, None
+    elif isinstance(tokens, list):
+      self.tokens, self.stream = tokens, None
+      self.types = array('B', [CODES[token.type] for token in tokens])
+    else:
+      self.tokens, self.types, self.stream = [], array('B'), iter(tokens)
     self.current = 0
 
   def parse(self):
@@ -13,11 +22,25 @@ class Parser:
       statements.append(self._parse_declaration())
     return statements
 
+  def declarations(self):
+    # yields the top-level declarations one at a time. tokens read from a stream are
+    # dropped once the declaration they belong to is parsed.
+    streaming = self.stream is not None
+    while not self._at_end():
+      declaration = self._parse_declaration()
+      if streaming:
+        del self.tokens[:self.current]
+        del self.types[:self.current]
+        self.current = 0
+      yield declaration
+
   def _parse_declaration(self):
     if self._match(TokenType.DEC): 
       return self._parse_var_declaration()
     if self._match(TokenType.DEF):
       return self._parse_fun_definition()
+    if self._match(TokenType.IMPORT):
+      return self._parse_import()
     return self._parse_statement()
 
   def _parse_var_declaration(self):
@@ -43,6 +66,12 @@ class Parser:
     body = self._parse_block()
     return FunctionDefinition(name, parameters, body)
 
+  def _parse_import(self):
+    keyword = self._previous()
+    name = self._consume(TokenType.IDENTIFIER, "Expect module name after 'import'.")
+    self._consume(TokenType.NEWLINE, "Expect newline after import.")
+    return Import(keyword, name)
+
   def _parse_statement(self):
     if self._match(TokenType.PRINT):
       return self._parse_print()
@@ -52,11 +81,17 @@ class Parser:
       return self._parse_if_stmt()
     if self._match(TokenType.RETURN):
       return self._parse_return_stmt()
+    if self._match(TokenType.WHILE):
+      return self._parse_while_stmt()
+    if self._match(TokenType.FOR):
+      return self._parse_for_stmt()
     return self._parse_exp_stmt()
 
   def _parse_print(self):
-    expr = self._parse_exp_stmt()
-    return Print(expr)
+    keyword = self._previous()
+    expr = self._parse_exp()
+    self._consume(TokenType.NEWLINE, "Expect newline after value.")
+    return Print(expr, keyword)
 
   def _parse_block(self):
     statements = []
@@ -66,12 +101,29 @@ class Parser:
     return Block(statements)
 
   def _parse_if_stmt(self):
+    keyword = self._previous()
     condition = self._parse_exp()
     then_branch = self._parse_statement()
     else_branch = None
     if self._match(TokenType.ELSE):
       else_branch = self._parse_statement()
-    return If(condition, then_branch, else_branch)
+    return If(condition, then_branch, else_branch, keyword)
+
+  def _parse_while_stmt(self):
+    keyword = self._previous()
+    condition = self._parse_exp()
+    body = self._parse_statement()
+    return While(condition, body, keyword)
+
+  def _parse_for_stmt(self):
+    name = self._consume(TokenType.IDENTIFIER, "Expect loop variable name after 'for'.")
+    self._consume(TokenType.IN, "Expect 'in' after loop variable.")
+    start = self._parse_addition()
+    self._consume(TokenType.DOT, "Expect '..' in range.")
+    self._consume(TokenType.DOT, "Expect '..' in range.")
+    end = self._parse_addition()
+    body = self._parse_statement()
+    return ForRange(name, start, end, body)
 
   def _parse_return_stmt(self):
     keyword = self._previous()
@@ -192,16 +244,25 @@ class Parser:
       expr = self._parse_exp()
       self._consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
       return Grouping(expr)
+    if self._match(TokenType.LEFT_BRACKET):
+      bracket = self._previous()
+      elements = []
+      if not self._check(TokenType.RIGHT_BRACKET):
+        while True:
+          elements.append(self._parse_exp())
+          if not self._match(TokenType.COMMA): break
+      self._consume(TokenType.RIGHT_BRACKET, "Expect ']' after array elements.")
+      return Array(bracket, elements)
 
 
   # helpers
   def _check(self, token_type):
     if self._at_end():
       return False
-    return self.tokens[self.current].type == token_type
+    return self.types[self.current] == CODES[token_type]
 
   def _consume(self, token_type, message):
-    if self._at_end() or self.tokens[self.current].type != token_type:
+    if self._at_end() or self.types[self.current] != CODES[token_type]:
       # TODO: throw error
       pass
     tok = self.tokens[self.current]
@@ -217,11 +278,23 @@ class Parser:
     if self._at_end():
       return False
 
+    code = self.types[self.current]
     for token_type in token_types:
-      if self.tokens[self.current].type == token_type:
+      if code == CODES[token_type]:
         self.current += 1
         return True
     return False
 
   def _at_end(self):
-    return self.current == len(self.tokens)
\ No newline at end of file
+    return self.current >= len(self.types) and not self._pull()
+
+  def _pull(self):
+    # reads the next token of a stream into the window, False once there are none left
+    if self.stream is None:
+      return False
+    for token in self.stream:
+      self.tokens.append(token)
+      self.types.append(CODES[token.type])
+      return True
+    self.stream = None
+    return False
\ No newline at end of file
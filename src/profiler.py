@@ -0,0 +1,203 @@
+import os
+import time
+from .nodes import Stmt, Block, walk, line_of
+from .modules import Module
+from .sardine_function import SardineFunction
+
+# the profiler measures programs run by the tree backend. while installed it wraps
+# SardineFunction.run and the evaluate method of every statement class, and puts the
+# originals back when uninstalled, so running without it costs nothing. calls served from
+# a memo cache run nothing, and are not counted.
+# statements are attributed to the file they came from: the module's for those of an
+# imported module, the profiled script's for any other.
+MAIN = '<main>'
+SCRIPT = '<script>'
+
+
+class FunctionStats:
+  __slots__ = ('name', 'file', 'line', 'calls', 'inclusive', 'exclusive')
+
+  def __init__(self, name: str, file: str, line: int):
+    self.name = name
+    self.file = file
+    self.line = line
+    self.calls = 0
+    self.inclusive = 0.0  # seconds, recursive calls counted once
+    self.exclusive = 0.0  # seconds spent in the function's own statements
+
+  def label(self):
+    return self.name if self.line is None else self.name + "@" + self.file + ":" + str(self.line)
+
+
+class LineStats:
+  __slots__ = ('file', 'line', 'count', 'time')
+
+  def __init__(self, file: str, line: int):
+    self.file = file
+    self.line = line
+    self.count = 0
+    self.time = 0.0  # seconds, without the statements nested inside
+
+
+class Profiler:
+  def __init__(self, clock=time.perf_counter, script=SCRIPT):
+    self.clock = clock
+    self.script = script  # the name of the profiled script's file
+    self.functions = dict()  # FunctionDefinition (None for the top level) -> FunctionStats
+    self.lines = dict()  # (file, line) -> LineStats
+    self.stacks = dict()  # tuple of function labels -> exclusive seconds
+    self.originals = None
+    self._frames = []  # [stats, stack, start, seconds spent in callees] per active call
+    self._active = dict()  # FunctionStats -> calls of it currently on the stack
+    self._statements = []  # [start, seconds spent in nested statements] per running statement
+    self._line_cache = dict()  # id(statement) -> LineStats
+    self._files = dict()  # id(statement) -> file name, for the statements of imported modules
+
+  def __enter__(self):
+    self.install()
+    return self
+
+  def __exit__(self, *exc):
+    self.uninstall()
+
+  def install(self):
+    if self.originals is not None:
+      return
+    self.originals = {SardineFunction: {'run': SardineFunction.run}}
+    SardineFunction.run = self._profiled_run(SardineFunction.run)
+    self.originals[Module] = {'load': Module.load}
+    Module.load = self._profiled_load(Module.load)
+    for cls in _statement_classes():
+      if cls is not Block and 'evaluate' in vars(cls):
+        self.originals[cls] = {'evaluate': cls.evaluate}
+        cls.evaluate = self._profiled_evaluate(cls.evaluate)
+    self._enter(None)
+
+  def uninstall(self):
+    if self.originals is None:
+      return
+    while self._frames:
+      self._exit()
+    for cls, methods in self.originals.items():
+      for name, method in methods.items():
+        setattr(cls, name, method)
+    self.originals = None
+
+  def _stats(self, definition):
+    stats = self.functions.get(definition)
+    if stats is None:
+      if definition is None:
+        stats = FunctionStats(MAIN, self.script, None)
+      else:
+        stats = FunctionStats(definition.name.raw_token, self._file(definition), definition.name.line)
+      self.functions[definition] = stats
+    return stats
+
+  def _enter(self, definition):
+    stats = self._stats(definition)
+    stats.calls += 1
+    self._active[stats] = self._active.get(stats, 0) + 1
+    stack = (self._frames[-1][1] if self._frames else ()) + (stats.label(),)
+    self._frames.append([stats, stack, self.clock(), 0.0])
+
+  def _exit(self):
+    stats, stack, start, callees = self._frames.pop()
+    elapsed = self.clock() - start
+    stats.exclusive += elapsed - callees
+    self.stacks[stack] = self.stacks.get(stack, 0.0) + elapsed - callees
+    self._active[stats] -= 1
+    if self._active[stats] == 0:
+      stats.inclusive += elapsed
+    if self._frames:
+      self._frames[-1][3] += elapsed
+
+  def _profiled_run(self, run):
+    profiler = self
+
+    def profiled(function, arguments):
+      # every call, tail calls included, is entered as a frame
+      profiler._enter(function.definition)
+      try:
+        return run(function, arguments)
+      finally:
+        profiler._exit()
+    return profiled
+
+  def _profiled_evaluate(self, evaluate):
+    profiler = self
+
+    def profiled(stmt, env):
+      stats = profiler._line_cache.get(id(stmt))
+      if stats is None:
+        stats = profiler._line_stats(stmt)
+      running = [profiler.clock(), 0.0]
+      profiler._statements.append(running)
+      try:
+        return evaluate(stmt, env)
+      finally:
+        profiler._statements.pop()
+        elapsed = profiler.clock() - running[0]
+        if stats is not None:
+          stats.count += 1
+          stats.time += elapsed - running[1]
+        if profiler._statements:
+          profiler._statements[-1][1] += elapsed
+    return profiled
+
+  def _profiled_load(self, load):
+    profiler = self
+
+    def profiled(module):
+      # Module.load, noting which file the module's statements came from
+      if module.statements and id(module.statements[0]) in profiler._files:
+        return load(module)
+      for stmt in module.statements:
+        for node in walk(stmt):
+          if isinstance(node, Stmt):
+            profiler._files[id(node)] = os.path.basename(module.path)
+      return load(module)
+    return profiled
+
+  def _file(self, stmt):
+    return self._files.get(id(stmt), self.script)
+
+  def _line_stats(self, stmt):
+    line = line_of(stmt)
+    stats = None
+    if line is not None:
+      key = (self._file(stmt), line)
+      stats = self.lines.get(key)
+      if stats is None:
+        stats = self.lines[key] = LineStats(*key)
+    self._line_cache[id(stmt)] = stats
+    return stats
+
+  def report(self, limit=20):
+    # functions by exclusive time, then the most expensive lines
+    out = ["%-28s%10s%16s%16s" % ("function", "calls", "inclusive ms", "exclusive ms")]
+    for stats in sorted(self.functions.values(), key=lambda s: s.exclusive, reverse=True)[:limit]:
+      out.append("%-28s%10d%16.3f%16.3f" % (stats.label(), stats.calls, stats.inclusive * 1e3, stats.exclusive * 1e3))
+    out.append("")
+    out.append("%-28s%10s%16s" % ("line", "count", "time ms"))
+    for stats in sorted(self.lines.values(), key=lambda s: s.time, reverse=True)[:limit]:
+      out.append("%-28s%10d%16.3f" % (stats.file + ":" + str(stats.line), stats.count, stats.time * 1e3))
+    return "\n".join(out)
+
+  def collapsed(self):
+    # one 'outer;inner microseconds' line per call stack, the input flamegraph.pl and
+    # speedscope take
+    return ["%s %d" % (";".join(stack), round(seconds * 1e6)) for stack, seconds in sorted(self.stacks.items())]
+
+  def write_collapsed(self, path):
+    with open(path, 'w') as f:
+      for line in self.collapsed():
+        f.write(line + "\n")
+
+
+def _statement_classes():
+  found, pending = [], [Stmt]
+  while pending:
+    cls = pending.pop()
+    found.append(cls)
+    pending.extend(cls.__subclasses__())
+  return found
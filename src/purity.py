@@ -0,0 +1,187 @@
+from .nodes import *
+
+# finds the functions of a program whose result depends on their arguments alone, so calls
+# to them can be served from a cache. a function is pure when nothing inside it prints,
+# assigns a variable outside its own frames or reads one that is not a function, it defines
+# no functions of its own (each call would return new closures), and every function it
+# calls is itself pure. it needs the whole program: a later assignment to a function's
+# name makes every caller of it impure.
+#
+# bindings are tracked the way the tree backend makes frames, so the resolver's (depth,
+# slot) pairs map to them: a function call, a declaring block or loop body, and each for
+# loop get a frame. a binding is (frame number, slot), frame 0 holding the globals.
+
+
+class _Function:
+  def __init__(self, definition, frame: int):
+    self.definition = definition
+    self.frame = frame  # index in the frame stack of the function's call frame
+    self.effects = False
+    self.reads = []  # bindings outside the function that it reads
+    self.calls = []  # bindings called directly by name
+
+
+class _Analysis:
+  def __init__(self):
+    self.frames = [0]
+    self.count = 1
+    self.functions = []  # every _Function, in definition order
+    self.active = []  # the _Functions being walked, outermost first
+    self.definitions = dict()  # binding -> FunctionDefinition, or None for other values
+    self.assigned = set()  # bindings given a value more than once
+    self.natives = set()  # bindings holding a value before the program runs
+    self.seen = set()  # bindings some variable has named so far
+    self.top_level = None  # the top-level statement being walked
+
+  def _binding(self, depth: int, slot: int):
+    if depth >= len(self.frames):
+      return 0, slot
+    return self.frames[-1 - depth], slot
+
+  def _frame_of(self, binding):
+    return self.frames.index(binding[0]) if binding[0] in self.frames else -1
+
+  def _define(self, binding, definition=None):
+    if binding in self.natives:
+      self.natives.discard(binding)
+      if definition is not None and definition is self.top_level and binding not in self.seen:
+        # an unconditional top-level def replaces the native before anything can call it
+        self.definitions[binding] = definition
+        return
+      self.definitions[binding] = None  # the native it replaces
+    if binding in self.definitions:
+      self.assigned.add(binding)
+    self.definitions[binding] = definition
+
+  def _push(self):
+    self.frames.append(self.count)
+    self.count += 1
+
+  def _outside(self, binding):
+    # the active functions whose frames the binding is not part of
+    index = self._frame_of(binding)
+    return [function for function in self.active if function.frame > index]
+
+  def statements(self, statements):
+    for stmt in statements:
+      self.node(stmt)
+
+  def node(self, node):
+    method = getattr(self, '_' + type(node).__name__, None)
+    if method is not None:
+      method(node)
+    else:
+      for child in children(node):
+        self.node(child)
+
+  def _Print(self, node):
+    for function in self.active:
+      function.effects = True
+    self.node(node.expr)
+
+  def _Variable(self, node):
+    binding = self._binding(node.depth, node.slot)
+    self.seen.add(binding)
+    for function in self._outside(binding):
+      function.reads.append(binding)
+
+  def _VarAssign(self, node):
+    self.node(node.value)
+    binding = self._binding(node.depth, node.slot)
+    self.assigned.add(binding)
+    for function in self._outside(binding):
+      function.effects = True
+
+  def _FunctionCall(self, node):
+    if isinstance(node.callee, Variable):
+      binding = self._binding(node.callee.depth, node.callee.slot)
+      if self.active:
+        self.active[-1].calls.append(binding)
+    elif self.active:
+      self.active[-1].effects = True  # calls a value the analysis cannot follow
+    self.node(node.callee)
+    for argument in node.arguments:
+      self.node(argument)
+
+  def _VarDec(self, node):
+    if node.initializer != None:
+      self.node(node.initializer)
+    self._define((self.frames[-1], node.slot))
+
+  def _Import(self, node):
+    for slot in node.slots:
+      self._define((self.frames[-1], slot))
+
+  def _Block(self, node):
+    if node.slot_count is None:
+      self.statements(node.statements)
+      return
+    self._push()
+    self.statements(node.statements)
+    self.frames.pop()
+
+  def _While(self, node):
+    if node.slot_count is not None:
+      self._push()
+    self.node(node.condition)
+    if isinstance(node.body, Block) and node.body.slot_count is None:
+      self.statements(node.body.statements)
+    else:
+      self.node(node.body)
+    if node.slot_count is not None:
+      self.frames.pop()
+
+  def _ForRange(self, node):
+    self.node(node.start)
+    self.node(node.end)
+    self._push()
+    if isinstance(node.body, Block) and node.body.slot_count is None:
+      self.statements(node.body.statements)
+    else:
+      self.node(node.body)
+    self.frames.pop()
+
+  def _FunctionDefinition(self, node):
+    for function in self.active:
+      function.effects = True
+    self._define((self.frames[-1], node.slot), node)
+    self._push()
+    function = _Function(node, len(self.frames) - 1)
+    for slot in range(len(node.parameters)):
+      self._define((self.frames[-1], slot))
+    self.functions.append(function)
+    self.active.append(function)
+    self.statements(node.body.statements)
+    self.active.pop()
+    self.frames.pop()
+
+  def _is_function(self, binding):
+    return self.definitions.get(binding) is not None and binding not in self.assigned
+
+  def pure(self):
+    # functions with no effects of their own, then those calling impure ones dropped
+    # until nothing changes
+    pure = dict()
+    for function in self.functions:
+      if not function.effects and all(self._is_function(binding) for binding in function.reads + function.calls):
+        pure[function.definition] = function
+    changed = True
+    while changed:
+      changed = False
+      for definition, function in list(pure.items()):
+        if any(self.definitions[binding] not in pure for binding in function.calls):
+          del pure[definition]
+          changed = True
+    return list(pure)
+
+
+def analyze(statements, bound=()):
+  # the pure FunctionDefinitions of a resolved program. bound are the global slots that
+  # hold a value before it runs, such as natives: a definition reusing one reassigns it,
+  # unless it is a top-level def that runs before anything names the slot
+  analysis = _Analysis()
+  analysis.natives = {(0, slot) for slot in bound}
+  for stmt in statements:
+    analysis.top_level = stmt
+    analysis.node(stmt)
+  return analysis.pure()
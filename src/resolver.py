@@ -0,0 +1,212 @@
+import weakref
+from .nodes import *
+from .errors import SardineImportError
+from . import arrays
+
+
+class Resolver:
+  # binds every variable use to a (depth, slot) pair ahead of execution.
+  # depth counts frames between the use and the frame holding the binding,
+  # slot indexes into that frame's values.
+  def __init__(self, importer=None):
+    self.globals = dict()  # name -> slot, kept across calls to resolve (REPL)
+    self.importer = importer  # maps the name token of an import to its loaded Module
+    self.scopes = []
+    self.function_depth = 0
+    self.called = set()  # global slots some call site calls by name
+    # slot -> the nodes writing it, for global slots nothing calls by name yet. held weakly,
+    # so the writers of a streamed declaration go once it has run
+    self.writers = dict()
+
+  def resolve(self, statements):
+    for stmt in statements:
+      self._resolve(stmt)
+    return statements
+
+  def _writes(self, node, is_global: bool):
+    # writes to a global that is called by name invalidate the call sites' caches
+    node.bumps = is_global and node.slot in self.called
+    if is_global and not node.bumps:
+      self.writers.setdefault(node.slot, weakref.WeakSet()).add(node)
+
+  def _calls(self, slot: int):
+    if slot not in self.called:
+      self.called.add(slot)
+      for node in self.writers.pop(slot, ()):
+        node.bumps = True
+
+  def declare_global(self, name: str):
+    # a global the interpreter gives a value before the program runs
+    if name not in self.globals:
+      self.globals[name] = len(self.globals)
+    return self.globals[name]
+
+  def global_count(self):
+    return len(self.globals)
+
+  def _resolve(self, node):
+    getattr(self, '_resolve_' + type(node).__name__)(node)
+
+  # scopes
+  def _begin_scope(self):
+    self.scopes.append(dict())
+
+  def _end_scope(self):
+    return len(self.scopes.pop())
+
+  def _declare(self, name: str):
+    scope = self.scopes[-1] if self.scopes else self.globals
+    if name not in scope:
+      scope[name] = len(scope)
+    return scope[name]
+
+  def _lookup(self, name: str):
+    depth = 0
+    for scope in reversed(self.scopes):
+      if name in scope:
+        return depth, scope[name]
+      depth += 1
+    # unresolved names are globals, possibly defined later
+    if name not in self.globals:
+      self.globals[name] = len(self.globals)
+    return depth, self.globals[name]
+
+  def _declares(self, statements):
+    return any(isinstance(stmt, (VarDec, FunctionDefinition)) for stmt in statements)
+
+  # expressions
+  def _resolve_Binary(self, node):
+    self._resolve(node.left)
+    self._resolve(node.right)
+
+  def _resolve_Logical(self, node):
+    self._resolve(node.left)
+    self._resolve(node.right)
+
+  def _resolve_Unary(self, node):
+    self._resolve(node.right)
+
+  def _resolve_Literal(self, node):
+    pass
+
+  def _resolve_Array(self, node):
+    if not arrays.available():
+      raise SardineImportError(node.bracket.line, node.bracket.raw_token, "Arrays need NumPy, which is not installed.")
+    for element in node.elements:
+      self._resolve(element)
+
+  def _resolve_Grouping(self, node):
+    self._resolve(node.expr)
+
+  def _resolve_Variable(self, node):
+    node.depth, node.slot = self._lookup(node.name.raw_token)
+    # a tree backend run specialized it to the old depth and slot
+    node.__dict__.pop('evaluate', None)
+
+  def _resolve_VarAssign(self, node):
+    self._resolve(node.value)
+    node.depth, node.slot = self._lookup(node.name.raw_token)
+    self._writes(node, node.depth == len(self.scopes))
+
+  def _resolve_FunctionCall(self, node):
+    self._resolve(node.callee)
+    for arg in node.arguments:
+      self._resolve(arg)
+    node.global_callee = isinstance(node.callee, Variable) and node.callee.depth == len(self.scopes)
+    if node.global_callee:
+      self._calls(node.callee.slot)
+
+  # statements
+  def _resolve_VarDec(self, node):
+    if node.initializer != None:
+      self._resolve(node.initializer)
+    node.slot = self._declare(node.name.raw_token)
+    self._writes(node, not self.scopes)
+
+  def _resolve_Print(self, node):
+    self._resolve(node.expr)
+
+  def _resolve_Expression(self, node):
+    self._resolve(node.expr)
+
+  def _resolve_Block(self, node):
+    # blocks that declare nothing run in the enclosing frame
+    if not self._declares(node.statements):
+      node.slot_count = None
+      for stmt in node.statements:
+        self._resolve(stmt)
+      return
+    self._begin_scope()
+    for stmt in node.statements:
+      self._resolve(stmt)
+    node.slot_count = self._end_scope()
+
+  def _resolve_If(self, node):
+    self._resolve(node.condition)
+    self._resolve(node.then_branch)
+    if node.else_branch:
+      self._resolve(node.else_branch)
+
+  def _resolve_While(self, node):
+    scoped = self._hoists(node.body) and self._declares(node.body.statements)
+    if scoped:
+      self._begin_scope()
+    self._resolve(node.condition)
+    self._resolve_loop_body(node.body)
+    node.slot_count = self._end_scope() if scoped else None
+
+  def _resolve_ForRange(self, node):
+    self._resolve(node.start)
+    self._resolve(node.end)
+    self._begin_scope()
+    self._declare(node.name.raw_token)
+    self._resolve_loop_body(node.body)
+    node.slot_count = self._end_scope()
+    # closures defined in the body each see the loop variable of their own iteration
+    node.per_iteration = self._defines_functions(node.body)
+
+  def _defines_functions(self, body):
+    return any(isinstance(node, FunctionDefinition) for node in walk(body))
+
+  def _hoists(self, body):
+    # a block body can share one frame across iterations, unless it defines functions
+    # whose closures must each see the frame of their own iteration
+    return isinstance(body, Block) and not self._defines_functions(body)
+
+  def _resolve_loop_body(self, body):
+    if not self._hoists(body):
+      self._resolve(body)
+      return
+    body.slot_count = None
+    for stmt in body.statements:
+      self._resolve(stmt)
+
+  def _resolve_FunctionDefinition(self, node):
+    # declared before the body is resolved so the function can call itself
+    node.slot = self._declare(node.name.raw_token)
+    self._writes(node, not self.scopes)
+    # parameters and the body's own declarations share the call frame
+    self._begin_scope()
+    for param in node.parameters:
+      self._declare(param.raw_token)
+    self.function_depth += 1
+    for stmt in node.body.statements:
+      self._resolve(stmt)
+    self.function_depth -= 1
+    node.slot_count = self._end_scope()
+
+  def _resolve_Import(self, node):
+    # the module is loaded now, so its names get global slots before anything runs
+    if self.scopes:
+      raise SardineImportError(node.keyword.line, node.keyword.raw_token, "Imports are only allowed at the top level.")
+    if self.importer is None:
+      raise SardineImportError(node.keyword.line, node.keyword.raw_token, "No module loader to import with.")
+    node.module = self.importer(node.name)
+    node.names = node.module.names
+    node.slots = [self._declare(name) for name in node.names]
+
+  def _resolve_Return(self, node):
+    # a call whose result is returned as is can reuse the caller's frame
+    node.tail = self.function_depth > 0 and isinstance(node.value, FunctionCall)
+    if node.value:
+      self._resolve(node.value)
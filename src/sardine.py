@@ -1,35 +1,184 @@
+import itertools
+import os
 import sys
+import time
+from . import cache
+from .errors import SardineImportError, error
 from .tokenizer import Tokenizer
 from .parser import Parser
 from .interpreter import Interpreter
+from .bytecode_compiler import BytecodeCompiler
+from .bytecode import disassemble
+from .transpiler import Transpiler
+from .optimizer import Optimizer
+from .profiler import Profiler
+from .hooks import Coverage
+from .batch import run_scripts, summarize, OK
 from .nodes import *
 
 
 class SardineLang:
   interpreter = Interpreter()
+  inline = True  # whether -O inlines small functions
 
   def run(args):
-    if len(args) > 1:
-      print("Usage: python sardine.py [script]", file=sys.stderr)
+    optimize = '-O' in args
+    stream = '--stream' in args
+    profile = '--profile' in args
+    coverage = '--coverage' in args
+    batch = '--batch' in args
+    # --jobs=N and --timeout=SECONDS go with --batch
+    settings = dict(arg[2:].split('=', 1) for arg in args if arg.startswith(('--jobs=', '--timeout=')))
+    try:
+      jobs = int(settings['jobs']) if 'jobs' in settings else None
+      timeout = float(settings['timeout']) if 'timeout' in settings else None
+      valid = (jobs is None or jobs > 0) and (timeout is None or 0 < timeout < float('inf'))
+    except ValueError:
+      valid = False  # falls through to the usage line below
+    if '--no-memo' in args:
+      SardineLang.interpreter.memoize = SardineLang.interpreter.loader.memoize = False
+    if '--no-inline' in args:
+      SardineLang.inline = False
+    args = [arg for arg in args if arg not in ('-O', '--stream', '--profile', '--coverage', '--no-memo', '--no-inline', '--batch')]
+    args = [arg for arg in args if not arg.startswith(('--jobs=', '--timeout='))]
+    if batch and args and valid and not (stream or profile or coverage):
+      results = SardineLang.batch(args, jobs, timeout, optimize)
+      sys.exit(0 if all(result.status == OK for result in results) else 1)
+    elif batch or settings or not valid or len(args) > 1 or (stream and (optimize or not args)) or ((profile or coverage) and not args) or (coverage and (stream or profile)):
+      print("Usage: python sardine.py [-O [--no-inline] | --stream] [--profile | --coverage] [--no-memo] [script]", file=sys.stderr)
+      print("       python sardine.py --batch [--jobs=N] [--timeout=SECONDS] [-O [--no-inline]] [--no-memo] script|glob...", file=sys.stderr)
+    elif coverage:
+      SardineLang.coverage_file(args[0], optimize)
+    elif profile:
+      SardineLang.profile_file(args[0], optimize, stream)
+    elif stream:
+      SardineLang.stream_file(args[0])
     elif len(args) == 1:
-      SardineLang.run_file(args[0])
+      SardineLang.run_file(args[0], optimize)
     else:
       SardineLang.run_repl()
 
-  def run_file(path):
+  def run_file(path, optimize=False):
+    # the parsed (and optimized) program comes from the __sdcache__ when the source is unchanged
+    build = lambda source: SardineLang.compile_source(source, optimize)
+    statements, report = cache.load(path, SardineLang.cache_kind(optimize), build)
+    if report:
+      print(report, file=sys.stderr)
+    # imports look next to the script first
+    SardineLang.interpreter.directory = os.path.dirname(os.path.abspath(path))
+    try:
+      SardineLang.interpreter.interpret(statements)
+    except SardineImportError as e:
+      error(e)
+
+  def batch(patterns, workers=None, timeout=None, optimize=False):
+    # runs every script patterns name, as paths or globs, across a pool of worker processes
+    # (see batch.py), then prints each script's output in order and a summary to stderr.
+    # returns their Results
+    workers = workers or os.cpu_count() or 1
+    interpreter = SardineLang.interpreter
+    start = time.perf_counter()
+    results = run_scripts(patterns, workers, timeout, interpreter.backend, optimize, SardineLang.inline, interpreter.memoize)
+    wall = time.perf_counter() - start
+    for result in results:
+      print("==> " + result.path + " <==")
+      print(result.output, end='')
+    print(summarize(results, wall, min(workers, len(results))), file=sys.stderr)
+    return results
+
+  def stream_file(path):
+    # runs each top-level declaration as soon as it is parsed, reading the script as it
+    # goes, so neither the source nor its tokens nor its AST are ever held whole
+    SardineLang.interpreter.directory = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r') as f:
+      tokens = Tokenizer('').stream(itertools.chain(f, ['\n']))
+      try:
+        SardineLang.interpreter.interpret_stream(Parser(tokens).declarations())
+      except SardineImportError as e:
+        error(e)
+
+  def profile_file(path, optimize=False, stream=False):
+    # runs the script with the tree backend under the profiler, prints its report to stderr
+    # and writes the collapsed call stacks, for flamegraph tools, next to the script
+    interpreter = SardineLang.interpreter
+    if interpreter.backend != 'tree':
+      SardineLang.interpreter = Interpreter('tree', interpreter.loader, memoize=interpreter.memoize)
+    profiler = Profiler(script=os.path.basename(path))
+    reset_specialization_counts()
+    try:
+      with profiler:
+        if stream:
+          SardineLang.stream_file(path)
+        else:
+          SardineLang.run_file(path, optimize)
+    finally:
+      SardineLang.interpreter = interpreter
+    print(profiler.report(), file=sys.stderr)
+    for kind, counts in interpreter.specialization_stats().items():
+      common = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:5]
+      print("\n%s %d nodes" % (kind, sum(counts.values())) + "".join("\n  %-24s%6d" % item for item in common), file=sys.stderr)
+    folded = os.path.splitext(path)[0] + '.folded'
+    profiler.write_collapsed(folded)
+    print("collapsed stacks written to " + folded, file=sys.stderr)
+
+  def coverage_file(path, optimize=False):
+    # runs the script with the tree backend and prints it to stderr, marked by what ran
+    build = lambda source: SardineLang.compile_source(source, optimize)
+    statements, report = cache.load(path, SardineLang.cache_kind(optimize), build)
+    if report:
+      print(report, file=sys.stderr)
+    interpreter = Interpreter('tree', SardineLang.interpreter.loader, os.path.dirname(os.path.abspath(path)), SardineLang.interpreter.memoize)
+    coverage = Coverage()
+    coverage.add(statements)
+    interpreter.add_hook(coverage)
+    try:
+      interpreter.interpret(statements)
+    except SardineImportError as e:
+      error(e)
+    with open(path, 'r') as f:
+      print(coverage.report(f.read()), file=sys.stderr)
+
+  def cache_kind(optimize):
+    if not optimize:
+      return 'ast'
+    return 'opt' if SardineLang.inline else 'opt-noinline'
+
+  def compile_source(source, optimize=False):
+    # returns ((statements, optimizer report or None), other files the result depends on)
+    parser = Parser(Tokenizer(source + '\n').buffer())
+    statements = parser.parse()
+    report = None
+    if optimize:
+      optimizer = Optimizer(SardineLang.inline)
+      statements = optimizer.optimize(statements)
+      report = optimizer.report()
+    return (statements, report), []
+
+  def disassemble_file(path):
+    # prints the bytecode the vm backend would run for the script at path
+    with open(path, 'r') as f:
+      parser = Parser(Tokenizer(f.read() + '\n').buffer())
+    statements = Interpreter('vm', directory=os.path.dirname(os.path.abspath(path))).resolver.resolve(parser.parse())
+    print(disassemble(BytecodeCompiler().compile(statements)))
+
+  def transpile_file(path):
+    # lowers the script at path to a python module; .source holds the code, .compile() builds it
     with open(path, 'r') as f:
-      source = f.read() + '\n'
-      tokenizer = Tokenizer(source)
-      tokens = tokenizer.tokenize()
-      parser = Parser(tokens)
-      SardineLang.interpreter.interpret(parser.parse())
+      parser = Parser(Tokenizer(f.read() + '\n').buffer())
+    # resolved first, so its imports are loaded for the python backend
+    statements = Interpreter('python', directory=os.path.dirname(os.path.abspath(path))).resolver.resolve(parser.parse())
+    return Transpiler().transpile(statements, '<sardine ' + path + '>')
 
   def run_repl():
+    # each line is interpreted on its own, so no line can tell whether a function is pure
+    SardineLang.interpreter.memoize = False
     while True:
       try:
         tokenizer = Tokenizer(input("> ") + '\n')
-        parser = Parser(tokenizer.tokenize())
+        parser = Parser(tokenizer.buffer())
         SardineLang.interpreter.interpret(parser.parse())
+      except SardineImportError as e:
+        error(e)
       except (EOFError, KeyboardInterrupt):
         print("")
         sys.exit(0)
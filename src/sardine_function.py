@@ -1,20 +1,122 @@
+from collections import OrderedDict
 from .environment import Environment
-from .errors import ReturnInterrupt
+
+MEMO_SIZE = 1024  # results kept per memoized function
+RETIRE_AFTER = 256  # misses before a cache that rarely hits is dropped
+
+
+class TailCall:
+  # a call in tail position, returned to the caller's call loop instead of being nested in it
+  __slots__ = ('function', 'arguments')
+
+  def __init__(self, function, arguments):
+    self.function = function
+    self.arguments = arguments
+
+
+class Memo:
+  # bounded LRU cache of a pure function's results, keyed on its arguments. their types
+  # are part of the key, since True == 1.0 for python but not for the result. a function
+  # that is rarely called twice with the same arguments only pays for the cache, so once
+  # it has missed RETIRE_AFTER times with fewer than one hit in five lookups the cache is
+  # dropped and its calls run as if it was never memoized.
+  def __init__(self, size=MEMO_SIZE):
+    self.size = size
+    self.entries = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.retired = False
+
+  def lookup(self, key):
+    # (value,) if key was cached, None otherwise. raises TypeError for unhashable keys
+    entries = self.entries
+    if key in entries:
+      entries.move_to_end(key)
+      self.hits += 1
+      return (entries[key],)
+    self.misses += 1
+    if self.misses >= RETIRE_AFTER and self.hits * 4 < self.misses:
+      self.retired = True
+      self.entries = OrderedDict()
+    return None
+
+  def store(self, key, value):
+    if self.retired:
+      return
+    entries = self.entries
+    entries[key] = value
+    if len(entries) > self.size:
+      entries.popitem(last=False)
+      self.evictions += 1
+
+  def stats(self):
+    return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self.entries),
+      'retired': self.retired}
 
 
 class SardineFunction:
-  def __init__(self, definition):
+  def __init__(self, definition, closure):
     self.definition = definition
+    self.closure = closure
+    self.memo = Memo() if definition.memoize else None
 
   def arity(self):
     return len(self.definition.parameters)
 
-  def __call__(self, env, arguments):
-    local_env = Environment(env)
+  def __call__(self, arguments):
+    function = self
+    pending = None  # (memo, key) of the calls in a tail call chain still waiting for its value
+    while True:
+      if function.memo is not None:
+        pending = remember(function.memo, arguments, pending)
+        if type(pending) is tuple:
+          return pending[0]
+      result = function.run(arguments)
+      if type(result) is TailCall:
+        function, arguments = result.function, result.arguments
+        continue
+      if pending:
+        settle(pending, result[0])
+      return result[0]
+
+  def run(self, arguments):
+    # runs the body once, in a frame of its own: (value,), or the TailCall it ended in.
+    # the profiler and traced functions wrap this, so they see every call of a tail call chain
+    # parameters occupy the first slots of the call frame
+    local_env = Environment(self.closure, self.definition.slot_count)
+    values = local_env.values
     for i, argument in enumerate(arguments):
-      local_env.define(self.definition.parameters[i].raw_token, argument)
-    try:
-      self.definition.body.evaluate(local_env)
-    except ReturnInterrupt as r:
-      return r.value
-    return None
\ No newline at end of file
+      values[i] = argument
+    for stmt in self.definition.body.statements:
+      result = stmt.evaluate(local_env)
+      if result is not None:
+        return result
+    return (None,)
+
+
+def remember(memo, arguments, pending):
+  # a one-tuple holding the cached result of the call, if there is one. otherwise pending,
+  # with the call added if it can be cached
+  if memo.retired:
+    return pending
+  key = tuple(arguments) + tuple(map(type, arguments))
+  try:
+    found = memo.lookup(key)
+  except TypeError:
+    return pending  # an unhashable argument
+  if found is not None:
+    if pending:
+      settle(pending, found[0])
+    return found
+  if pending is None:
+    pending = []
+  pending.append((memo, key))
+  return pending
+
+
+def settle(pending, value):
+  # every call of a tail call chain returns the value the last one did. the first call,
+  # the one made by name, is stored last so it is the last to be evicted
+  for memo, key in reversed(pending):
+    memo.store(key, value)
@@ -0,0 +1,49 @@
+import math
+import time
+from .native import NativeFunction, VARIADIC
+from .token import number_value
+
+# the builtin module: native functions every interpreter installs as globals before a
+# program runs. a program's own definitions, and names it imports, take their place.
+
+
+def _str(value):
+  # as print shows it
+  return "None" if value is None else str(value)
+
+
+def _concat(*values):
+  return "".join(_str(value) for value in values)
+
+
+_BUILTINS = {
+  # math
+  'abs': (abs, 1),
+  'pow': (pow, 2),
+  'sqrt': (math.sqrt, 1),
+  'floor': (math.floor, 1),
+  'ceil': (math.ceil, 1),
+  'round': (round, 1),
+  'exp': (math.exp, 1),
+  'log': (math.log, 1),
+  'sin': (math.sin, 1),
+  'cos': (math.cos, 1),
+  'tan': (math.tan, 1),
+  'atan': (math.atan, 1),
+  # strings
+  'len': (len, 1),
+  'str': (_str, 1),
+  'num': (lambda text: number_value(text.strip()), 1),
+  'upper': (lambda text: text.upper(), 1),
+  'lower': (lambda text: text.lower(), 1),
+  'substring': (lambda text, start, stop: text[int(start):int(stop)], 3),
+  'find': (lambda text, part: text.find(part), 2),
+  'replace': (lambda text, old, new: text.replace(old, new), 3),
+  'concat': (_concat, VARIADIC),
+  # timing
+  'clock': (time.perf_counter, 0),
+}
+
+
+def natives():
+  return [NativeFunction(name, function, arity) for name, (function, arity) in _BUILTINS.items()]
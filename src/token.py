@@ -1,9 +1,13 @@
+from array import array
+from bisect import bisect_left
 from enum import Enum, auto
 
 class TokenType(Enum):
   # single character tokens
   LEFT_PAREN = auto()
   RIGHT_PAREN = auto()
+  LEFT_BRACKET = auto()
+  RIGHT_BRACKET = auto()
   DOT = auto()
   COMMA = auto() 
   STAR = auto()
@@ -38,6 +42,8 @@ class TokenType(Enum):
   NEWLINE = auto()
   IF = auto()
   ELSE = auto()
+  IN = auto()
+  IMPORT = auto()
 
   # literals
   IDENTIFIER = auto()
@@ -55,4 +61,58 @@ class Token:
     self.line = line
 
   def __str__(self):
-    return "<" + str(self.type) + ", " + "'" + self.raw_token + "'" + ">"
\ No newline at end of file
+    return "<" + str(self.type) + ", " + "'" + self.raw_token + "'" + ">"
+
+
+def number_value(raw_token: str):
+  # a literal with a decimal point is a float, any other an exact integer
+  return float(raw_token) if '.' in raw_token else int(raw_token)
+
+
+TYPES = list(TokenType)  # the token type of each type code
+CODES = {token_type: code for code, token_type in enumerate(TYPES)}
+
+
+class TokenBuffer:
+  # a token list stored column-wise against its source: per token a one byte type code
+  # and the start and end offsets of its lexeme, plus the offset of every line break
+  # for line numbers. values are read back from the lexeme, and Token objects are only
+  # made for the tokens that are looked at.
+  def __init__(self, source: str):
+    self.source = source
+    self.types = array('B')
+    self.starts = array('I')
+    self.ends = array('I')
+    self.breaks = array('I')  # offsets of the line breaks in source, in order
+
+  def __len__(self):
+    return len(self.types)
+
+  def __getitem__(self, index):
+    if index < 0:
+      index += len(self.types)
+    token_type = TYPES[self.types[index]]
+    end = self.ends[index]
+    raw_token = self.source[self.starts[index]:end]
+    return Token(token_type, raw_token, self._value(token_type, raw_token), self.line(index))
+
+  def __iter__(self):
+    for index in range(len(self.types)):
+      yield self[index]
+
+  def line(self, index):
+    # the line a token ends on, counting the line break of a NEWLINE token itself
+    return bisect_left(self.breaks, self.ends[index]) + 1
+
+  def nbytes(self):
+    # memory held by the columns, not counting the source
+    return sum(column.itemsize * len(column) for column in (self.types, self.starts, self.ends, self.breaks))
+
+  def _value(self, token_type, raw_token):
+    if token_type == TokenType.NUMBER:
+      return number_value(raw_token)
+    if token_type == TokenType.STRING:
+      return raw_token[1:-1]
+    if token_type == TokenType.IDENTIFIER or raw_token.isalpha():
+      return raw_token
+    return None
@@ -1,57 +1,226 @@
+import re
+from bisect import bisect_left
 from .token import *
 from .errors import SardineSyntaxError, error
 
+# symbol tables
+KEYWORDS = {
+  'and': TokenType.AND,
+  'or': TokenType.OR,
+  'not': TokenType.NOT,
+  'do': TokenType.DO,
+  'end': TokenType.END,
+  'None': TokenType.NONE,
+  'True': TokenType.TRUE,
+  'False': TokenType.FALSE,
+  'while': TokenType.WHILE,
+  'for': TokenType.FOR,
+  'return': TokenType.RETURN,
+  'print': TokenType.PRINT,
+  'def': TokenType.DEF,
+  'dec': TokenType.DEC,
+  'if': TokenType.IF,
+  'else': TokenType.ELSE,
+  'in': TokenType.IN,
+  'import': TokenType.IMPORT,
+}
+
+# a line break after one of these ends a statement
+NEWLINE_TRIGGERS = frozenset([
+  TokenType.IDENTIFIER,
+  TokenType.STRING,
+  TokenType.NUMBER,
+  TokenType.TRUE,
+  TokenType.FALSE,
+  TokenType.RETURN,
+  TokenType.RIGHT_PAREN,
+  TokenType.RIGHT_BRACKET,
+])
+
+OPERATORS = {
+  '(': TokenType.LEFT_PAREN,
+  ')': TokenType.RIGHT_PAREN,
+  '[': TokenType.LEFT_BRACKET,
+  ']': TokenType.RIGHT_BRACKET,
+  ',': TokenType.COMMA,
+  '.': TokenType.DOT,
+  '-': TokenType.MINUS,
+  '+': TokenType.PLUS,
+  '*': TokenType.STAR,
+  '/': TokenType.SLASH,
+  '=': TokenType.EQUAL,
+  '==': TokenType.EQUAL_EQUAL,
+  '<': TokenType.LESS,
+  '<=': TokenType.LESS_EQUAL,
+  '>': TokenType.GREATER,
+  '>=': TokenType.GREATER_EQUAL,
+  '!=': TokenType.BANG_EQUAL,
+}
+
+# blanks, then one alternative per lexical class, tried in order. a number stops before a
+# dot that starts a range (1..10). a string never closed runs to the end of the source and
+# is one error, as in scan mode. any other character is an error, and blanks at the end of
+# the source match nothing.
+_LEXEME = re.compile(r'''[ \t\r]*(?:
+   (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  |(?P<operator>==|<=|>=|!=|[-()\[\]+*/,.=<>])
+  |(?P<number>[0-9]+(?:\.(?!\.)[0-9]*)?)
+  |(?P<newline>\n)
+  |(?P<string>"[^"]*")
+  |(?P<unterminated>"[^"]*\Z)
+  |(?P<comment>\#[^\n]*)
+  |(?P<error>[^ \t\r])
+)''', re.VERBOSE)
+
+_KEYWORD_CODES = {text: CODES[token_type] for text, token_type in KEYWORDS.items()}
+_OPERATOR_CODES = {text: CODES[token_type] for text, token_type in OPERATORS.items()}
+_TRIGGER_CODES = frozenset(CODES[token_type] for token_type in NEWLINE_TRIGGERS)
+
+MODES = ('regex', 'scan')
+
+
 class Tokenizer:
-  def __init__(self, source):
+  # mode 'regex' matches whole lexemes with one precompiled pattern, mode 'scan' walks
+  # the source a character at a time. both produce the same tokens.
+  def __init__(self, source, mode='regex'):
+    if mode not in MODES:
+      raise ValueError("Unknown tokenizer mode '" + mode + "', expected one of: " + ", ".join(MODES))
     self.source = source
+    self.mode = mode
     self.line = 1
     self.start = 0
     self.current = 0
     self.source_length = len(source)
     self.tokens = []
-    self.import_flag = False
-
-    # symbol tables
-    self.keywords = {
-      'and': TokenType.AND,
-      'or': TokenType.OR,
-      'not': TokenType.NOT,
-      'do': TokenType.DO,
-      'end': TokenType.END,
-      'None': TokenType.NONE,
-      'True': TokenType.TRUE,
-      'False': TokenType.FALSE,
-      'while': TokenType.WHILE,
-      'for': TokenType.FOR,
-      'return': TokenType.RETURN,
-      'print': TokenType.PRINT,
-      'def': TokenType.DEF,
-      'dec': TokenType.DEC,
-      'if': TokenType.IF,
-      'else': TokenType.ELSE,
-    }
-
-    self.newline_triggers = set([
-      TokenType.IDENTIFIER,
-      TokenType.STRING,
-      TokenType.NUMBER,
-      TokenType.TRUE,
-      TokenType.FALSE,
-      TokenType.RETURN,
-      TokenType.RIGHT_PAREN,
-    ])
+    self.keywords = KEYWORDS
+    self.newline_triggers = NEWLINE_TRIGGERS
+    self.last_type = None  # type of the last token produced, for NEWLINE insertion
 
   def tokenize(self):
+    if self.mode == 'regex':
+      self.tokens.extend(self._lex(self.source, self.source_length, True))
+      self.start = self.current = self.source_length
+      return self.tokens
     while not self._at_end():
       self.start = self.current
       self._scan_token()
     return self.tokens
 
+  def buffer(self):
+    # the tokens of the whole source as a compact TokenBuffer, with no Token objects made
+    buffer = TokenBuffer(self.source)
+    types, starts, ends, breaks = buffer.types, buffer.starts, buffer.ends, buffer.breaks
+    keywords, operators, triggers = _KEYWORD_CODES, _OPERATOR_CODES, _TRIGGER_CODES
+    identifier, number, string, newline = (CODES[TokenType.IDENTIFIER], CODES[TokenType.NUMBER],
+      CODES[TokenType.STRING], CODES[TokenType.NEWLINE])
+    last = None
+    for match in _LEXEME.finditer(self.source):
+      kind = match.lastgroup
+      if kind == 'name':
+        last = keywords.get(match.group(kind), identifier)
+      elif kind == 'operator':
+        last = operators[match.group(kind)]
+      elif kind == 'number':
+        last = number
+      elif kind == 'newline':
+        breaks.append(match.start(kind))
+        if last not in triggers:
+          continue
+        last = newline
+      elif kind == 'string' or kind == 'unterminated':
+        start, end = match.span(kind)
+        position = self.source.find('\n', start, end)
+        while position != -1:
+          breaks.append(position)
+          position = self.source.find('\n', position + 1, end)
+        if kind == 'unterminated':
+          self.start, self.current, self.line = start, end, len(breaks) + 1
+          error(SardineSyntaxError('SyntaxError', self.line, '"'))
+          continue
+        last = string
+      elif kind == 'comment':
+        continue
+      else:
+        self.start, self.current = match.span(kind)
+        self.line = bisect_left(breaks, self.start) + 1
+        error(SardineSyntaxError('SyntaxError', self.line, match.group(kind)))
+        continue
+      types.append(last)
+      start, end = match.span(kind)
+      starts.append(start)
+      ends.append(end)
+    self.start = self.current = self.source_length
+    self.line = len(breaks) + 1
+    return buffer
+
+  def stream(self, chunks=None):
+    # yields tokens one at a time without building a list. chunks is an iterable of source
+    # text, such as an open file, read only as far as the tokens consumed so far need;
+    # by default it is the tokenizer's own source. streams always match lexemes by pattern.
+    if chunks is None:
+      yield from self._lex(self.source, self.source_length, True)
+      return
+    pending = ''
+    for chunk in chunks:
+      pending += chunk
+      end = pending.rfind('\n') + 1
+      if end:
+        # only complete lines are matched, as no lexeme but a string spans a line break
+        pending = pending[(yield from self._lex(pending, end, False)):]
+    yield from self._lex(pending, len(pending), True)
+
+  def _lex(self, text, end, final):
+    # yields the tokens of text[:end] and returns the position it stopped at. unless final,
+    # it stops before a string that is not closed yet, to be matched again with more text.
+    keywords = self.keywords
+    triggers = self.newline_triggers
+    identifier, number, string, newline = TokenType.IDENTIFIER, TokenType.NUMBER, TokenType.STRING, TokenType.NEWLINE
+    line, last = self.line, self.last_type
+    for match in _LEXEME.finditer(text, 0, end):
+      kind = match.lastgroup
+      if kind == 'name':
+        value = match.group(kind)
+        last = keywords.get(value, identifier)
+        yield Token(last, value, value, line)
+      elif kind == 'operator':
+        value = match.group(kind)
+        last = OPERATORS[value]
+        yield Token(last, value, None, line)
+      elif kind == 'number':
+        value = match.group(kind)
+        last = number
+        yield Token(number, value, number_value(value), line)
+      elif kind == 'newline':
+        line += 1
+        if last in triggers:
+          last = newline
+          yield Token(newline, '\n', None, line)
+      elif kind == 'string':
+        value = match.group(kind)
+        line += value.count('\n')
+        last = string
+        yield Token(string, value, value[1:-1], line)
+      elif kind == 'unterminated':
+        if not final:
+          self.line, self.last_type = line, last
+          return match.start(kind)
+        line += match.group(kind).count('\n')
+        self.start, self.current, self.line = match.start(kind), match.end(kind), line
+        error(SardineSyntaxError('SyntaxError', self.line, '"'))
+      elif kind == 'error':
+        self.start, self.current, self.line = match.start(kind), match.end(kind), line
+        error(SardineSyntaxError('SyntaxError', self.line, match.group(kind)))
+    self.line, self.last_type = line, last
+    return end
+
   def _scan_token(self):
     c = self._consume_current()
     if c == '(': self._add_token(TokenType.LEFT_PAREN)
     elif c == ')': self._add_token(TokenType.RIGHT_PAREN)
+    elif c == '[': self._add_token(TokenType.LEFT_BRACKET)
+    elif c == ']': self._add_token(TokenType.RIGHT_BRACKET)
     elif c == ',': self._add_token(TokenType.COMMA)
+    elif c == '.': self._add_token(TokenType.DOT)
     elif c == '-': self._add_token(TokenType.MINUS)
     elif c == '+': self._add_token(TokenType.PLUS)
     elif c == '*': self._add_token(TokenType.STAR)
@@ -63,7 +232,7 @@ class Tokenizer:
       if self._match_and_consume('='):
         self._add_token(TokenType.BANG_EQUAL)
       else:
-        SardineLang.error(SardineSyntaxError('SyntaxError', self.line, self.source[self.current])) 
+        error(SardineSyntaxError('SyntaxError', self.line, self.source[self.start])) 
     elif c == '#':
       while self._peek() != '\n' and not self._at_end(): self._consume_current()
     elif c in [' ', '\r', '\t']:
@@ -80,25 +249,15 @@ class Tokenizer:
       elif self._isalpha(c):
         self._consume_identifier()
       else:
-        SardineLang.error(SardineSyntaxError('SyntaxError', self.line, self.source[self.current])) 
+        error(SardineSyntaxError('SyntaxError', self.line, self.source[self.start])) 
 
 
   def _consume_identifier(self):
     while self._isalphanumeric(self._peek()): self._consume_current()
 
     text = self.source[self.start:self.current]
-
-    if text == "import":
-      self.import_flag = True
-    elif self.import_flag:
-      with open(text + '.sd', 'r') as f:
-        tokenizer = Tokenizer(f.read() + '\n')
-        tokens = tokenizer.tokenize()
-        self.tokens += tokens
-        self.import_flag = False
-    else:
-      token_type = self.keywords.get(text, TokenType.IDENTIFIER)
-      self._add_token(token_type, text)
+    token_type = self.keywords.get(text, TokenType.IDENTIFIER)
+    self._add_token(token_type, text)
 
   def _isalphanumeric(self, c):
     return self._isalpha(c) or self._isdigit(c)
@@ -108,10 +267,12 @@ class Tokenizer:
 
   def _consume_number(self):
     while self._isdigit(self._peek()): self._consume_current()
-    if self._match_and_consume('.'):
+    # a second dot makes it the start of a range (1..10), not a decimal point
+    if self._peek() == '.' and self._peek_next() != '.':
+      self._consume_current()
       while self._isdigit(self._peek()): self._consume_current()
     
-    value = float(self.source[self.start:self.current])
+    value = number_value(self.source[self.start:self.current])
     self._add_token(TokenType.NUMBER, value)
 
   def _isdigit(self, c):
@@ -123,8 +284,9 @@ class Tokenizer:
       self._consume_current()
     
     if self._at_end():
-      SardineLang.error(SardineSyntaxError('SyntaxError', self.line, self.source[self.current])) 
-    
+      error(SardineSyntaxError('SyntaxError', self.line, self.source[self.start]))
+      return
+
     self._consume_current()
     raw_string = self.source[self.start+1:self.current-1]
     self._add_token(TokenType.STRING, raw_string)
@@ -134,6 +296,11 @@ class Tokenizer:
     if self._at_end(): return '\0'
     return self.source[self.current]
 
+  def _peek_next(self):
+    # returns the character after the current one without advancing current pointer
+    if self.current + 1 >= self.source_length: return '\0'
+    return self.source[self.current + 1]
+
   def _match_and_consume(self, char):
     # returns True if current character equals char, and increments current pointer, else returns False
     if self._at_end():
@@ -0,0 +1,413 @@
+import keyword
+import re
+import traceback
+from .nodes import *
+
+_BINARY_OPS = {
+  TokenType.PLUS: '+',
+  TokenType.MINUS: '-',
+  TokenType.STAR: '*',
+  TokenType.SLASH: '/',
+  TokenType.GREATER: '>',
+  TokenType.GREATER_EQUAL: '>=',
+  TokenType.LESS: '<',
+  TokenType.LESS_EQUAL: '<=',
+  TokenType.EQUAL_EQUAL: '==',
+  TokenType.BANG_EQUAL: '!=',
+}
+
+_HEADER = [
+  "import sys as _sd_sys",
+  "import builtins as _sd_builtins",
+  "_sd_str = _sd_builtins.str",
+  "_sd_int = _sd_builtins.int",
+  "def _sd_divide(left, right):",
+  "  if _sd_builtins.type(left) is _sd_int and _sd_builtins.type(right) is _sd_int and right and not left % right:",
+  "    return left // right",
+  "  return left / right",
+]
+
+_LOCAL_SUFFIX = re.compile(r'_\d+$')
+
+
+def _is_float(node):
+  return isinstance(node, Literal) and type(node.value) is float
+
+
+def global_name(name: str):
+  # python name of a sardine global: its own where python allows it
+  safe = not (keyword.iskeyword(name) or name.startswith('_sd_') or _LOCAL_SUFFIX.search(name))
+  return name if safe else '_sd_g_' + name
+
+
+class ProgramReturn(Exception):
+  # raised by a top-level return, which python does not allow at module level
+  pass
+
+
+class TranspiledModule:
+  # python source for a sardine program, with the sardine line of every python line
+  def __init__(self, source: str, line_map, filename: str, imports=()):
+    self.source = source
+    self.line_map = line_map  # index i holds the sardine line of python line i + 1, or None
+    self.filename = filename
+    self.imports = list(imports)  # Import nodes, which the code reaches as _sd_imports[i]
+    self.returned = False  # whether the last run ended with a top-level return
+
+  def compile(self):
+    return compile(self.source, self.filename, 'exec')
+
+  def run(self, namespace=None, code=None):
+    namespace = namespace if namespace is not None else {'__name__': '__sardine__'}
+    namespace['_sd_imports'] = self.imports
+    namespace['_sd_ProgramReturn'] = ProgramReturn
+    self.returned = False
+    try:
+      exec(code or self.compile(), namespace)
+    except ProgramReturn:
+      self.returned = True
+    except Exception as e:
+      # point the traceback back at the sardine source
+      if hasattr(e, 'add_note'):
+        for name, line in self.sardine_frames(e.__traceback__):
+          e.add_note('  sardine line ' + str(line) + ', in ' + name)
+      raise
+    return namespace
+
+  def sardine_line(self, python_line: int):
+    if 0 < python_line <= len(self.line_map):
+      return self.line_map[python_line - 1]
+    return None
+
+  def sardine_frames(self, tb):
+    # (function, sardine line) for every traceback entry that ran generated code
+    frames = []
+    for frame in traceback.extract_tb(tb):
+      if frame.filename == self.filename:
+        line = self.sardine_line(frame.lineno)
+        if line is not None:
+          frames.append((frame.name, line))
+    return frames
+
+
+class _Scope:
+  def __init__(self, function_level: int):
+    self.function_level = function_level
+    self.names = dict()  # sardine name -> python name
+
+
+class Transpiler:
+  # lowers a sardine program to an equivalent python module.
+  # globals keep their names where python allows it. every local declaration gets a
+  # unique name, so block scoping and shadowing survive python's function-level scopes.
+  def __init__(self):
+    self.lines = []
+    self.line_map = []
+    self.line = None
+    self.indent = 0
+    self.scopes = []
+    self.function_level = 0
+    self.declarations = []  # per open function: {python name: 'global' | 'nonlocal'}
+    self.globals = dict()  # sardine name -> python name
+    self.local_count = 0
+    self.loops = []  # per open function: (sardine name, python name, parameters) if it loops on self tail calls
+    self.bodies = 0  # loop bodies running as functions of their own inside the innermost function
+    self.assigned = set()
+    self.imports = []
+    self.arrays = False  # whether the module needs numpy
+
+  def transpile(self, statements, filename='<sardine>'):
+    stack = list(statements)
+    while stack:
+      node = stack.pop()
+      if isinstance(node, VarAssign):
+        self.assigned.add(node.name.raw_token)
+      stack.extend(children(node))
+    for stmt in statements:
+      self._transpile(stmt)
+    body_lines, body_map = self.lines, self.line_map
+    self.lines, self.line_map, self.line = [], [], None
+    for line in _HEADER:
+      self._write(line)
+    if self.arrays:
+      self._write("import numpy as _sd_numpy")
+    # sardine reads of unset globals yield None rather than failing
+    if self.globals:
+      names = ", ".join(repr(name) for name in self.globals.values())
+      self._write("for _sd_name in (" + names + ",):")
+      self._write("  _sd_builtins.globals().setdefault(_sd_name, None)")
+    source = "\n".join(self.lines + body_lines) + "\n"
+    return TranspiledModule(source, self.line_map + body_map, filename, self.imports)
+
+  def _transpile(self, node):
+    self.line = line_of(node) or self.line
+    getattr(self, '_transpile_' + type(node).__name__)(node)
+
+  def _expr(self, node):
+    return getattr(self, '_expr_' + type(node).__name__)(node)
+
+  def _write(self, text):
+    self.lines.append("  " * self.indent + text)
+    self.line_map.append(self.line)
+
+  def _at(self, token):
+    self.line = token.line
+
+  # names
+  def _global_name(self, name: str):
+    if name not in self.globals:
+      self.globals[name] = global_name(name)
+    return self.globals[name]
+
+  def _declare(self, name: str):
+    if not self.scopes:
+      return self._global_name(name)
+    scope = self.scopes[-1]
+    if name not in scope.names:
+      self.local_count += 1
+      prefix = '_sd_l_' if name.startswith('_sd_') else ''
+      scope.names[name] = prefix + name + '_' + str(self.local_count)
+    return scope.names[name]
+
+  def _lookup(self, name: str):
+    # python name and the function level that owns it (0 is the module)
+    for scope in reversed(self.scopes):
+      if name in scope.names:
+        return scope.names[name], scope.function_level
+    return self._global_name(name), 0
+
+  def _assign_target(self, name: str):
+    python_name, level = self._lookup(name)
+    if level != self.function_level:
+      self.declarations[-1][python_name] = 'global' if level == 0 else 'nonlocal'
+    return python_name
+
+  def _block(self, statements):
+    self.indent += 1
+    start = len(self.lines)
+    for stmt in statements:
+      self._transpile(stmt)
+    if len(self.lines) == start:
+      self._write("pass")
+    self.indent -= 1
+
+  # expressions
+  def _expr_Binary(self, node):
+    if node.operator.type == TokenType.SLASH and not _is_float(node.left) and not _is_float(node.right):
+      # sardine's '/' keeps integer quotients exact, see nodes.divide
+      return "_sd_divide(" + self._expr(node.left) + ", " + self._expr(node.right) + ")"
+    return "(" + self._expr(node.left) + " " + _BINARY_OPS[node.operator.type] + " " + self._expr(node.right) + ")"
+
+  def _expr_Logical(self, node):
+    operator = " or " if node.operator.type == TokenType.OR else " and "
+    return "(" + self._expr(node.left) + operator + self._expr(node.right) + ")"
+
+  def _expr_Unary(self, node):
+    if node.operator.type == TokenType.NOT:
+      return "(not " + self._expr(node.right) + ")"
+    return "(-" + self._expr(node.right) + ")"
+
+  def _expr_Array(self, node):
+    self.arrays = True
+    return "_sd_numpy.array([" + ", ".join(self._expr(element) for element in node.elements) + "])"
+
+  def _expr_Literal(self, node):
+    return repr(node.value)
+
+  def _expr_Grouping(self, node):
+    return self._expr(node.expr)
+
+  def _expr_Variable(self, node):
+    return self._lookup(node.name.raw_token)[0]
+
+  def _expr_VarAssign(self, node):
+    value = self._expr(node.value)
+    return "(" + self._assign_target(node.name.raw_token) + " := " + value + ")"
+
+  def _expr_FunctionCall(self, node):
+    arguments = ", ".join(self._expr(arg) for arg in node.arguments)
+    return self._expr(node.callee) + "(" + arguments + ")"
+
+  # statements
+  def _transpile_VarDec(self, node):
+    self._at(node.name)
+    value = self._expr(node.initializer) if node.initializer != None else "None"
+    self._write(self._declare(node.name.raw_token) + " = " + value)
+
+  def _transpile_Print(self, node):
+    self._write("_sd_sys.stdout.write(_sd_str(" + self._expr(node.expr) + ") + '\\n')")
+
+  def _transpile_Expression(self, node):
+    if isinstance(node.expr, VarAssign):
+      self._at(node.expr.name)
+      value = self._expr(node.expr.value)
+      self._write(self._assign_target(node.expr.name.raw_token) + " = " + value)
+    else:
+      self._write(self._expr(node.expr))
+
+  def _transpile_Block(self, node):
+    self.scopes.append(_Scope(self.function_level))
+    for stmt in node.statements:
+      self._transpile(stmt)
+    self.scopes.pop()
+
+  def _transpile_If(self, node):
+    self._write("if " + self._expr(node.condition) + ":")
+    self._block([node.then_branch])
+    if node.else_branch:
+      self._write("else:")
+      self._block([node.else_branch])
+
+  def _transpile_While(self, node):
+    self._write("while " + self._expr(node.condition) + ":")
+    self._loop_body(node.body)
+
+  def _transpile_ForRange(self, node):
+    # the counter and bound live in hidden names, so the body may reassign the loop variable
+    self.local_count += 1
+    counter, stop = '_sd_i' + str(self.local_count), '_sd_e' + str(self.local_count)
+    self._write(counter + " = " + self._expr(node.start))
+    self._write(stop + " = " + self._expr(node.end))
+    self._write("while " + counter + " <= " + stop + ":")
+    if self._defines_functions(node.body):
+      # the loop variable is a parameter of the body's function, so closures see their own
+      self._loop_body(node.body, node.name, counter)
+      self.indent += 1
+      self._write(counter + " += 1")
+      self.indent -= 1
+      return
+    self.scopes.append(_Scope(self.function_level))
+    self.indent += 1
+    self._at(node.name)
+    self._write(self._declare(node.name.raw_token) + " = " + counter)
+    self._write(counter + " += 1")
+    self.indent -= 1
+    self._loop_body(node.body)
+    self.scopes.pop()
+
+  def _defines_functions(self, body):
+    return any(isinstance(node, FunctionDefinition) for node in walk(body))
+
+  def _loop_body(self, body, variable=None, value=None):
+    # each iteration of a sardine loop whose body defines functions gives their closures a
+    # frame of its own, while python closures all share the variables of one function
+    # call. such a body becomes a function of its own, called once per iteration with
+    # value for a for loop's variable; it returns (value,) when a return in it ends the
+    # function the loop is in
+    if not self._defines_functions(body):
+      self._block([body])
+      return
+    self.local_count += 1
+    name, result = '_sd_body' + str(self.local_count), '_sd_r' + str(self.local_count)
+    self.indent += 1
+    self.function_level += 1
+    self.scopes.append(_Scope(self.function_level))
+    if variable:
+      self._at(variable)
+    parameters = [self._declare(variable.raw_token)] if variable else []
+    self._write("def " + name + "(" + ", ".join(parameters) + "):")
+    header = len(self.lines)
+    self.declarations.append(dict())
+    self.bodies += 1
+    self._block([body])
+    self.bodies -= 1
+    self._write_declarations(header)
+    self.scopes.pop()
+    self.function_level -= 1
+    call = name + "(" + (value or "") + ")"
+    if not self.loops:
+      # at the top level, a return ends the program by raising
+      self._write(call)
+    else:
+      self._write(result + " = " + call)
+      self._write("if " + result + " is not None:")
+      self._write("  return " + (result if self.bodies else result + "[0]"))
+    self.indent -= 1
+
+  def _transpile_FunctionDefinition(self, node):
+    self._at(node.name)
+    name = self._declare(node.name.raw_token)
+    self.function_level += 1
+    self.scopes.append(_Scope(self.function_level))
+    self.declarations.append(dict())
+    bodies, self.bodies = self.bodies, 0
+    parameters = [self._declare(param.raw_token) for param in node.parameters]
+    self._write("def " + name + "(" + ", ".join(parameters) + "):")
+    header = len(self.lines)
+    if self._loops_on_self(node):
+      # python has no tail calls: self calls in tail position rebind the parameters and loop
+      self.loops.append((node.name.raw_token, name, parameters))
+      self.indent += 1
+      self._write("while True:")
+      self._block(node.body.statements)
+      self.indent += 1
+      self._write("return None")
+      self.indent -= 2
+    else:
+      self.loops.append(None)
+      self._block(node.body.statements)
+    self.loops.pop()
+    self.bodies = bodies
+    self._write_declarations(header)
+    self.scopes.pop()
+    self.function_level -= 1
+
+  def _write_declarations(self, header):
+    # global and nonlocal declarations are only known once the body is generated
+    declarations = self.declarations.pop()
+    for python_name in sorted(declarations):
+      self.lines.insert(header, "  " * (self.indent + 1) + declarations[python_name] + " " + python_name)
+      self.line_map.insert(header, self.line_map[header - 1])
+
+  def _transpile_Import(self, node):
+    # imports are top level only, so the names they bind are always globals
+    self._at(node.keyword)
+    call = "_sd_imports[" + str(len(self.imports)) + "].values()"
+    self.imports.append(node)
+    targets = [self._global_name(name) for name in node.names]
+    self._write(", ".join(targets) + ", = " + call if targets else call)
+
+  def _transpile_Return(self, node):
+    self._at(node.keyword)
+    loop = self.loops[-1] if self.loops else None
+    if not self.loops:
+      # outside every function: ends the program
+      self._write("raise _sd_ProgramReturn(" + (self._expr(node.value) if node.value else "") + ")")
+    elif (loop and self._is_self_call(node.value, loop[0]) and len(node.value.arguments) == len(loop[2])
+        and self._lookup(loop[0])[0] == loop[1]):
+      arguments = [self._expr(arg) for arg in node.value.arguments]
+      if arguments:
+        self._write(", ".join(loop[2]) + " = " + ", ".join(arguments))
+      self._write("continue")
+    elif self.bodies:
+      # leaves the functions the enclosing loops run their bodies in, see _loop_body
+      self._write("return (" + (self._expr(node.value) if node.value else "None") + ",)")
+    elif node.value:
+      self._write("return " + self._expr(node.value))
+    else:
+      self._write("return None")
+
+  def _loops_on_self(self, node):
+    # whether node makes self calls in tail position that can become a loop. functions
+    # defining closures are left alone, as closures would see the rebound parameters, and
+    # so are self calls from inside sardine loops, where continue would hit the wrong loop.
+    name = node.name.raw_token
+    if name in self.assigned:
+      return False
+    found = False
+    stack = [(stmt, False) for stmt in node.body.statements]
+    while stack:
+      stmt, in_loop = stack.pop()
+      if isinstance(stmt, FunctionDefinition) or (isinstance(stmt, VarDec) and stmt.name.raw_token == name):
+        return False
+      if isinstance(stmt, Return) and self._is_self_call(stmt.value, name):
+        if in_loop:
+          return False
+        found = found or len(stmt.value.arguments) == len(node.parameters)
+      in_loop = in_loop or isinstance(stmt, (While, ForRange))
+      stack.extend((child, in_loop) for child in children(stmt))
+    return found
+
+  def _is_self_call(self, value, name):
+    return (isinstance(value, FunctionCall) and isinstance(value.callee, Variable)
+      and value.callee.name.raw_token == name)
@@ -0,0 +1,195 @@
+import operator
+from .bytecode import *
+from .environment import Environment
+from .nodes import divide
+from .native import NativeFunction
+
+# indexed by opcode - ADD
+_BINARY = (
+  operator.add, operator.sub, operator.mul, divide,
+  operator.gt, operator.ge, operator.lt, operator.le, operator.eq, operator.ne,
+)
+
+
+class VMFunction:
+  # function value of the bytecode backend: a Code object and the frame it was created in
+  def __init__(self, code: Code, closure):
+    self.code = code
+    self.closure = closure
+
+  def arity(self):
+    return self.code.arity
+
+  def __call__(self, arguments):
+    # entry point for callers outside the VM; calls between VM functions never get here
+    return VM().call(self, arguments)
+
+  def __str__(self):
+    return "<fn " + self.code.name + ">"
+
+
+class Frame:
+  # a suspended caller: where to resume and with what frame and stack height
+  __slots__ = ('code', 'ip', 'env', 'base')
+
+  def __init__(self, code, ip, env, base):
+    self.code = code
+    self.ip = ip
+    self.env = env
+    self.base = base
+
+
+class VM:
+  def __init__(self):
+    self.stack = []
+    self.frames = []
+
+  def run(self, code: Code, env):
+    return self._execute(code, env)
+
+  def call(self, function: VMFunction, arguments):
+    return self._execute(function.code, self._enter(function, arguments))
+
+  def _enter(self, function, arguments):
+    env = Environment(function.closure, function.code.slot_count)
+    values = env.values
+    for i, argument in enumerate(arguments):
+      values[i] = argument
+    return env
+
+  def _execute(self, code, env):
+    stack = self.stack
+    frames = self.frames
+    base_depth = len(frames)
+    entry_base = len(stack)
+    instructions = code.instructions
+    constants = code.constants
+    ip = 0
+
+    while True:
+      op = instructions[ip]
+      if op >= ADD:
+        right = stack.pop()
+        stack[-1] = _BINARY[op - ADD](stack[-1], right)
+        ip += 1
+      elif op == LOAD_LOCAL:
+        stack.append(env.values[instructions[ip + 1]])
+        ip += 2
+      elif op == CONST:
+        stack.append(constants[instructions[ip + 1]])
+        ip += 2
+      elif op == LOAD_OUTER:
+        stack.append(env.outer.values[instructions[ip + 1]])
+        ip += 2
+      elif op == JUMP_IF_FALSE:
+        if stack.pop():
+          ip += 2
+        else:
+          ip += 2 + instructions[ip + 1]
+      elif op == CALL:
+        argc = instructions[ip + 1]
+        ip += 2
+        callee = stack[-argc - 1]
+        arguments = stack[len(stack) - argc:]
+        del stack[len(stack) - argc - 1:]
+        if type(callee) is VMFunction:
+          frames.append(Frame(code, ip, env, len(stack)))
+          env = self._enter(callee, arguments)
+          code = callee.code
+          instructions = code.instructions
+          constants = code.constants
+          ip = 0
+        elif type(callee) is NativeFunction:
+          stack.append(callee.function(*arguments))
+        else:
+          stack.append(callee(arguments))
+      elif op == RETURN:
+        if len(frames) == base_depth:
+          result = stack.pop()
+          del stack[entry_base:]
+          return result
+        frame = frames.pop()
+        result = stack.pop()
+        del stack[frame.base:]
+        stack.append(result)
+        code, ip, env = frame.code, frame.ip, frame.env
+        instructions = code.instructions
+        constants = code.constants
+      elif op == TAIL_CALL:
+        argc = instructions[ip + 1]
+        ip += 2
+        callee = stack[-argc - 1]
+        arguments = stack[len(stack) - argc:]
+        del stack[len(stack) - argc - 1:]
+        if type(callee) is VMFunction:
+          # reuse the current call: nothing of this frame is needed after the call,
+          # including whatever enclosing loops left on the stack
+          del stack[frames[-1].base if len(frames) > base_depth else entry_base:]
+          env = self._enter(callee, arguments)
+          code = callee.code
+          instructions = code.instructions
+          constants = code.constants
+          ip = 0
+        else:
+          stack.append(callee(arguments))
+      elif op == FOR_RANGE:
+        i = stack[-2]
+        if i <= stack[-1]:
+          env.values[instructions[ip + 1]] = i
+          stack[-2] = i + 1
+          ip += 3
+        else:
+          del stack[-2:]
+          ip += 3 + instructions[ip + 2]
+      elif op == LOAD:
+        stack.append(env.ancestor(instructions[ip + 1]).values[instructions[ip + 2]])
+        ip += 3
+      elif op == POP:
+        stack.pop()
+        ip += 1
+      elif op == DEFINE:
+        env.values[instructions[ip + 1]] = stack.pop()
+        ip += 2
+      elif op == STORE_LOCAL:
+        env.values[instructions[ip + 1]] = stack[-1]
+        ip += 2
+      elif op == STORE:
+        env.ancestor(instructions[ip + 1]).values[instructions[ip + 2]] = stack[-1]
+        ip += 3
+      elif op == JUMP:
+        ip += 2 + instructions[ip + 1]
+      elif op == JUMP_IF_TRUE_OR_POP:
+        if stack[-1]:
+          ip += 2 + instructions[ip + 1]
+        else:
+          stack.pop()
+          ip += 2
+      elif op == JUMP_IF_FALSE_OR_POP:
+        if stack[-1]:
+          stack.pop()
+          ip += 2
+        else:
+          ip += 2 + instructions[ip + 1]
+      elif op == NEG:
+        stack[-1] = -stack[-1]
+        ip += 1
+      elif op == NOT:
+        stack[-1] = not stack[-1]
+        ip += 1
+      elif op == PRINT:
+        print(stack.pop())
+        ip += 1
+      elif op == PUSH_SCOPE:
+        env = Environment(env, instructions[ip + 1])
+        ip += 2
+      elif op == POP_SCOPE:
+        env = env.outer
+        ip += 1
+      elif op == MAKE_FUNCTION:
+        stack.append(VMFunction(constants[instructions[ip + 1]], env))
+        ip += 2
+      elif op == IMPORT:
+        constants[instructions[ip + 1]].evaluate(env)
+        ip += 2
+      else:
+        raise RuntimeError("Unknown opcode " + str(op))
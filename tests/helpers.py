@@ -0,0 +1,26 @@
+import io
+from contextlib import redirect_stdout
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.interpreter import Interpreter
+
+# what the test scripts share: parsing a program, and running one to see what it prints
+
+
+def parse(source):
+  return Parser(Tokenizer(source).tokenize()).parse()
+
+
+def output(function, *args):
+  # the lines function(*args) printed
+  out = io.StringIO()
+  with redirect_stdout(out):
+    function(*args)
+  return out.getvalue().split('\n')[:-1]
+
+
+def run(source, backend='tree', interpreter=None, **options):
+  # the lines a program printed. source is its text or its parsed statements, run by
+  # interpreter, or else by a new Interpreter(backend, **options)
+  interpreter = interpreter or Interpreter(backend, **options)
+  return output(interpreter.interpret, parse(source) if isinstance(source, str) else source)
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+from src.interpreter import Interpreter, BACKENDS
+from src.optimizer import Optimizer
+from src.errors import SardineImportError
+from src import arrays
+from tests.helpers import parse, run
+
+
+def check(source, expected):
+  for backend in BACKENDS:
+    assert run(parse(source), backend) == expected, backend
+    assert run(Optimizer().optimize(parse(source)), backend) == expected, (backend, 'optimized')
+
+
+# without numpy there are no array builtins, and an array literal is an error
+numpy = arrays.numpy
+arrays.numpy = None
+try:
+  assert('sum' not in Interpreter().resolver.globals)
+  try:
+    Interpreter().interpret(parse('print 1\nprint [1, 2]\n'))
+    assert(False)
+  except SardineImportError as e:
+    assert(e.line == 2 and e.token == '[')
+finally:
+  arrays.numpy = numpy
+
+if numpy is None:
+  print("NumPy is not installed, skipping the array tests.")
+  sys.exit(0)
+
+# literals, and operators applied elementwise with broadcasting
+assert(str(parse('print [1, 2 + 3, x]\n')[0]) == '( print ( array 1 ( + 2 3 ) x ) )')
+check('''dec a = [1, 2, 3, 4]
+print a * 2
+print -a + [10, 20, 30, 40]
+print a / 2
+print a > 2
+print [[1, 2], [3, 4]] + [10, 20]
+print len([])
+''', ['[2 4 6 8]', '[ 9 18 27 36]', '[0.5 1.  1.5 2. ]', '[False False  True  True]', '[[11 22]', ' [13 24]]', '0'])
+
+# a sardine function applies to a whole array at once
+check('''def cel_to_fah(x) do
+  return 1.8*x + 32
+end
+dec readings = linspace(-40, 60, 6)
+print cel_to_fah(readings)
+print cel_to_fah(-40)
+''', ['[-40.  -4.  32.  68. 104. 140.]', '-40.0'])
+
+# reductions and element reads give python numbers, so '/' keeps its integer semantics
+check('''dec a = arange(1, 7)
+print sum(a)
+print sum(a) / 3
+print min(a - 10)
+print max(a * 1.5)
+print mean(a)
+print at(a, 0) / at(a, 1)
+print slice(a, 1, 3)
+print slice(a, -2, len(a))
+print zeros(3)
+print fill(2, 7)
+''', ['21', '7', '-9', '9.0', '3.5', '0.5', '[2 3]', '[5 6]', '[0. 0. 0.]', '[7 7]'])
+
+# .npy files, saved by one program and loaded by another
+path = os.path.join(tempfile.mkdtemp(), 'squares.npy')
+for backend in BACKENDS:
+  assert(run(parse('dec a = arange(0, 4)\nsave("%s", a * a)\n' % path), backend) == [])
+  assert(run(parse('print load("%s") + 1\n' % path), backend) == ['[ 1  2  5 10]'])
+os.remove(path)
+
+# a program's own definitions take the builtin names over
+check('''def sum(a, b) do
+  return a + b
+end
+print sum(1, 2)
+''', ['3'])
+
+print("All tests passed.")
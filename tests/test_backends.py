@@ -0,0 +1,124 @@
+from src.interpreter import BACKENDS
+from tests.helpers import run
+
+
+def check(source, expected):
+  for backend in BACKENDS:
+    assert run(source, backend) == expected, backend
+
+
+# arithmetic, comparison and equality operators, with and without literal operands
+source = '''dec a = 7
+dec b = 2
+print a + b
+print a - b
+print a * b
+print a / b
+print 10 - a
+print a * 3
+print (a + 1) * (b - 1)
+print a > b
+print a >= 7
+print 1 < b
+print a <= b
+print a == 7
+print a != b
+print -a
+print not a
+'''
+check(source, ['9', '5', '14', '3.5', '3', '21', '8', 'True', 'True', 'True', 'False', 'True', 'True', '-7', 'False'])
+
+# logical operators return the deciding operand
+source = '''print None or "fallback"
+print "left" or "right"
+print 0 and "never"
+print 1 and "second"
+'''
+check(source, ['fallback', 'left', '0', 'second'])
+
+# strings, if/else and returns
+source = '''def classify(n) do
+  if n < 0 return "negative"
+  else if n == 0 return "zero"
+  return "positive"
+end
+def nothing() do
+  return
+end
+print classify(-1)
+print classify(0)
+print classify(5)
+print nothing()
+print "sar" + "dine"
+'''
+check(source, ['negative', 'zero', 'positive', 'None', 'sardine'])
+
+# a top-level return ends the program, its value evaluated, from inside loops too
+source = '''def say(x) do
+  print x
+  return x
+end
+for i in 1..3 do
+  print i
+  if i == 2 return say("stop")
+end
+print "unreachable"
+'''
+check(source, ['1', '2', 'stop'])
+check('print 1\nreturn\nprint 2\n', ['1'])
+
+# returns leave loops whose bodies define closures, each closure keeping its own iteration's
+# locals, inside functions and at the top level
+source = '''def adders() do
+  dec first = 0
+  for i in 1..3 do
+    dec n = i
+    def add(x) do
+      return x + n
+    end
+    if i == 1 first = add
+  end
+  return first
+end
+def early() do
+  for i in 1..3 do
+    def never() do
+      return i
+    end
+    return
+  end
+  return "late"
+end
+print adders()(10)
+print early()
+for i in 1..2 do
+  def stop() do
+    return "stopped"
+  end
+  print stop()
+  return
+end
+print "unreachable"
+'''
+check(source, ['11', 'None', 'stopped'])
+
+# test.sd / math.sd style program
+source = '''dec PI = 3.14159
+def abs(num) do
+  if num >= 0 return num
+  return -num
+end
+def pow(x, n) do
+  if n <= 1 return x
+  return x * pow(x, n-1)
+end
+def cel_to_fah(x) do
+  return 1.8*x + 32
+end
+print cel_to_fah(-41)
+print pow(2, 10)
+print abs(-PI)
+'''
+check(source, ['-41.8', '1024', '3.14159'])
+
+print("All tests passed.")
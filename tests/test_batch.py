@@ -0,0 +1,71 @@
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout, redirect_stderr
+from src.batch import run_scripts, expand, Worker, OK, ERROR, TIMEOUT
+from src.sardine import SardineLang
+
+directory = tempfile.mkdtemp()
+os.environ['SARDINE_NO_CACHE'] = '1'
+
+
+def write(name, text):
+  path = os.path.join(directory, name)
+  with open(path, 'w') as f:
+    f.write(text)
+  return path
+
+
+write('prelude.sd', '''print "prelude"
+dec calls = 0
+def square(x) do
+  calls = calls + 1
+  return calls * x * x
+end
+''')
+first = write('a_first.sd', 'import prelude\nprint square(3)\n')
+second = write('a_second.sd', 'import prelude\nprint square(4)\n')
+missing = write('b_missing.sd', 'print 1\nimport nowhere\n')  # fails before it runs
+spin = write('c_spin.sd', 'print "spinning"\ndec x = 0\nwhile True x = x + 1\n')
+
+# globs expand in sorted order, and a path named twice runs once
+assert(expand([os.path.join(directory, 'a_*.sd'), first]) == [first, second])
+assert(run_scripts([]) == [])
+
+# output is captured per script, in the order given, and the prelude runs afresh for each
+for workers in (1, 2):
+  results = run_scripts([os.path.join(directory, '[abc]_*.sd')], workers, timeout=0.5)
+  assert([result.path for result in results] == [first, second, missing, spin])
+  assert([result.status for result in results] == [OK, OK, ERROR, TIMEOUT])
+  assert(results[0].output == 'prelude\n9\n' and results[1].output == 'prelude\n16\n')
+  assert(results[2].output == '' and "No module named 'nowhere'" in results[2].message)
+  assert(results[3].output == 'spinning\n' and 0.5 <= results[3].seconds < 5)
+  assert(results[0].message is None and all(result.seconds > 0 for result in results))
+
+# a worker parses a prelude once, however many scripts import it
+worker = Worker('closure')
+assert(worker.run(first).output == 'prelude\n9\n')
+module = list(worker.loader.modules.values())[0]
+assert(worker.run(second).output == 'prelude\n16\n')
+assert(list(worker.loader.modules.values()) == [module])
+assert(worker.run(os.path.join(directory, 'none.sd')).message.startswith('FileNotFoundError'))
+
+# the command line prints each script's output and a summary, and fails if any script did
+out, err = io.StringIO(), io.StringIO()
+try:
+  with redirect_stdout(out), redirect_stderr(err):
+    SardineLang.run(['--batch', '--jobs=2', '--timeout=0.5', first, missing])
+  assert(False)
+except SystemExit as e:
+  assert(e.code == 1)
+assert(out.getvalue() == '==> %s <==\nprelude\n9\n==> %s <==\n' % (first, missing))
+assert(err.getvalue().splitlines()[-1].startswith('2 scripts: 1 ok, 1 error, 0 timeout in '))
+
+# a --jobs or --timeout that isn't a positive number gets the usage line, not a traceback
+for setting in ('--jobs=abc', '--jobs=0', '--timeout=x', '--timeout=-1', '--timeout=nan'):
+  out, err = io.StringIO(), io.StringIO()
+  with redirect_stdout(out), redirect_stderr(err):
+    SardineLang.run(['--batch', setting, first])
+  assert(out.getvalue() == '' and err.getvalue().startswith('Usage: python sardine.py'))
+
+print("All tests passed.")
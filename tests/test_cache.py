@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import threading
+from src import cache
+from src.sardine import SardineLang
+
+directory = tempfile.mkdtemp()
+cwd = os.getcwd()
+os.chdir(directory)
+os.environ.pop('SARDINE_NO_CACHE', None)
+
+builds = []
+
+
+def build(source):
+  # results are recorded as depending on lib.sd, as a build that reads another file would
+  builds.append(source)
+  result, dependencies = SardineLang.compile_source(source)
+  return result, dependencies + ['lib.sd']
+
+
+def write(path, text, mtime=None):
+  with open(path, 'w') as f:
+    f.write(text)
+  if mtime is not None:
+    os.utime(path, ns=(mtime, mtime))
+
+
+def printed(statements):
+  return [str(stmt) for stmt in statements]
+
+
+try:
+  write('lib.sd', 'dec K = 2\n', 10**18)
+  write('main.sd', 'dec K = 2\nprint K * 21\n', 10**18)
+
+  # the first load builds and writes the entry, the second is served from it
+  statements, report = cache.load('main.sd', 'ast', build)
+  assert(len(builds) == 1 and os.path.exists(cache.cache_path('main.sd', 'ast')))
+  assert(os.path.dirname(cache.cache_path('main.sd', 'ast')) == os.path.join(directory, '__sdcache__'))
+  cached, report = cache.load('main.sd', 'ast', build)
+  assert(len(builds) == 1 and printed(cached) == printed(statements))
+
+  # a touched but unchanged source is recognised by its hash
+  write('main.sd', 'dec K = 2\nprint K * 21\n', 2 * 10**18)
+  cache.load('main.sd', 'ast', build)
+  cache.load('main.sd', 'ast', build)
+  assert(len(builds) == 1)
+
+  # changing the source, or a file it depends on, rebuilds
+  write('main.sd', 'dec K = 2\nprint K * 42\n', 3 * 10**18)
+  statements, report = cache.load('main.sd', 'ast', build)
+  assert(len(builds) == 2 and printed(statements)[-1] == '( print ( * K 42 ) )')
+  write('lib.sd', 'dec K = 3\n', 4 * 10**18)
+  statements, report = cache.load('main.sd', 'ast', build)
+  assert(len(builds) == 3)
+
+  # damaged entries are ignored and replaced
+  with open(cache.cache_path('main.sd', 'ast'), 'wb') as f:
+    f.write(b'SDC\x01garbage')
+  cache.load('main.sd', 'ast', build)
+  cache.load('main.sd', 'ast', build)
+  assert(len(builds) == 4)
+  with open(cache.cache_path('main.sd', 'ast'), 'rb') as f:
+    entry = f.read()
+  with open(cache.cache_path('main.sd', 'ast'), 'wb') as f:
+    f.write(entry[:-20])  # a valid header, a truncated payload
+  statements, report = cache.load('main.sd', 'ast', build)
+  cache.load('main.sd', 'ast', build)
+  assert(len(builds) == 5 and printed(statements)[-1] == '( print ( * K 42 ) )')
+
+  # concurrent writers leave a readable entry and no temporary files
+  os.remove(cache.cache_path('main.sd', 'ast'))
+  results = []
+  threads = [threading.Thread(target=lambda: results.append(cache.load('main.sd', 'ast', build))) for _ in range(8)]
+  for thread in threads: thread.start()
+  for thread in threads: thread.join()
+  assert(len(results) == 8)
+  assert(not [name for name in os.listdir('__sdcache__') if name.startswith('.tmp-')])
+  before = len(builds)
+  cache.load('main.sd', 'ast', build)
+  assert(len(builds) == before)
+
+  # SARDINE_NO_CACHE bypasses the cache
+  os.environ['SARDINE_NO_CACHE'] = '1'
+  cache.load('main.sd', 'ast', build)
+  assert(len(builds) == before + 1)
+  del os.environ['SARDINE_NO_CACHE']
+finally:
+  os.chdir(cwd)
+  shutil.rmtree(directory)
+
+print("All tests passed.")
@@ -0,0 +1,58 @@
+from src.interpreter import Interpreter
+from src import nodes
+from tests import helpers
+
+
+def run(source, interpreter=None):
+  statements = helpers.parse(source)
+  return statements, helpers.run(statements, interpreter=interpreter, memoize=False)
+
+
+# only writes to globals that are called by name invalidate the caches
+statements, out = run('''def square(x) do
+  return x * x
+end
+def cube(x) do
+  return x * x * x
+end
+dec total = 0
+for i in 1..3 total = total + square(i)
+print total
+square = cube
+for i in 1..3 total = total + square(i)
+print total
+''')
+assert(out == ['14', '50'])
+square, cube, total = statements[0], statements[1], statements[2]
+assert(square.bumps and cube.bumps == False and total.bumps == False)
+assert(statements[3].body.expr.value.right.global_callee)
+
+# a cached call site skips the lookup while the version holds
+statements, out = run('''def f(x) do
+  return x + 1
+end
+def g(x) do
+  return f(x)
+end
+print g(1)
+''')
+call = statements[1].body.statements[0].value
+assert(call.cached_version == nodes.call_cache_version and call.cached.definition is statements[0])
+
+# calls through locals and parameters are never cached
+statements, out = run('''def apply(h, x) do
+  return h(x)
+end
+def inc(x) do
+  return x + 1
+end
+print apply(inc, 1)
+''')
+call = statements[0].body.statements[0].value
+assert(out == ['2'] and call.global_callee == False and call.cached is None)
+
+# redefinitions, including ones from later REPL lines, are seen by cached call sites
+interpreter = Interpreter(memoize=False)
+_, out = run('def f() do\n  return 1\nend\ndef g() do\n  return f()\nend\nprint g()\n', interpreter)
+_, more = run('def f() do\n  return 2\nend\nprint g()\n', interpreter)
+assert(out + more == ['1', '2'])
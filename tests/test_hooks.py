@@ -0,0 +1,97 @@
+import sys
+from src.interpreter import Interpreter
+from src.hooks import Coverage
+from tests import helpers
+from tests.helpers import parse
+
+PROGRAM = '''def double(n) do
+  return n * 2
+end
+def count(n) do
+  if n <= 0 return 0
+  return count(n - 1)
+end
+if False do
+  print "never"
+end
+print double(4)
+print count(2)
+'''
+
+
+def run(interpreter, statements):
+  return helpers.run(statements, interpreter=interpreter)
+
+
+# with no hook registered nothing is instrumented
+statements = parse(PROGRAM)
+interpreter = Interpreter()
+assert(run(interpreter, statements) == ['8', '0'])
+assert(interpreter.instrumented == [] and 'evaluate' not in vars(statements[0]))
+
+# events arrive in execution order, lines taken from the nodes' tokens
+events = []
+trace = lambda event, node, arg: events.append((event, arg if event != 'call' else list(arg)))
+interpreter = Interpreter()
+interpreter.add_hook(trace)
+assert(run(interpreter, parse(PROGRAM)) == ['8', '0'])
+assert(events[:8] == [('line', 1), ('line', 4), ('line', 8), ('line', 11), ('call', [4.0]), ('line', 2), ('return', 8.0), ('line', 12)])
+
+# each call of a tail-recursive chain is entered and left in turn, in constant stack
+calls = [event for event in events[8:] if event[0] in ('call', 'return')]
+assert(calls == [('call', [2.0]), ('return', None), ('call', [1.0]), ('return', None), ('call', [0.0]), ('return', 0.0)])
+depth = sys.getrecursionlimit() * 2
+counter = []
+interpreter = Interpreter()
+interpreter.add_hook(lambda event, node, arg: counter.append(event) if event == 'call' else None)
+assert(run(interpreter, parse(PROGRAM.replace('count(2)', 'count(%d)' % depth))) == ['8', '0'])
+assert(len(counter) == depth + 2)
+
+# a runtime error is reported once, by the statement it escaped first
+errors = []
+interpreter = Interpreter()
+interpreter.add_hook(lambda event, node, arg: errors.append((node.keyword.line, type(arg))) if event == 'exception' else None)
+try:
+  run(interpreter, parse('def f(x) do\n  return x + "a"\nend\nprint f(1)\n'))
+  assert(False)
+except TypeError:
+  pass
+assert(errors == [(2, TypeError)])
+
+# removing the last hook puts the class's evaluate back
+statements = parse(PROGRAM)
+interpreter = Interpreter()
+interpreter.add_hook(trace)
+run(interpreter, statements)
+assert('evaluate' in vars(statements[3]))
+interpreter.remove_hook(trace)
+assert(interpreter.instrumented == [] and 'evaluate' not in vars(statements[3]))
+
+# hooks only run on the tree backend
+try:
+  Interpreter('vm').add_hook(trace)
+  assert(False)
+except ValueError:
+  pass
+
+# coverage marks the lines that never ran
+coverage = Coverage()
+statements = parse(PROGRAM)
+coverage.add(statements)
+interpreter = Interpreter()
+interpreter.add_hook(coverage)
+run(interpreter, statements)
+assert(coverage.missed() == [9])
+report = coverage.report(PROGRAM).splitlines()
+assert(report[0] == '8 of 9 lines run (88.9%)')
+assert(report[9].startswith('!    9') and report[11].startswith('>   11') and report[3].startswith('     3'))
+
+# hooked functions are memoized as plain ones are, reporting only the calls that run
+FIB = 'def fib(n) do\n  if n < 2 return n\n  return fib(n - 1) + fib(n - 2)\nend\nprint fib(30)\n'
+plain = Interpreter()
+assert(run(plain, parse(FIB)) == ['832040'])
+events = []
+interpreter = Interpreter()
+interpreter.add_hook(lambda event, node, arg: events.append(event) if event == 'call' else None)
+assert(run(interpreter, parse(FIB)) == ['832040'])
+assert(interpreter.memo_stats() == plain.memo_stats() and len(events) == plain.memo_stats()['fib']['misses'])
@@ -0,0 +1,145 @@
+import sys
+from src.tokenizer import Tokenizer
+from src.token import TokenType
+from src.interpreter import BACKENDS
+from tests.helpers import run
+
+
+def check(source, expected, backends=BACKENDS):
+  for backend in backends:
+    assert run(source, backend) == expected, backend
+
+
+# ranges tokenize as two dots between numbers, decimals still work
+tokens = Tokenizer('for i in 1..10 print 2.5\n').tokenize()
+assert([t.type for t in tokens[:7]] == [TokenType.FOR, TokenType.IDENTIFIER, TokenType.IN, TokenType.NUMBER,
+  TokenType.DOT, TokenType.DOT, TokenType.NUMBER])
+assert(tokens[3].value == 1.0 and tokens[6].value == 10.0 and tokens[8].value == 2.5)
+
+# ranges include their end, bounds are evaluated once
+check('''dec total = 0
+dec n = 3
+for i in 1..n + 1 do
+  dec sq = i * i
+  n = 100
+  total = total + sq
+end
+print total
+for i in 5..4 print "never"
+''', ['30'])
+
+# while loops, nested loops and assignments to the loop variable
+check('''dec n = 0
+dec count = 0
+while n < 3 do
+  dec step = 1
+  n = n + step
+  for j in 1..2 do
+    j = j * 10
+    count = count + 1
+  end
+end
+print n
+print count
+''', ['3', '6'])
+
+# returns leave the loop and the function
+check('''def first_square_over(limit) do
+  for i in 0..100 do
+    if i * i > limit return i
+  end
+  return -1
+end
+def countdown(n) do
+  while True do
+    if n == 0 return "liftoff"
+    n = n - 1
+  end
+end
+print first_square_over(50)
+print first_square_over(1000000)
+print countdown(5)
+''', ['8', '-1', 'liftoff'])
+
+# tail calls from inside loops still run in constant stack
+source = '''def spin(n) do
+  for i in 1..1 do
+    if n <= 0 return "done"
+    return spin(n - 1)
+  end
+end
+print spin(%d)
+''' % (sys.getrecursionlimit() * 5)
+check(source, ['done'], [backend for backend in BACKENDS if backend != 'python'])
+
+# functions defined in a loop body each close over the frame of their own iteration;
+# returns from such bodies still leave the function or the program
+check('''dec first = 0
+dec count = 0
+for i in 1..3 do
+  dec j = i
+  def get() do
+    return j * 10
+  end
+  if i == 1 first = get
+  count = count + 1
+end
+print first()
+print count
+def search(n) do
+  dec total = 0
+  for a in 1..n do
+    dec b = 0
+    while b < n do
+      b = b + 1
+      def product() do
+        return a * b
+      end
+      total = total + 1
+      if product() == 6 return product
+    end
+  end
+  return total
+end
+dec p = search(3)
+print p()
+print search(1)
+dec k = 0
+while k < 5 do
+  k = k + 1
+  def show() do
+    print k
+  end
+  if k == 2 return show()
+end
+print "unreachable"
+''', ['10', '3', '6', '1', '2'])
+
+# so does a for loop's variable, which such closures capture as it was in their iteration,
+# while assigning it in the body still leaves the count alone
+check('''dec first = 0
+dec last = 0
+for i in 1..3 do
+  def get() do
+    return i
+  end
+  if i == 1 first = get
+  last = get
+  i = i * 10
+end
+print first()
+print last()
+def pairs(n) do
+  dec kept = 0
+  for a in 1..n for b in a..n do
+    def pair() do
+      return a * 10 + b
+    end
+    if a == 1 and b == 2 kept = pair
+  end
+  return kept
+end
+print pairs(3)()
+''', ['10', '30', '12'])
+
+print("All tests passed.")
@@ -0,0 +1,142 @@
+from src.resolver import Resolver
+from src.interpreter import Interpreter
+from src.purity import analyze
+from src.sardine_function import Memo, RETIRE_AFTER
+from tests import helpers
+from tests.helpers import parse
+
+
+def pure(source):
+  return sorted(definition.name.raw_token for definition in analyze(Resolver().resolve(parse(source))))
+
+
+def run(source, backend='tree', memoize=True):
+  interpreter = Interpreter(backend, memoize=memoize)
+  return interpreter, helpers.run(source, interpreter=interpreter)
+
+
+# purity: no print, no assignment outside the function, only pure callees
+assert(pure('''def fib(n) do
+  if n < 2 return n
+  return fib(n - 1) + fib(n - 2)
+end
+def twice(n) do
+  dec x = fib(n)
+  x = x * 2
+  return x
+end
+''') == ['fib', 'twice'])
+assert(pure('''def shout(x) do
+  print x
+  return x
+end
+def relay(x) do
+  return shout(x)
+end
+''') == [])
+assert(pure('''dec total = 0
+def add(x) do
+  total = total + x
+  return total
+end
+def scaled(x) do
+  return x * total
+end
+''') == [])
+
+# calls through parameters, or to names later assigned, cannot be followed
+assert(pure('''def apply(f, x) do
+  return f(x)
+end
+def inc(x) do
+  return x + 1
+end
+def uses(x) do
+  return inc(x)
+end
+inc = apply
+''') == ['inc'])
+
+# functions returning closures are left alone
+assert(pure('''def counter() do
+  dec n = 0
+  def next() do
+    n = n + 1
+    return n
+  end
+  return next
+end
+''') == [])
+
+FIB = '''def fib(n) do
+  if n < 2 return n
+  return fib(n - 1) + fib(n - 2)
+end
+print fib(60)
+'''
+
+# an exponential recursion becomes linear
+for backend in ('tree', 'closure'):
+  interpreter, out = run(FIB, backend)
+  assert(out == ['1548008755920']), backend
+  stats = interpreter.memo_stats()['fib']
+  assert(stats == {'hits': 58, 'misses': 61, 'evictions': 0, 'size': 61, 'retired': False}), (backend, stats)
+
+# the opt-out
+interpreter, out = run(FIB.replace('fib(60)', 'fib(15)'), memoize=False)
+assert(out == ['610'] and interpreter.memo_stats() == {})
+
+# the cache is bounded, and every call of a tail call chain is cached
+interpreter, out = run('''def down(n, acc) do
+  if n <= 0 return acc
+  return down(n - 1, acc + n)
+end
+for i in 1..3 print down(100, 0)
+''')
+stats = interpreter.memo_stats()['down']
+assert(out[0] == out[2] == '5050' and stats['size'] == 101 and stats['hits'] == 2)
+memo = Memo(2)
+for key in 'abc':
+  memo.store(key, key)
+assert(list(memo.entries) == ['b', 'c'] and memo.evictions == 1)
+assert(memo.lookup('b') == ('b',) and list(memo.entries) == ['c', 'b'])
+
+# a cache that keeps missing is dropped
+interpreter, out = run('''def square(x) do
+  return x * x
+end
+dec total = 0
+for i in 1..%d total = total + square(i)
+print total
+''' % (RETIRE_AFTER * 2))
+stats = interpreter.memo_stats()['square']
+assert(stats['retired'] and stats['misses'] == RETIRE_AFTER and stats['size'] == 0)
+
+# arguments of different types are different keys, even when python finds them equal
+interpreter, out = run('''def same(x) do
+  return x
+end
+print same(1)
+print same(True)
+''')
+assert(out == ['1', 'True'])
+
+# a definition replacing a builtin is a reassignment, so its earlier callers are not cached
+for backend in ('tree', 'closure'):
+  interpreter, out = run('''def f(x) do
+  return abs(x)
+end
+print f(-1)
+def abs(x) do
+  return -10
+end
+print f(-1)
+''', backend)
+  assert(out == ['1', '-10']), backend
+  assert('f' not in interpreter.memo_stats()), backend
+
+# an unconditional top-level def replacing a builtin before anything calls it is just a
+# definition, so math.sd's recursive pow stays memoized
+for backend in ('tree', 'closure'):
+  interpreter, out = run(open('math.sd').read() + '\nprint pow(2, 10)\n', backend)
+  assert(out == ['1024'] and 'pow' in interpreter.memo_stats()), backend
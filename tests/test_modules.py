@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+from src.tokenizer import Tokenizer
+from src.token import TokenType
+from src.nodes import Import
+from src.interpreter import BACKENDS
+from src.modules import ModuleLoader, default_search_path
+from src.errors import SardineImportError
+from tests import helpers
+from tests.helpers import parse
+
+directory = tempfile.mkdtemp()
+library = os.path.join(directory, 'lib')
+os.mkdir(library)
+os.environ['SARDINE_NO_CACHE'] = '1'
+
+
+def write(path, text):
+  with open(os.path.join(directory, path), 'w') as f:
+    f.write(text)
+
+
+def run(source, backend, loader):
+  return helpers.run(source, backend, loader=loader)
+
+
+def check(source, expected, search_path=(directory, library)):
+  for backend in BACKENDS:
+    assert run(source, backend, ModuleLoader(search_path)) == expected, backend
+
+
+def import_error(source, backend='tree', search_path=(directory, library)):
+  try:
+    run(source, backend, ModuleLoader(search_path))
+  except SardineImportError as e:
+    return e
+  return None
+
+
+write('counter.sd', '''print "loading counter"
+dec count = 0
+def bump() do
+  count = count + 1
+  return count
+end
+''')
+write('a.sd', '''import counter
+def from_a() do
+  return bump()
+end
+''')
+write('b.sd', '''import counter
+def from_b() do
+  return bump()
+end
+''')
+write(os.path.join('lib', 'geometry.sd'), '''import counter
+dec PI = 3
+def area(r) do
+  return PI * r * r
+end
+''')
+write('cycle_x.sd', 'import cycle_y\n')
+write('cycle_y.sd', 'import cycle_z\n')
+write('cycle_z.sd', 'import cycle_x\n')
+write('nested.sd', '''def f() do
+  import counter
+end
+''')
+
+try:
+  # import is a keyword and a statement of its own
+  tokens = Tokenizer('import counter\n').tokenize()
+  assert([t.type for t in tokens] == [TokenType.IMPORT, TokenType.IDENTIFIER, TokenType.NEWLINE])
+  statements = parse('import counter\nprint 1\n')
+  assert(isinstance(statements[0], Import) and str(statements[0]) == '( import counter )')
+
+  # a module runs once, however many files import it, and its state is shared
+  check('''import a
+import b
+import counter
+print from_a()
+print from_b()
+print bump()
+print count
+''', ['loading counter', '1', '2', '3', '0'])
+
+  # the search path is walked in order, and imported names are re-exported
+  check('''import geometry
+print area(2)
+bump()
+print bump()
+''', ['loading counter', '12', '2'])
+
+  # the registry keeps modules across programs that share a loader
+  for backend in BACKENDS:
+    loader = ModuleLoader([directory])
+    assert(run('import counter\nprint bump()\n', backend, loader) == ['loading counter', '1'])
+    assert(run('import counter\nprint bump()\n', backend, loader) == ['2'])
+    assert(len(loader.modules) == 1 and not loader.loading)
+
+  # module top levels run when the import executes, not when it is resolved
+  check('''print "first"
+if False do
+  import counter
+end
+print "second"
+import counter
+''', ['first', 'second', 'loading counter'])
+
+  # cycles are reported with the chain of imports that closes them
+  for backend in BACKENDS:
+    e = import_error('import cycle_x\n', backend)
+    assert(e is not None and e.message == 'Import cycle: cycle_x -> cycle_y -> cycle_z -> cycle_x.'), backend
+
+  e = import_error('import missing\n')
+  assert(e is not None and e.token == 'missing' and e.line == 1)
+  e = import_error('import geometry\n', search_path=[directory])
+  assert(e is not None and e.token == 'geometry')
+  e = import_error('import nested\n')
+  assert(e is not None and e.message == 'Imports are only allowed at the top level.' and e.line == 2)
+
+  # the default search path is the working directory, then SARDINE_PATH
+  os.environ['SARDINE_PATH'] = os.pathsep.join([library, directory])
+  assert(default_search_path() == [os.curdir, library, directory])
+  del os.environ['SARDINE_PATH']
+  assert(default_search_path() == [os.curdir])
+finally:
+  del os.environ['SARDINE_NO_CACHE']
+  shutil.rmtree(directory)
+
+print("All tests passed.")
@@ -0,0 +1,71 @@
+from src.interpreter import Interpreter, BACKENDS
+from src.native import NativeFunction, VARIADIC
+from src import nodes
+from tests import helpers
+from tests.helpers import parse
+
+
+def run(source, interpreter):
+  return helpers.run(source, interpreter=interpreter)
+
+
+def check(source, expected, setup=None):
+  for backend in BACKENDS:
+    interpreter = Interpreter(backend)
+    if setup:
+      setup(interpreter)
+    assert run(source, interpreter) == expected, backend
+
+
+# the builtin module: math, strings and a clock
+check('''print abs(-3)
+print sqrt(16)
+print floor(2.7) / 2
+print pow(2, 100)
+print upper("sardine")
+print substring("sardine", 0, 3)
+print find("sardine", "dine")
+print len("abc") + num("39")
+print concat("pi is ", 3.14, ", not ", None)
+dec start = clock()
+print clock() >= start
+''', ['3', '4.0', '1', str(2 ** 100), 'SARDINE', 'sar', '3', '42', 'pi is 3.14, not None', 'True'])
+
+# natives of fixed and variable arity, registered from python, called plain and in tail position
+def setup(interpreter):
+  interpreter.register('twice', lambda x: 2 * x, 1)
+  interpreter.register('total', lambda *values: sum(values))
+
+check('''def relay(x) do
+  return twice(x)
+end
+print twice(21)
+print relay(4)
+print total(1, 2, 3)
+print total()
+''', ['42', '8', '6', '0'], setup)
+native = Interpreter().register('twice', lambda x: 2 * x, 1)
+assert(native.arity() == 1 and native.accepts(1) and not native.accepts(2))
+assert(NativeFunction('any', print).arity() is VARIADIC and NativeFunction('any', print).accepts(5))
+assert(run('print twice\n', Interpreter()) == ['None'])  # not registered there
+assert(str(native) == '<native fn twice>')
+
+# a program's own definitions, and the names it imports, replace the builtins
+check('''def abs(x) do
+  return "mine"
+end
+print abs(-1)
+''', ['mine'])
+check('import math\nprint pow(2, 0)\n', ['2'])
+
+# call sites cache natives, and see them replaced
+interpreter = Interpreter()
+interpreter.register('f', lambda: 1, 0)
+out = run('def g() do\n  return f() + 0\nend\nprint g()\n', interpreter)
+interpreter.register('f', lambda: 2, 0)
+assert(out + run('print g()\n', interpreter) == ['1', '2'])
+call = parse('dec x = abs(-1)\n')
+Interpreter().interpret(call)
+assert(type(call[0].initializer.cached) is NativeFunction and call[0].initializer.cached_version == nodes.call_cache_version)
+
+print("All tests passed.")
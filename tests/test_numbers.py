@@ -0,0 +1,69 @@
+from src.tokenizer import Tokenizer
+from src.interpreter import BACKENDS
+from src.optimizer import Optimizer
+from src.nodes import divide
+from tests.helpers import parse, run
+
+
+def check(source, expected):
+  for backend in BACKENDS:
+    assert run(parse(source), backend) == expected, backend
+    assert run(Optimizer().optimize(parse(source)), backend) == expected, (backend, 'optimized')
+
+
+# literals with a decimal point are floats, the rest integers, in every tokenizer mode
+for tokens in (Tokenizer('1 2.5 3.\n').tokenize(), Tokenizer('1 2.5 3.\n', 'scan').tokenize(), list(Tokenizer('1 2.5 3.\n').buffer())):
+  assert([type(token.value) for token in tokens[:3]] == [int, float, float])
+
+# '/' gives an integer only when it divides exactly
+assert(divide(6, 3) == 2 and type(divide(6, 3)) is int)
+assert(divide(7, 2) == 3.5 and divide(-7, 2) == -3.5 and divide(-6, 4) == -1.5)
+assert(type(divide(6.0, 3)) is float and type(divide(6, 3.0)) is float and type(divide(True, 1)) is float)
+check('''dec a = 12
+dec b = 4
+print a / b
+print a / 5
+print a / 4
+print 12 / b
+print -a / b
+print a / 4.0
+print 1.5 / 0.5
+print 8 / 2 / 2
+''', ['3', '2.4', '3', '3', '-3', '3.0', '3.0', '2'])
+
+# mixed operands promote to float, integers stay exact however large
+check('''dec n = 3
+print n + 0.5
+print n * 2.0
+print n - 1
+print -n
+def fact(n) do
+  if n <= 1 return 1
+  return n * fact(n - 1)
+end
+print fact(25)
+print fact(25) / fact(24)
+print 2.0 * fact(3)
+''', ['3.5', '6.0', '2', '-3', str(15511210043330985984000000), '25', '12.0'])
+
+# the optimizer keeps the type: x * 1.0 is a float even when x is an integer
+check('''dec x = 3
+print x * 1.0
+print x - 0.0
+print x * 1
+''', ['3.0', '3.0', '3'])
+
+# a loop counter has the type of its start
+check('''for i in 1..3 print i
+for i in 0.5..1.5 print i
+''', ['1', '2', '3', '0.5', '1.5'])
+
+# dividing by zero is an error for integers and floats alike
+for left, right in ((1, 0), (1.0, 0), (0, 0.0)):
+  try:
+    divide(left, right)
+    assert(False)
+  except ZeroDivisionError:
+    pass
+
+print("All tests passed.")
@@ -0,0 +1,130 @@
+from src.optimizer import Optimizer
+from src.interpreter import BACKENDS
+from src.nodes import Literal, Block, FunctionDefinition, FunctionCall
+from tests.helpers import parse, run
+
+
+def optimize(source):
+  optimizer = Optimizer()
+  return optimizer.optimize(parse(source)), optimizer
+
+
+# literal expressions fold and groupings disappear
+stmts, optimizer = optimize('print (1 + 2) * 3 - -1\n')
+assert(isinstance(stmts[0].expr, Literal) and stmts[0].expr.value == 10.0)
+assert(optimizer.stats['folded'] == 4)
+
+# errors are left for runtime
+stmts, optimizer = optimize('print 1 / 0\nprint "a" - 1\n')
+assert(optimizer.stats['folded'] == 0)
+
+# never reassigned top-level decs propagate into the code after them, then fold
+stmts, optimizer = optimize('''dec PI = 3.14159
+def circumference(r) do
+  return 2 * PI * r
+end
+''')
+assert(str(stmts[1].body.statements[0].value) == '( * 6.28318 r )')
+
+# reassigned, shadowed or later declared names are not constants
+stmts, optimizer = optimize('''dec a = 1
+dec b = 2
+dec c = 3
+def f(b) do
+  a = 5
+  return a + b + c
+end
+''')
+assert(str(stmts[3].body.statements[1].value) == '( + ( + a b ) 3 )')
+stmts, optimizer = optimize('print x\ndec x = 1\n')
+assert(str(stmts[0].expr) == 'x')
+
+# constant conditions select a branch, statements after a return are dropped
+stmts, optimizer = optimize('''dec DEBUG = False
+def f(x) do
+  if DEBUG print "debug"
+  if not DEBUG do
+    return x * 1
+  end else return 0
+  print "unreachable"
+end
+''')
+body = stmts[1].body.statements
+assert(len(body) == 1 and isinstance(body[0], Block))
+assert(str(body[0].statements[0].value) == 'x')
+assert(optimizer.stats['branches'] == 2 and optimizer.stats['unreachable'] == 1)
+assert(optimizer.eliminated() > 0)
+assert(optimizer.report().startswith('optimizer: eliminated ' + str(optimizer.eliminated()) + ' of '))
+
+# loops that can never run are dropped
+stmts, optimizer = optimize('dec DEBUG = False\nwhile DEBUG print "debug"\nfor i in 1..2 print 2 * 2\n')
+assert(len(stmts) == 2 and str(stmts[1].body.expr) == '4')
+
+# optimized programs behave the same on every backend
+source = '''dec PI = 3.14159
+dec LIMIT = 2 * 5
+def clamp(x) do
+  if x > LIMIT return LIMIT
+  if True and x < 0 - LIMIT return -LIMIT
+  return x
+end
+print clamp(100)
+print clamp(-100)
+print clamp(PI)
+'''
+for backend in BACKENDS:
+  assert(run(optimize(source)[0], backend) == run(parse(source), backend) == ['10', '-10', '3.14159'])
+
+# small functions are inlined where their name is stable and not shadowed
+source = '''dec g = 10
+def abs(num) do
+  if num >= 0 return num
+  return -num
+end
+def offset(x) do
+  return x + g
+end
+def sign(x) do
+  if x > 0 do
+    dec s = 1
+    return s
+  end else if x < 0 return -1
+  print "zero"
+end
+def bump() do
+  g = g + 1
+  return g
+end
+def shadowed(g) do
+  return offset(1)
+end
+def fact(n) do
+  if n <= 1 return 1
+  return n * fact(n - 1)
+end
+print abs(-3) + offset(2)
+print abs(offset(2))
+print sign(3)
+print sign(-3)
+print sign(0)
+print g + bump()
+print shadowed(100)
+for num in 1..2 print abs(num - 5)
+print fact(5)
+'''
+stmts, optimizer = optimize(source)
+inlined = [name for name, line in optimizer.inlined]
+assert(inlined.count('abs') == 3 and inlined.count('offset') == 2 and inlined.count('sign') == 3)
+assert('fact' not in inlined and 'bump' not in inlined and 'shadowed' in inlined)
+assert(optimizer.stats['inlined'] == len(inlined) and 'inlined abs on line 27' in optimizer.report())
+shadowed = [stmt for stmt in stmts if isinstance(stmt, FunctionDefinition) and stmt.name.raw_token == 'shadowed'][0]
+assert(type(shadowed.body.statements[0].value) is FunctionCall)
+for backend in BACKENDS:
+  assert(run(optimize(source)[0], backend) == run(parse(source), backend) == ['15', '12', '1', '-1', 'zero', 'None', '21', '12', '4', '3', '120'])
+
+# and left alone when inlining is off
+optimizer = Optimizer(inline=False)
+optimizer.optimize(parse(source))
+assert(optimizer.inlined == [] and optimizer.stats['inlined'] == 0)
+
+print("All tests passed.")
@@ -0,0 +1,77 @@
+import os
+import tempfile
+from src.modules import ModuleLoader
+from src.profiler import Profiler, MAIN, SCRIPT
+from src.sardine_function import SardineFunction
+from src.nodes import Print, Return
+from tests.helpers import run
+
+PROGRAM = '''def fib(n) do
+  if n < 2 return n
+  return fib(n - 1) + fib(n - 2)
+end
+def count(n) do
+  if n <= 0 return 0
+  return count(n - 1)
+end
+print fib(10)
+print count(50)
+'''
+
+
+def profile(source, loader=None):
+  profiler = Profiler()
+  with profiler:
+    out = run(source, memoize=False, loader=loader)
+  return profiler, out
+
+
+function_run, print_evaluate, return_evaluate = SardineFunction.run, Print.evaluate, Return.evaluate
+profiler, out = profile(PROGRAM)
+assert(out == ['55', '0'])
+
+# the original methods are back once the profiler is uninstalled
+assert(SardineFunction.run is function_run and Print.evaluate is print_evaluate and Return.evaluate is return_evaluate)
+
+# calls by definition name and line, tail calls included
+functions = {stats.label(): stats for stats in profiler.functions.values()}
+assert(functions['fib@<script>:1'].calls == 177 and functions['count@<script>:5'].calls == 51)
+assert(functions[MAIN].calls == 1)
+
+# recursive calls are counted once towards inclusive time
+main, fib = functions[MAIN], functions['fib@<script>:1']
+assert(fib.exclusive <= fib.inclusive <= main.inclusive)
+assert(abs(sum(stats.exclusive for stats in functions.values()) - main.inclusive) < 1e-3)
+
+# statements run per line
+assert(profiler.lines[(SCRIPT, 9)].count == 1 and profiler.lines[(SCRIPT, 3)].count == 88)
+
+# collapsed stacks nest callers before callees and sum to the time of the program
+stacks = dict(line.rsplit(' ', 1) for line in profiler.collapsed())
+assert(MAIN + ';fib@<script>:1;fib@<script>:1' in stacks and MAIN + ';count@<script>:5' in stacks)
+assert(MAIN + ';count@<script>:5;count@<script>:5' not in stacks)
+assert(abs(sum(int(us) for us in stacks.values()) / 1e6 - main.inclusive) < 1e-3)
+
+report = profiler.report().splitlines()
+assert(report[0].split() == ['function', 'calls', 'inclusive', 'ms', 'exclusive', 'ms'])
+assert(any(line.startswith('fib@<script>:1') for line in report))
+
+# an imported module's statements and functions are kept apart from the script's, even
+# where their lines and names are the same
+directory = tempfile.mkdtemp()
+with open(os.path.join(directory, 'geo.sd'), 'w') as f:
+  f.write('def double(x) do\n  return x * 2\nend\ndef quad(x) do\n  return double(double(x))\nend\n')
+profiler, out = profile('''import geo
+def double(x) do
+  return x + x
+end
+print quad(1)
+print double(5)
+''', ModuleLoader([directory], memoize=False))
+assert(out == ['4', '10'])
+functions = {stats.label(): stats for stats in profiler.functions.values()}
+assert(functions['double@geo.sd:1'].calls == 2 and functions['double@<script>:2'].calls == 1)
+assert(profiler.lines[('geo.sd', 2)].count == 2 and profiler.lines[(SCRIPT, 2)].count == 1)
+assert(profiler.lines[(SCRIPT, 3)].count == 1)
+stacks = dict(line.rsplit(' ', 1) for line in profiler.collapsed())
+assert(MAIN + ';quad@geo.sd:4;double@geo.sd:1' in stacks and MAIN + ';double@<script>:2' in stacks)
@@ -0,0 +1,69 @@
+from src.interpreter import Interpreter, BACKENDS
+from src.resolver import Resolver
+from tests.helpers import parse, run
+
+
+def check(source, expected):
+  for backend in BACKENDS:
+    assert run(source, backend) == expected, backend
+
+
+# locals and parameters resolve to slots of the call frame, globals to the outermost frame
+stmts = Resolver().resolve(parse('''dec g = 1
+def f(a, b) do
+  dec c = a
+  return b + c + g
+end
+'''))
+fun = stmts[1]
+assert(fun.slot_count == 3)
+ret = fun.body.statements[1]
+assert((ret.value.left.right.depth, ret.value.left.right.slot) == (0, 2))
+assert((ret.value.right.depth, ret.value.right.slot) == (1, 0))
+
+# functions see the scope they were defined in, not the caller's
+source = '''dec x = "global"
+def show() do
+  print x
+end
+def caller() do
+  dec x = "local"
+  show()
+end
+caller()
+'''
+check(source, ['global'])
+
+# functions may refer to globals defined after them
+source = '''def twice() do
+  return double(2)
+end
+def double(n) do
+  return n * 2
+end
+print twice()
+'''
+check(source, ['4'])
+
+# recursion and nested functions
+source = '''def pow(x, n) do
+  if n <= 1 return x
+  return x * pow(x, n-1)
+end
+def outer(k) do
+  def inner(m) do
+    return m + k
+  end
+  return inner(pow(2, 3))
+end
+print outer(1)
+'''
+check(source, ['9'])
+
+# global slots persist across interpret calls, as in the REPL
+for backend in BACKENDS:
+  interpreter = Interpreter(backend)
+  run('dec a = 40\n', interpreter=interpreter)
+  assert(run('print a + 2\n', interpreter=interpreter) == ['42'])
+
+print("All tests passed.")
@@ -0,0 +1,50 @@
+from src.interpreter import BACKENDS
+from tests.helpers import run
+
+
+def check(source, expected):
+  for backend in BACKENDS:
+    assert run(source, backend) == expected, backend
+
+
+# assignment inside a block updates the enclosing binding
+source = '''dec x = 1
+do
+  x = 2
+end
+print x
+'''
+check(source, ['2'])
+
+# declarations shadow and are dropped when the block exits
+source = '''dec x = 1
+do
+  dec x = 5
+  x = x + 1
+  print x
+end
+print x
+'''
+check(source, ['6', '1'])
+
+# block locals do not leak
+source = '''do
+  dec y = 3
+end
+print y
+'''
+check(source, ['None'])
+
+# nested blocks assign through several scopes
+source = '''dec total = 0
+do
+  dec step = 2
+  do
+    total = total + step
+  end
+end
+print total
+'''
+check(source, ['2'])
+
+print("All tests passed.")
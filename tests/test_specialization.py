@@ -0,0 +1,82 @@
+from src.interpreter import Interpreter
+from src.nodes import Binary, Variable, walk
+from src import nodes
+from tests import helpers
+
+
+def run(source, interpreter=None):
+  nodes.reset_specialization_counts()
+  interpreter = interpreter or Interpreter(memoize=False)
+  statements = helpers.parse(source)
+  return statements, helpers.run(statements, interpreter=interpreter), interpreter.specialization_stats()
+
+
+def binaries(statements):
+  return [node for stmt in statements for node in walk(stmt) if isinstance(node, Binary)]
+
+
+# nodes that run once stay as they are, nodes that run again specialize to what they saw
+statements, out, stats = run('''dec total = 0
+for i in 1..10 total = total + i * 2.5
+print total / 5
+''')
+assert(out == ['27.5'])
+assert(stats['specialized'] == {'float + float': 1, 'int * float': 1, 'variable depth 0': 1, 'variable depth 1': 1})
+assert(stats['deoptimized'] == {})
+assert('evaluate' not in vars(binaries(statements)[-1]))
+
+# a type the guard did not expect sends the node back to the generic form for good
+statements, out, stats = run('''def add(a, b) do
+  return a + b
+end
+print add(1, 2)
+print add(3, 4)
+print add("a", "b")
+print add(5, 6)
+''')
+assert(out == ['3', '7', 'ab', '11'])
+assert(stats['specialized']['int + int'] == 1 and stats['deoptimized'] == {'int + int': 1})
+plus = binaries(statements)[0]
+assert(plus.evaluate == plus.generic)
+
+# '/' keeps its exact integer division when specialized to integers
+statements, out, stats = run('''def half(n) do
+  return n / 2
+end
+print half(8)
+print half(8)
+print half(7)
+for i in 1..2 print -half(4.0)
+''')
+assert(out == ['4', '4', '3.5', '-2.0', '-2.0'])
+assert(stats['specialized']['int / int'] == 1 and stats['deoptimized'] == {'int / int': 1})
+assert(stats['specialized']['- float'] == 1)
+
+# a recursive node specializes once, when its innermost call returns
+statements, out, stats = run('''def sum(n) do
+  if n <= 0 return 0
+  return n + sum(n - 1)
+end
+print sum(50)
+''')
+assert(out == ['1275'] and stats['specialized']['int + int'] == 1 and stats['specialized']['int - int'] == 1)
+
+# resolving a variable again drops what it specialized to
+interpreter = Interpreter(memoize=False)
+statements, out, stats = run('dec x = 1\nfor i in 1..2 print x\n', interpreter)
+variable = [node for node in walk(statements[1]) if isinstance(node, Variable)][0]
+assert(out == ['1', '1'] and 'evaluate' in vars(variable))
+interpreter.resolver.resolve(statements)
+assert('evaluate' not in vars(variable))
+
+# the switch, and the other backends, leave the nodes alone
+nodes.specializing = False
+try:
+  statements, out, stats = run('for i in 1..3 print i * 2\n')
+  assert(out == ['2', '4', '6'] and stats == {'specialized': {}, 'deoptimized': {}})
+finally:
+  nodes.specializing = True
+statements, out, stats = run('for i in 1..3 print i * 2\n', Interpreter('closure'))
+assert(out == ['2', '4', '6'] and stats['specialized'] == {})
+
+print("All tests passed.")
@@ -0,0 +1,101 @@
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.nodes import line_of
+from src.interpreter import Interpreter, BACKENDS
+from src.sardine import SardineLang
+from tests.helpers import output
+
+PROGRAM = '''dec total = 0
+def add(x) do
+  total = total + x
+  return total
+end
+print "sum"
+for i in 1..3 add(i)
+print total
+'''
+
+
+def lines(source, read):
+  # the source line by line, noting in read how many lines have been handed out
+  for line in source.splitlines(True):
+    read.append(line)
+    yield line
+
+
+def stream(source, backend):
+  return output(Interpreter(backend).interpret_stream, Parser(Tokenizer('').stream(lines(source, []))).declarations())
+
+
+# declarations parsed from a stream match a whole parse
+def outline(statements):
+  return [(type(stmt).__name__, line_of(stmt)) for stmt in statements]
+
+streamed = Parser(Tokenizer('').stream(lines(PROGRAM, []))).declarations()
+assert(outline(streamed) == outline(Parser(Tokenizer(PROGRAM).tokenize()).parse()))
+
+# a string may span the lines the source is read in
+tokens = list(Tokenizer('').stream(['print "a\n', 'b"\n']))
+assert(tokens[1].value == 'a\nb' and tokens[1].line == 2 and len(tokens) == 3)
+
+for backend in BACKENDS:
+  assert(stream(PROGRAM, backend) == ['sum', '6']), backend
+
+# each declaration runs once it is complete, before the rest of the source is read
+read, out, progress = [], io.StringIO(), []
+def check_progress(declarations):
+  for declaration in declarations:
+    yield declaration
+    progress.append((out.getvalue(), len(read)))
+with redirect_stdout(out):
+  parser = Parser(Tokenizer('').stream(lines(PROGRAM, read)))
+  Interpreter().interpret_stream(check_progress(parser.declarations()))
+assert(out.getvalue().split() == ['sum', '6'])
+assert(progress[2] == ('sum\n', 6))
+
+# the parser only holds the tokens of the declaration being parsed
+source = ''.join('print %d + %d * 2\n' % (i, i) for i in range(1000))
+parser = Parser(Tokenizer('').stream(lines(source, [])))
+for declaration in parser.declarations():
+  assert(len(parser.tokens) <= 7)
+
+# a top-level return ends the program without reading further
+for backend in BACKENDS:
+  read = []
+  out = io.StringIO()
+  with redirect_stdout(out):
+    Interpreter(backend).interpret_stream(Parser(Tokenizer('').stream(lines('print 1\nreturn\nprint 2\nprint 3\n', read))).declarations())
+  assert(out.getvalue().split() == ['1'] and len(read) < 4), backend
+
+# a character no token starts with is reported, with its line, and skipped
+out = io.StringIO()
+with redirect_stdout(out):
+  tokens = list(Tokenizer('').stream(lines('dec x = 1\nprint x $ 2\n', [])))
+assert(out.getvalue() == "SyntaxError: One line 2, at '$'. \n")
+assert([t.raw_token for t in tokens] == [t.raw_token for t in Tokenizer('dec x = 1\nprint x 2\n').tokenize()])
+
+# scripts stream from disk
+fd, path = tempfile.mkstemp(suffix='.sd')
+with os.fdopen(fd, 'w') as f:
+  f.write(PROGRAM.rstrip('\n'))
+try:
+  out = io.StringIO()
+  with redirect_stdout(out):
+    SardineLang.interpreter = Interpreter()
+    SardineLang.run([path, '--stream'])
+  assert(out.getvalue().split() == ['sum', '6'])
+finally:
+  os.remove(path)
+
+# the resolver forgets a streamed declaration's writes once it has run, so streaming stays
+# linear in the declarations, and a global redefined after it is called still reaches its callers
+source = 'def f(x) do\n  return x\nend\nprint f(1)\n' + ''.join('dec v%d = %d\nv%d = v%d + 1\n' % (i, i, i, i) for i in range(2000))
+interpreter = Interpreter()
+assert(output(interpreter.interpret_stream, Parser(Tokenizer('').stream(lines(source + 'def f(x) do\n  return x + v1\nend\nprint f(1)\n', []))).declarations()) == ['1', '3'])
+assert(sum(len(writers) for writers in interpreter.resolver.writers.values()) == 0)
+
+print("All tests passed.")
@@ -0,0 +1,66 @@
+import sys
+from src.resolver import Resolver
+from src.interpreter import BACKENDS
+from tests.helpers import parse, run
+
+
+DEPTH = sys.getrecursionlimit() * 20
+
+# only calls whose result is returned unchanged are in tail position
+stmts = Resolver().resolve(parse('''def f(n) do
+  if n <= 0 return 0
+  if n == 1 return f(0) + 1
+  return f(n - 1)
+end
+return f(1)
+'''))
+returns = [stmts[0].body.statements[0].then_branch, stmts[0].body.statements[1].then_branch, stmts[0].body.statements[2]]
+assert([r.tail for r in returns] == [False, False, True])
+assert(stmts[1].tail == False)
+
+# accumulator-style self recursion runs in constant stack on every backend
+source = '''def sum_to(n, acc) do
+  if n <= 0 return acc
+  return sum_to(n - 1, acc + n)
+end
+print sum_to(%d, 0)
+''' % DEPTH
+for backend in BACKENDS:
+  assert run(source, backend) == [str(DEPTH * (DEPTH + 1) // 2)], backend
+
+# mutual recursion too, except on the python backend, which only loops self calls
+source = '''def is_even(n) do
+  if n == 0 return True
+  return is_odd(n - 1)
+end
+def is_odd(n) do
+  if n == 0 return False
+  return is_even(n - 1)
+end
+print is_even(%d)
+''' % (DEPTH + 1)
+for backend in BACKENDS:
+  if backend != 'python':
+    assert run(source, backend) == ['False'], backend
+
+# tail calls through blocks and to functions defined in other scopes
+source = '''def countdown(n) do
+  if n > 0 do
+    dec next = n - 1
+    return countdown(next)
+  end
+  return "done"
+end
+def outer() do
+  def helper(n) do
+    return n * 2
+  end
+  return helper(21)
+end
+print countdown(%d)
+print outer()
+''' % DEPTH
+for backend in BACKENDS:
+  assert run(source, backend) == ['done', '42'], backend
+
+print("All tests passed.")
@@ -1,5 +1,8 @@
+import io
+from contextlib import redirect_stdout
 from src.tokenizer import Tokenizer
 from src.token import TokenType
+from src.parser import Parser
 
 
 tokenizer1 = Tokenizer("this is a ( test ) string.")
@@ -71,4 +74,63 @@ t9 = Tokenizer(source)
 tokens = [str(t) for t in t9.tokenize()]
 # print(tokens)
 
+# the regex and scanning tokenizers agree on types, lexemes, values and lines
+def described(source, mode):
+  return [(t.type, t.raw_token, t.value, t.line) for t in Tokenizer(source, mode).tokenize()]
+
+source = """import math
+# a comment with "quotes" and ( symbols
+def f(a, b) do
+\tdec s = "two
+lines"   
+  if a <= b and not (a == b) or a >= 1.5 return a != 2.
+  for i in 1..10 print i / 3 * -x
+end
+print f(1, 2)   """
+assert(described(source, 'regex') == described(source, 'scan'))
+tokens = Tokenizer(source).tokenize()
+assert(tokens[-1].type == TokenType.RIGHT_PAREN and tokens[-1].line == 9)
+strings = [t for t in tokens if t.type == TokenType.STRING]
+assert(strings[0].value == 'two\nlines' and strings[0].line == 5)
+assert([t.type for t in tokens[:3]] == [TokenType.IMPORT, TokenType.IDENTIFIER, TokenType.NEWLINE])
+assert(tokens[2].line == 2)
+
+# a TokenBuffer holds the same tokens as type codes and source spans
+buffer = Tokenizer(source).buffer()
+assert(len(buffer) == len(tokens))
+assert([(t.type, t.raw_token, t.value, t.line) for t in buffer] == described(source, 'scan'))
+assert(buffer[-1].line == 9 and buffer[-1].type == TokenType.RIGHT_PAREN)
+assert(buffer.types.itemsize == 1 and len(buffer.breaks) == source.count('\n'))
+assert(buffer.nbytes() < len(buffer) * 12)
+
+try:
+  Tokenizer(source, 'fast')
+  assert(False)
+except ValueError:
+  pass
+
+# the parser reads a TokenBuffer directly
+statements = Parser(Tokenizer(source + '\n').buffer()).parse()
+assert([type(stmt) for stmt in statements] == [type(stmt) for stmt in Parser(Tokenizer(source + '\n').tokenize()).parse()])
+assert([str(arg) for arg in statements[-1].expr.arguments] == ['1', '2'])
+assert(statements[1].name.raw_token == 'f' and statements[1].name.line == 3)
+
+# a character no token starts with is reported, with its line, and skipped
+out = io.StringIO()
+with redirect_stdout(out):
+  buffer = Tokenizer('dec x = 1\nprint x $ 2\n').buffer()
+assert(out.getvalue() == "SyntaxError: One line 2, at '$'. \n")
+assert([t.raw_token for t in buffer] == [t.raw_token for t in Tokenizer('dec x = 1\nprint x 2\n').buffer()])
+
+# a string never closed is one error, reported at the end of the source, in every mode
+source = 'print 1\nprint "never $ closed\ndec x = 2\n'
+for lex in (lambda: Tokenizer(source).tokenize(), lambda: Tokenizer(source, 'scan').tokenize(),
+    lambda: Tokenizer(source).buffer(), lambda: Tokenizer('').stream(source.splitlines(True))):
+  out = io.StringIO()
+  with redirect_stdout(out):
+    tokens = [(t.type, t.raw_token, t.line) for t in lex()]
+  assert(out.getvalue() == "SyntaxError: One line 4, at '\"'. \n")
+  assert(tokens == [(TokenType.PRINT, 'print', 1), (TokenType.NUMBER, '1', 1), (TokenType.NEWLINE, '\n', 2),
+    (TokenType.PRINT, 'print', 2)])
+
 print("All tests passed.")
\ No newline at end of file
@@ -0,0 +1,67 @@
+import io
+from contextlib import redirect_stdout
+from src.tokenizer import Tokenizer
+from src.parser import Parser
+from src.transpiler import Transpiler
+from src.sardine import SardineLang
+
+
+def transpile(source):
+  return Transpiler().transpile(Parser(Tokenizer(source).tokenize()).parse(), '<test>')
+
+
+# def becomes a python function, dec a global or a uniquely named local
+module = transpile('''dec PI = 3.14159
+def area(r) do
+  dec sq = r * r
+  return PI * sq
+end
+print area(2)
+''')
+assert('def area(r_1):' in module.source)
+assert('sq_2 = (r_1 * r_1)' in module.source)
+assert('PI = 3.14159' in module.source)
+out = io.StringIO()
+with redirect_stdout(out):
+  namespace = module.run()
+assert(out.getvalue() == '12.56636\n')
+assert(namespace['area'](1.0) == 3.14159)
+
+# names python reserves are renamed, and shadowing locals stay apart
+module = transpile('''dec lambda = 1
+do
+  dec lambda = 2
+  print lambda
+end
+print lambda
+''')
+out = io.StringIO()
+with redirect_stdout(out):
+  module.run()
+assert(out.getvalue() == '2\n1\n')
+
+# generated lines map back to the sardine source, including in tracebacks
+module = transpile('''def broken(x) do
+  dec y = x
+  return y()
+end
+broken(1)
+''')
+python_line = module.source.split('\n').index('  return y_2()') + 1
+assert(module.sardine_line(python_line) == 3)
+try:
+  module.run()
+  assert(False)
+except TypeError as e:
+  assert(module.sardine_frames(e.__traceback__) == [('<module>', 5), ('broken', 3)])
+
+# the generated module compiles once and can be rerun
+module = SardineLang.transpile_file('test.sd')
+code = module.compile()
+for _ in range(2):
+  out = io.StringIO()
+  with redirect_stdout(out):
+    module.run(code=code)
+  assert(out.getvalue() == '-41.8\n')
+
+print("All tests passed.")
@@ -0,0 +1,48 @@
+import sys
+from src.resolver import Resolver
+from src.interpreter import Interpreter
+from src.bytecode_compiler import BytecodeCompiler
+from src.bytecode import disassemble, Code
+from tests import helpers
+from tests.helpers import parse
+
+
+def run(source):
+  return helpers.run(source, 'vm')
+
+
+# function bodies compile to their own code objects with a constant pool
+code = BytecodeCompiler().compile(Resolver().resolve(parse('''def cel_to_fah(x) do
+  return 1.8*x + 32
+end
+''')))
+function = code.constants[0]
+assert(isinstance(function, Code))
+assert((function.name, function.arity, function.slot_count) == ('cel_to_fah', 1, 1))
+assert(function.constants[:2] == [1.8, 32.0])
+
+listing = disassemble(code)
+assert('MAKE_FUNCTION' in listing)
+assert('== cel_to_fah (arity 1, slots 1) ==' in listing)
+assert('MULTIPLY' in listing and 'ADD' in listing)
+
+# jumps land past the branch they skip
+listing = disassemble(BytecodeCompiler().compile(Resolver().resolve(parse('if 1 < 2 print "yes"\n'))))
+assert('JUMP_IF_FALSE         3  (to 10)' in listing)
+
+# sardine calls do not recurse in python, so depth is not bound by the recursion limit
+source = '''def count(n) do
+  if n <= 0 return 0
+  return 1 + count(n - 1)
+end
+print count(%d)
+''' % (sys.getrecursionlimit() * 5)
+assert(run(source) == [str(sys.getrecursionlimit() * 5)])
+
+# vm functions can still be called from python
+interpreter = Interpreter('vm')
+interpreter.interpret(parse('def add(a, b) do\n  return a + b\nend\n'))
+add = interpreter.environment.values[interpreter.resolver.globals['add']]
+assert(add([1, 2]) == 3)
+
+print("All tests passed.")